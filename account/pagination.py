@@ -0,0 +1,6 @@
+from core.pagination import KeysetPagination
+
+
+class UserPagination(KeysetPagination):
+    ordering = ('-date_joined', 'id')
+    max_page_size = 100
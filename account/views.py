@@ -5,26 +5,22 @@ from django.contrib.auth import get_user_model
 from drf_spectacular.utils import extend_schema
 from rest_framework.mixins import CreateModelMixin, RetrieveModelMixin, UpdateModelMixin, DestroyModelMixin
 from rest_framework.viewsets import GenericViewSet
+from rest_framework.generics import ListAPIView
 from account.auth.permissions import IsStaffUser
 from account.auth.serializers import (UserSerializer)
 from account.models import CustomerProfile, SellerProfile, StaffProfile
 from account.serializers import CustomerProfileSerializer, SellerProfileSerializer, StaffProfileSerializer
+from account.pagination import UserPagination
 
 
 
 User = get_user_model()
 
-@extend_schema(
-    responses={200: UserSerializer(many=True)}
-)
-class UsersStuffListView(APIView):
+class UsersStuffListView(ListAPIView):
      permission_classes = [IsAuthenticated, IsStaffUser]
-     
-     
-     def get(self, request):
-        users = User.objects.all()
-        serializer = UserSerializer(users, many=True)
-        return Response(serializer.data)
+     queryset = User.objects.all()
+     serializer_class = UserSerializer
+     pagination_class = UserPagination
         
 class MeView(APIView):
     permission_classes = [IsAuthenticated]
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import DailyStoreSales
+
+@admin.register(DailyStoreSales)
+class DailyStoreSalesAdmin(admin.ModelAdmin):
+    list_display = ['store', 'date', 'revenue', 'units', 'orders', 'cancelled_amount', 'returned_amount']
+    list_filter = ['date']
+    search_fields = ['store__name']
+    readonly_fields = ['store', 'date', 'revenue', 'units', 'orders', 'cancelled_amount', 'returned_amount']
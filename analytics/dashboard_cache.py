@@ -0,0 +1,70 @@
+import time
+from django.core.cache import cache
+from core.cache import bump_versions, get_version
+
+# How long a computed dashboard is served as is
+DASHBOARD_FRESH_FOR = 60
+# How long a stale dashboard may still be served while it is being recomputed
+DASHBOARD_TIMEOUT = 60 * 60
+# Upper bound on one recomputation; a crashed worker's lock expires after this
+REFRESH_LOCK_TIMEOUT = 30
+# How long a caller with nothing to serve waits for another caller's recomputation
+REFRESH_WAIT = 5
+REFRESH_POLL_INTERVAL = 0.05
+
+
+def dashboard_version_key(store_id):
+    return f"analytics:dashboard:{store_id}:version"
+
+
+def latest_dashboard_key(store_id):
+    # The last payload built under any version, served while the current one is being built
+    return f"analytics:dashboard:{store_id}:latest"
+
+
+def invalidate_dashboards(store_ids):
+    """Drop the cached dashboards of these stores (new orders, cancellations, status changes)."""
+    bump_versions([dashboard_version_key(store_id) for store_id in set(store_ids)])
+
+
+def wait_for_entry(key):
+    deadline = time.monotonic() + REFRESH_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(REFRESH_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def cached_dashboard(store_id, build):
+    """
+    The dashboard payload for `store_id`, from the cache when possible.
+
+    Entries are served as they are for DASHBOARD_FRESH_FOR seconds. Once an
+    entry is stale, or missing because an order change moved the store's
+    version counter, only the request that wins the refresh lock recomputes
+    it with `build()`. The others get the stale entry, else the last payload
+    built under an earlier version, else they wait up to REFRESH_WAIT
+    seconds for the winner's result before building it themselves.
+    """
+    key = f"analytics:dashboard:{store_id}:{get_version(dashboard_version_key(store_id))}"
+    entry = cache.get(key)
+    if entry is not None and time.time() < entry['fresh_until']:
+        return entry['data']
+
+    # cache.add is SET NX: exactly one caller refreshes
+    locked = cache.add(f"{key}:lock", 1, timeout=REFRESH_LOCK_TIMEOUT)
+    if not locked:
+        entry = entry or cache.get(latest_dashboard_key(store_id)) or wait_for_entry(key)
+        if entry is not None:
+            return entry['data']
+
+    try:
+        data = build()
+        entry = {'data': data, 'fresh_until': time.time() + DASHBOARD_FRESH_FOR}
+        cache.set_many({key: entry, latest_dashboard_key(store_id): entry}, timeout=DASHBOARD_TIMEOUT)
+        return data
+    finally:
+        if locked:
+            cache.delete(f"{key}:lock")
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from store.models import Store
+from analytics.rollup import rebuild_store
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the daily store sales rollup from store orders and order items (backfill after "
+        "migrating, or repair after editing orders outside the API)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('stores', nargs='*', type=int, help="Only rebuild these stores.")
+
+    def handle(self, *args, **options):
+        store_ids = options['stores'] or list(Store.objects.order_by('pk').values_list('pk', flat=True))
+        days = 0
+        for index, store_id in enumerate(store_ids, start=1):
+            written = rebuild_store(store_id)
+            days += written
+            self.stdout.write(f"Store {store_id} ({index}/{len(store_ids)}): {written} days.")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {days} days of sales for {len(store_ids)} stores."))
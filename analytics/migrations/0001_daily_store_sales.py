@@ -0,0 +1,63 @@
+# Generated by Django 6.0 on 2026-10-18 21:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_sales(apps, schema_editor):
+    OrderItem = apps.get_model('order', 'OrderItem')
+    StoreOrder = apps.get_model('order', 'StoreOrder')
+    DailyStoreSales = apps.get_model('analytics', 'DailyStoreSales')
+    day = TruncDate('order__created_at')
+    units = {
+        (row['store_id'], row['day']): row['units']
+        for row in OrderItem.objects.annotate(day=day).values('store_id', 'day')
+        .annotate(units=models.Sum('quantity')).order_by().iterator()
+    }
+    parts = StoreOrder.objects.annotate(day=day).values('store_id', 'day').annotate(
+        revenue=models.Sum('subtotal'),
+        orders=models.Count('pk'),
+        cancelled_amount=models.Sum('subtotal', filter=models.Q(status='cancelled'), default=0),
+        returned_amount=models.Sum('subtotal', filter=models.Q(status='returned'), default=0),
+    ).order_by()
+    DailyStoreSales.objects.bulk_create([
+        DailyStoreSales(
+            store_id=part['store_id'], date=part['day'], revenue=part['revenue'],
+            units=units.get((part['store_id'], part['day']), 0), orders=part['orders'],
+            cancelled_amount=part['cancelled_amount'], returned_amount=part['returned_amount'],
+        )
+        for part in parts.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('order', '0005_partition_by_month'),
+        ('store', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStoreSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('units', models.PositiveBigIntegerField(default=0)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('cancelled_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('returned_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='store.store')),
+            ],
+            options={
+                'verbose_name_plural': 'daily store sales',
+                'ordering': ['store', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('store', 'date'), name='analytics_dailystoresales_unique_day')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_sales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 6.0 on 2026-10-18 21:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.functions import TruncHour
+
+
+def backfill_hourly_sales(apps, schema_editor):
+    OrderItem = apps.get_model('order', 'OrderItem')
+    StoreOrder = apps.get_model('order', 'StoreOrder')
+    HourlyStoreSales = apps.get_model('analytics', 'HourlyStoreSales')
+    hour = TruncHour('order__created_at')
+    units = {
+        (row['store_id'], row['hour']): row['units']
+        for row in OrderItem.objects.annotate(hour=hour).values('store_id', 'hour')
+        .annotate(units=models.Sum('quantity')).order_by().iterator()
+    }
+    parts = StoreOrder.objects.annotate(hour=hour).values('store_id', 'hour').annotate(
+        revenue=models.Sum('subtotal'), orders=models.Count('pk'),
+    ).order_by()
+    HourlyStoreSales.objects.bulk_create([
+        HourlyStoreSales(
+            store_id=part['store_id'], hour=part['hour'], revenue=part['revenue'],
+            units=units.get((part['store_id'], part['hour']), 0), orders=part['orders'],
+        )
+        for part in parts.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_daily_store_sales'),
+        ('store', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HourlyStoreSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('units', models.PositiveBigIntegerField(default=0)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_sales', to='store.store')),
+            ],
+            options={
+                'verbose_name_plural': 'hourly store sales',
+                'ordering': ['store', 'hour'],
+                'constraints': [models.UniqueConstraint(fields=('store', 'hour'), name='analytics_hourlystoresales_unique_hour')],
+            },
+        ),
+        migrations.RunPython(backfill_hourly_sales, migrations.RunPython.noop),
+    ]
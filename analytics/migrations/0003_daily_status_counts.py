@@ -0,0 +1,62 @@
+# Generated by Django 6.0 on 2026-10-18 21:42
+
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def backfill_status_counts(apps, schema_editor):
+    StoreOrder = apps.get_model('order', 'StoreOrder')
+    DailyStoreSales = apps.get_model('analytics', 'DailyStoreSales')
+    rows = {(row.store_id, row.date): row for row in DailyStoreSales.objects.iterator()}
+    counts = StoreOrder.objects.annotate(day=TruncDate('order__created_at'))\
+        .values('store_id', 'day', 'status').annotate(count=models.Count('pk')).order_by()
+    for count in counts.iterator():
+        row = rows.get((count['store_id'], count['day']))
+        if row is not None:
+            setattr(row, f"{count['status']}_orders", count['count'])
+    DailyStoreSales.objects.bulk_update(
+        list(rows.values()),
+        [f'{status}_orders' for status in ('pending', 'processing', 'shipped', 'delivered', 'cancelled', 'returned')],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_hourly_store_sales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailystoresales',
+            name='cancelled_orders',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dailystoresales',
+            name='delivered_orders',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dailystoresales',
+            name='pending_orders',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dailystoresales',
+            name='processing_orders',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dailystoresales',
+            name='returned_orders',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dailystoresales',
+            name='shipped_orders',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_status_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 21:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_daily_status_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailystoresales',
+            name='has_archived_orders',
+            field=models.BooleanField(db_default=False),
+        ),
+    ]
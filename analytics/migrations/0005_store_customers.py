@@ -0,0 +1,45 @@
+# Generated by Django 6.0 on 2026-10-18 22:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_store_customers(apps, schema_editor):
+    # Customers whose orders were already archived are not known any more
+    StoreOrder = apps.get_model('order', 'StoreOrder')
+    StoreCustomer = apps.get_model('analytics', 'StoreCustomer')
+    customers = StoreOrder.objects.values('store_id', 'order__user_id').annotate(
+        first_ordered_at=models.Min('order__created_at'),
+    ).order_by()
+    StoreCustomer.objects.bulk_create([
+        StoreCustomer(
+            store_id=row['store_id'], user_id=row['order__user_id'], first_ordered_at=row['first_ordered_at'],
+        )
+        for row in customers.iterator()
+    ], batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_daily_sales_archived_flag'),
+        ('store', '0003_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoreCustomer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_ordered_at', models.DateTimeField()),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='customers', to='store.store')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['store', 'first_ordered_at'],
+                'constraints': [models.UniqueConstraint(fields=('store', 'user'), name='analytics_storecustomer_unique_customer')],
+            },
+        ),
+        migrations.RunPython(backfill_store_customers, migrations.RunPython.noop),
+    ]
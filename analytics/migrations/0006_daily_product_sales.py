@@ -0,0 +1,45 @@
+# Generated by Django 6.0 on 2026-10-18 22:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def backfill_product_sales(apps, schema_editor):
+    # Days whose orders were already archived start empty
+    OrderItem = apps.get_model('order', 'OrderItem')
+    DailyProductSales = apps.get_model('analytics', 'DailyProductSales')
+    rows = OrderItem.objects.annotate(date=TruncDate('order__created_at')).values(
+        'store_id', 'product_id', 'date'
+    ).annotate(
+        units=models.Sum('quantity'), revenue=models.Sum(models.F('price') * models.F('quantity')),
+    ).order_by()
+    DailyProductSales.objects.bulk_create([DailyProductSales(**row) for row in rows.iterator()], batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_store_customers'),
+        ('product', '0010_product_effective_price_not_null'),
+        ('store', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('units', models.PositiveBigIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='product.product')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_product_sales', to='store.store')),
+            ],
+            options={
+                'verbose_name_plural': 'daily product sales',
+                'ordering': ['store', 'product', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('store', 'product', 'date'), name='analytics_dailyproductsales_unique_day')],
+            },
+        ),
+        migrations.RunPython(backfill_product_sales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,4 @@
+from .daily_product_sales import DailyProductSales
+from .daily_store_sales import DailyStoreSales
+from .hourly_store_sales import HourlyStoreSales
+from .store_customer import StoreCustomer
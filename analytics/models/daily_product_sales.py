@@ -0,0 +1,29 @@
+from django.db import models
+
+
+class DailyProductSales(models.Model):
+    """
+    Units and revenue of one product sold by one store on one day.
+
+    Like the store rollups, `date` is the local date the order was placed
+    and every placement counts, whatever its store order's status is now.
+    The dashboard ranks its top sellers from these rows.
+    """
+    store = models.ForeignKey('store.Store', on_delete=models.CASCADE, related_name='daily_product_sales')
+    product = models.ForeignKey('product.Product', on_delete=models.CASCADE, related_name='daily_sales')
+    date = models.DateField()
+
+    units = models.PositiveBigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['store', 'product', 'date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['store', 'product', 'date'], name='analytics_dailyproductsales_unique_day'
+            ),
+        ]
+        verbose_name_plural = 'daily product sales'
+
+    def __str__(self):
+        return f"{self.store_id} / {self.product_id} / {self.date}"
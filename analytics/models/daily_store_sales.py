@@ -0,0 +1,43 @@
+from django.db import models
+
+
+class DailyStoreSales(models.Model):
+    """
+    One store's sales on one day, maintained as orders are placed and change status.
+
+    `date` is the local date the order was placed; revenue and units count
+    every order placed that day, and the cancelled and returned amounts are
+    the part of that revenue whose store order is currently in that status.
+    The `<status>_orders` counters split the day's store orders by their
+    current status. Dashboards read these rows instead of re-summing order
+    items.
+    """
+    store = models.ForeignKey('store.Store', on_delete=models.CASCADE, related_name='daily_sales')
+    date = models.DateField()
+
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units = models.PositiveBigIntegerField(default=0)
+    orders = models.PositiveIntegerField(default=0)
+    cancelled_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    returned_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    # Signed so a status move applied to a row out of step with its orders cannot fail the checkout
+    pending_orders = models.IntegerField(default=0)
+    processing_orders = models.IntegerField(default=0)
+    shipped_orders = models.IntegerField(default=0)
+    delivered_orders = models.IntegerField(default=0)
+    cancelled_orders = models.IntegerField(default=0)
+    returned_orders = models.IntegerField(default=0)
+
+    # Some of the day's orders were archived out of the live tables, so it can no longer be rebuilt from them
+    has_archived_orders = models.BooleanField(db_default=False)
+
+    class Meta:
+        ordering = ['store', 'date']
+        constraints = [
+            models.UniqueConstraint(fields=['store', 'date'], name='analytics_dailystoresales_unique_day'),
+        ]
+        verbose_name_plural = 'daily store sales'
+
+    def __str__(self):
+        return f"{self.store_id} / {self.date}"
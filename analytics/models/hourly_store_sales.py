@@ -0,0 +1,27 @@
+from django.db import models
+
+
+class HourlyStoreSales(models.Model):
+    """
+    One store's sales in one hour, the finest grain of the sales series.
+
+    Kept alongside DailyStoreSales for hourly charts: `hour` is the start of
+    the hour the orders were placed in. Only placements are counted here;
+    cancelled and returned amounts live on the daily rows.
+    """
+    store = models.ForeignKey('store.Store', on_delete=models.CASCADE, related_name='hourly_sales')
+    hour = models.DateTimeField()
+
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units = models.PositiveBigIntegerField(default=0)
+    orders = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['store', 'hour']
+        constraints = [
+            models.UniqueConstraint(fields=['store', 'hour'], name='analytics_hourlystoresales_unique_hour'),
+        ]
+        verbose_name_plural = 'hourly store sales'
+
+    def __str__(self):
+        return f"{self.store_id} / {self.hour:%Y-%m-%d %H:00}"
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.db import models
+
+
+class StoreCustomer(models.Model):
+    """
+    A customer who has ordered from a store at least once.
+
+    Written when an order is placed and never removed when its orders are
+    archived, so the dashboard's customer count keeps agreeing with the
+    sales rollups, which also outlive the orders they summarise.
+    """
+    store = models.ForeignKey('store.Store', on_delete=models.CASCADE, related_name='customers')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    first_ordered_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['store', 'first_ordered_at']
+        constraints = [
+            models.UniqueConstraint(fields=['store', 'user'], name='analytics_storecustomer_unique_customer'),
+        ]
+
+    def __str__(self):
+        return f"{self.store_id} / {self.user_id}"
@@ -0,0 +1,6 @@
+from core.pagination import KeysetPagination
+
+
+class StoreSalesPagination(KeysetPagination):
+    ordering = ('-gmv', 'id')
+    max_page_size = 100
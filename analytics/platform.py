@@ -0,0 +1,54 @@
+"""
+Platform-wide sales figures for staff, read from the DailyStoreSales rollup.
+
+GMV is the revenue of every order placed in the range; net GMV leaves out
+the part since cancelled or returned, and commission is net GMV at each
+store's current `commission_rate` (a percentage). Order counts are store
+orders, one per store in an order.
+"""
+from decimal import Decimal
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from store.models import Store
+from .models import DailyStoreSales
+from .rollup import STATUS_COUNTS
+
+AMOUNTS = ['revenue', 'cancelled_amount', 'returned_amount']
+COUNTS = ['orders', 'units', *STATUS_COUNTS.values()]
+
+
+def commission(net, rate):
+    return ExpressionWrapper(net * rate / 100, output_field=DecimalField(max_digits=16, decimal_places=2))
+
+
+def platform_totals(start, end):
+    """Range totals over every store in one aggregate, plus the number of stores currently live."""
+    net = F('revenue') - F('cancelled_amount') - F('returned_amount')
+    # Aliased apart from the columns, which the commission expression still reads row by row
+    sums = DailyStoreSales.objects.filter(date__range=(start, end)).aggregate(
+        **{f'sum_{amount}': Sum(amount, default=Decimal('0')) for amount in AMOUNTS},
+        **{f'sum_{count}': Sum(count, default=0) for count in COUNTS},
+        commission=Sum(commission(net, F('store__commission_rate')), default=Decimal('0')),
+        active_stores=Count('store_id', distinct=True, filter=Q(orders__gt=0)),
+    )
+    totals = {column: sums[f'sum_{column}'] for column in AMOUNTS + COUNTS}
+    totals.update(commission=sums['commission'], active_stores=sums['active_stores'], gmv=totals.pop('revenue'))
+    totals['net_gmv'] = totals['gmv'] - totals['cancelled_amount'] - totals['returned_amount']
+    totals['live_stores'] = Store.objects.filter(is_active=True, is_approved=True, is_suspended=False).count()
+    return totals
+
+
+def stores_by_gmv(start, end):
+    """Every store annotated with its figures for the range, for pagination on -gmv."""
+    in_range = Q(daily_sales__date__range=(start, end))
+    stores = Store.objects.only('id', 'name', 'commission_rate').annotate(
+        gmv=Sum('daily_sales__revenue', filter=in_range, default=Decimal('0')),
+        **{
+            amount: Sum(f'daily_sales__{amount}', filter=in_range, default=Decimal('0'))
+            for amount in AMOUNTS[1:]
+        },
+        **{count: Sum(f'daily_sales__{count}', filter=in_range, default=0) for count in COUNTS},
+    )
+    return stores.annotate(
+        net_gmv=F('gmv') - F('cancelled_amount') - F('returned_amount'),
+        commission=commission(F('gmv') - F('cancelled_amount') - F('returned_amount'), F('commission_rate')),
+    )
@@ -0,0 +1,214 @@
+"""
+Incremental maintenance of the DailyStoreSales, HourlyStoreSales and
+DailyProductSales rollups, and of the StoreCustomer list behind the
+dashboard's customer count.
+
+Order code calls in here inside its own transaction, so a rollup row only
+moves together with the orders it summarises. Every change is expressed as
+per-(store, period) or per-(store, product, date) deltas and applied with one INSERT ... ON CONFLICT DO
+UPDATE that adds them to whatever is there, which is safe under concurrent
+checkouts without reading the rows first.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Count, F, Min, Q, Sum
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+from order.models import Order, OrderItem, StoreOrder
+from .dashboard_cache import invalidate_dashboards
+from .models import DailyProductSales, DailyStoreSales, HourlyStoreSales, StoreCustomer
+
+# Store order statuses whose subtotal is tracked in their own column
+STATUS_AMOUNTS = {Order.Status.CANCELLED: 'cancelled_amount', Order.Status.RETURNED: 'returned_amount'}
+# The column counting a day's store orders currently in each status
+STATUS_COUNTS = {status: f'{status}_orders' for status in Order.Status.values}
+
+COUNTERS = ['revenue', 'units', 'orders', 'cancelled_amount', 'returned_amount', *STATUS_COUNTS.values()]
+HOURLY_COUNTERS = ['revenue', 'units', 'orders']
+PRODUCT_COUNTERS = ['units', 'revenue']
+
+
+def new_delta():
+    delta = dict.fromkeys(COUNTERS, 0)
+    delta.update(revenue=Decimal('0'), cancelled_amount=Decimal('0'), returned_amount=Decimal('0'))
+    return delta
+
+
+def apply_deltas(deltas, model=DailyStoreSales, key=('store_id', 'date'), counters=COUNTERS):
+    """Add `deltas` ({key values: {counter: amount}}) to `model`'s rows, unique on `key`, in one statement."""
+    keys = sorted(row for row, delta in deltas.items() if any(delta[counter] for counter in counters))
+    if not keys:
+        return
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = [*key, *counters]
+    arrays = ', '.join(f"%s::{model._meta.get_field(column).db_type(connection)}[]" for column in columns)
+    values = [[row[position] for row in keys] for position in range(len(key))]
+    values += [[deltas[row][counter] for row in keys] for counter in counters]
+    # Rows are inserted in key order so concurrent writers lock them in the same order
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} AS s ({', '.join(columns)})
+            SELECT * FROM unnest({arrays}) ORDER BY {', '.join(str(n) for n in range(1, len(key) + 1))}
+            ON CONFLICT ({', '.join(key)}) DO UPDATE SET
+            {', '.join(f'{counter} = s.{counter} + EXCLUDED.{counter}' for counter in counters)}
+            """,
+            values,
+        )
+
+
+def record_store_orders(order, items, store_orders):
+    """
+    Count a newly placed order's store orders, with their units and the
+    per-product sales from `items`, register its customer with their stores and drop the cached
+    dashboards of those stores.
+    """
+    placed = timezone.localtime(order.created_at)
+    date, hour = placed.date(), placed.replace(minute=0, second=0, microsecond=0)
+    units = defaultdict(int)
+    products = defaultdict(lambda: dict(units=0, revenue=Decimal('0')))
+    for item in items:
+        units[item.store_id] += item.quantity
+        sold = products[(item.store_id, item.product_id, date)]
+        sold['units'] += item.quantity
+        sold['revenue'] += item.price * item.quantity
+    deltas, hourly = defaultdict(new_delta), defaultdict(new_delta)
+    for store_order in store_orders:
+        for delta in (deltas[(store_order.store_id, date)], hourly[(store_order.store_id, hour)]):
+            delta['revenue'] += store_order.subtotal
+            delta['units'] += units[store_order.store_id]
+            delta['orders'] += 1
+        daily = deltas[(store_order.store_id, date)]
+        daily[STATUS_COUNTS[store_order.status]] += 1
+        if store_order.status in STATUS_AMOUNTS:
+            daily[STATUS_AMOUNTS[store_order.status]] += store_order.subtotal
+    apply_deltas(deltas)
+    apply_deltas(hourly, HourlyStoreSales, ('store_id', 'hour'), HOURLY_COUNTERS)
+    apply_deltas(products, DailyProductSales, ('store_id', 'product_id', 'date'), PRODUCT_COUNTERS)
+    StoreCustomer.objects.bulk_create([
+        StoreCustomer(store_id=store_order.store_id, user_id=order.user_id, first_ordered_at=order.created_at)
+        for store_order in store_orders
+    ], ignore_conflicts=True)
+    invalidate_dashboards(store_order.store_id for store_order in store_orders)
+
+
+def record_status_changes(changes, status):
+    """
+    Move the status counts and the cancelled and returned amounts for store
+    orders going to `status`, and drop the cached dashboards of their stores.
+
+    `changes` is an iterable of (store_id, order_created_at, subtotal,
+    previous_status) read, under lock, before the status was updated.
+    """
+    deltas = defaultdict(new_delta)
+    moved = set()
+    for store_id, created_at, subtotal, previous in changes:
+        if previous == status:
+            continue
+        moved.add(store_id)
+        delta = deltas[(store_id, timezone.localdate(created_at))]
+        delta[STATUS_COUNTS[previous]] -= 1
+        delta[STATUS_COUNTS[status]] += 1
+        if previous in STATUS_AMOUNTS:
+            delta[STATUS_AMOUNTS[previous]] -= subtotal
+        if status in STATUS_AMOUNTS:
+            delta[STATUS_AMOUNTS[status]] += subtotal
+    apply_deltas(deltas)
+    invalidate_dashboards(moved)
+
+
+def mark_archived_days(store_days):
+    """Flag the (store_id, date) rollup rows whose orders are leaving the live tables."""
+    by_date = defaultdict(set)
+    for store_id, day in store_days:
+        by_date[day].add(store_id)
+    for day, store_ids in by_date.items():
+        DailyStoreSales.objects.filter(date=day, store_id__in=store_ids).update(has_archived_orders=True)
+
+
+def mark_archived_period(start, end):
+    """Flag every store's rollup rows dated from `start` up to, not including, `end`."""
+    DailyStoreSales.objects.filter(date__gte=start, date__lt=end).update(has_archived_orders=True)
+
+
+def grouped_sales(store_id, period):
+    """{period start: counters} for one store, from two aggregates grouped on `period` of the order time."""
+    parts = (
+        StoreOrder.objects.filter(store_id=store_id)
+        .annotate(period=period).values('period')
+        .annotate(
+            revenue=Sum('subtotal'),
+            orders=Count('pk'),
+            cancelled_amount=Sum('subtotal', filter=Q(status=Order.Status.CANCELLED), default=Decimal('0')),
+            returned_amount=Sum('subtotal', filter=Q(status=Order.Status.RETURNED), default=Decimal('0')),
+            **{column: Count('pk', filter=Q(status=status)) for status, column in STATUS_COUNTS.items()},
+        )
+        .order_by()
+    )
+    units = dict(
+        OrderItem.objects.filter(store_id=store_id)
+        .annotate(period=period).values('period')
+        .annotate(units=Sum('quantity'))
+        .order_by()
+        .values_list('period', 'units')
+    )
+    sales = {}
+    for part in parts:
+        start = part.pop('period')
+        sales[start] = dict(part, units=units.get(start, 0))
+    return sales
+
+
+def product_sales(store_id):
+    """One store's units and revenue per product and day, grouped from its order items."""
+    return (
+        OrderItem.objects.filter(store_id=store_id)
+        .annotate(date=TruncDate('order__created_at')).values('product_id', 'date')
+        .annotate(units=Sum('quantity'), revenue=Sum(F('price') * F('quantity')))
+        .order_by()
+    )
+
+
+@transaction.atomic
+def rebuild_store(store_id):
+    """
+    Recompute one store's daily, hourly and product rollups from its store orders and items.
+
+    Runs in its own transaction: grouped aggregates, then the store's rows
+    are deleted and written again. Days with archived orders are kept as
+    they are, since the live tables no longer hold all of their sales, and
+    customers are only ever added. Returns the number of days written.
+    """
+    archived = set(
+        DailyStoreSales.objects.filter(store_id=store_id, has_archived_orders=True).values_list('date', flat=True)
+    )
+    days = grouped_sales(store_id, TruncDate('order__created_at'))
+    hours = grouped_sales(store_id, TruncHour('order__created_at'))
+    days = {day: sales for day, sales in days.items() if day not in archived}
+    hours = {hour: sales for hour, sales in hours.items() if timezone.localdate(hour) not in archived}
+
+    DailyStoreSales.objects.filter(store_id=store_id).exclude(date__in=archived).delete()
+    DailyStoreSales.objects.bulk_create([
+        DailyStoreSales(store_id=store_id, date=day, **{counter: sales[counter] for counter in COUNTERS})
+        for day, sales in days.items()
+    ], batch_size=1000)
+    HourlyStoreSales.objects.filter(store_id=store_id).annotate(day=TruncDate('hour'))\
+        .exclude(day__in=archived).delete()
+    HourlyStoreSales.objects.bulk_create([
+        HourlyStoreSales(store_id=store_id, hour=hour, **{counter: sales[counter] for counter in HOURLY_COUNTERS})
+        for hour, sales in hours.items()
+    ], batch_size=1000)
+    DailyProductSales.objects.filter(store_id=store_id).exclude(date__in=archived).delete()
+    DailyProductSales.objects.bulk_create([
+        DailyProductSales(store_id=store_id, **sold)
+        for sold in product_sales(store_id) if sold['date'] not in archived
+    ], batch_size=1000)
+    StoreCustomer.objects.bulk_create([
+        StoreCustomer(store_id=store_id, user_id=user_id, first_ordered_at=first_ordered_at)
+        for user_id, first_ordered_at in StoreOrder.objects.filter(store_id=store_id)
+        .values('order__user_id').annotate(first=Min('order__created_at')).order_by()
+        .values_list('order__user_id', 'first')
+    ], batch_size=1000, ignore_conflicts=True)
+    invalidate_dashboards([store_id])
+    return len(days)
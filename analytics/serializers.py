@@ -1,4 +1,12 @@
+from datetime import timedelta
+from django.utils import timezone
 from rest_framework import serializers
+from order.models import Order
+from store.models import Store
+from .series import GRANULARITIES, MAX_BUCKETS, bucket_count
+
+# Range used when `from` is not given
+DEFAULT_SERIES_DAYS = 30
 
 class SellerDashboardSerializer(serializers.Serializer):
     total_revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
@@ -10,3 +18,99 @@ class SellerDashboardSerializer(serializers.Serializer):
     low_stock_alerts = serializers.ListField(child=serializers.DictField())
     top_selling_products = serializers.ListField(child=serializers.DictField())
     daily_sales = serializers.ListField(child=serializers.DictField())
+
+class DateRangeQuerySerializer(serializers.Serializer):
+    to = serializers.DateField(required=False)
+
+    def get_fields(self):
+        # `from` is a keyword, so it cannot be declared as a class attribute
+        fields = super().get_fields()
+        fields['from'] = serializers.DateField(required=False)
+        return fields
+
+    def validate(self, attrs):
+        end = attrs.get('to') or timezone.localdate()
+        start = attrs.get('from') or end - timedelta(days=DEFAULT_SERIES_DAYS - 1)
+        if start > end:
+            raise serializers.ValidationError({'from': "Must not be after `to`."})
+        return dict(attrs, **{'from': start, 'to': end})
+
+class SalesSeriesQuerySerializer(DateRangeQuerySerializer):
+    granularity = serializers.ChoiceField(choices=GRANULARITIES, default='day')
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if bucket_count(attrs['from'], attrs['to'], attrs['granularity']) > MAX_BUCKETS:
+            raise serializers.ValidationError(
+                f"At most {MAX_BUCKETS} buckets per request; use a shorter range or a coarser granularity."
+            )
+        return attrs
+
+class SalesBucketSerializer(serializers.Serializer):
+    # A date, or a local datetime for hourly buckets
+    start = serializers.SerializerMethodField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    units = serializers.IntegerField()
+    orders = serializers.IntegerField()
+
+    def get_start(self, obj) -> str:
+        return obj['start'].isoformat()
+
+class SalesSeriesSerializer(serializers.Serializer):
+    granularity = serializers.CharField()
+    to = serializers.DateField()
+    buckets = SalesBucketSerializer(many=True)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields['from'] = serializers.DateField()
+        return fields
+
+class StoreSalesSerializer(serializers.ModelSerializer):
+    gmv = serializers.DecimalField(max_digits=14, decimal_places=2)
+    net_gmv = serializers.DecimalField(max_digits=14, decimal_places=2)
+    commission = serializers.DecimalField(max_digits=14, decimal_places=2)
+    cancelled_amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+    returned_amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+    orders = serializers.IntegerField()
+    units = serializers.IntegerField()
+    order_funnel = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Store
+        fields = [
+            'id', 'name', 'commission_rate', 'gmv', 'net_gmv', 'commission', 'cancelled_amount',
+            'returned_amount', 'orders', 'units', 'order_funnel',
+        ]
+        read_only_fields = fields
+
+    def get_order_funnel(self, obj) -> dict:
+        return {label: getattr(obj, f'{status}_orders') for status, label in Order.Status.choices}
+
+class PlatformTotalsSerializer(serializers.Serializer):
+    gmv = serializers.DecimalField(max_digits=16, decimal_places=2)
+    net_gmv = serializers.DecimalField(max_digits=16, decimal_places=2)
+    commission = serializers.DecimalField(max_digits=16, decimal_places=2)
+    cancelled_amount = serializers.DecimalField(max_digits=16, decimal_places=2)
+    returned_amount = serializers.DecimalField(max_digits=16, decimal_places=2)
+    orders = serializers.IntegerField()
+    units = serializers.IntegerField()
+    active_stores = serializers.IntegerField()
+    live_stores = serializers.IntegerField()
+    order_funnel = serializers.SerializerMethodField()
+
+    def get_order_funnel(self, obj) -> dict:
+        return {label: obj[f'{status}_orders'] for status, label in Order.Status.choices}
+
+class PlatformAnalyticsSerializer(serializers.Serializer):
+    """Response shape of the staff platform analytics: range totals and one page of stores by GMV."""
+    to = serializers.DateField()
+    totals = PlatformTotalsSerializer()
+    next = serializers.URLField(allow_null=True)
+    previous = serializers.URLField(allow_null=True)
+    results = StoreSalesSerializer(many=True)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields['from'] = serializers.DateField()
+        return fields
@@ -0,0 +1,92 @@
+"""
+Sales time series read from the pre-aggregated rollups.
+
+Hourly buckets come from HourlyStoreSales; day, week and month buckets are
+grouped from DailyStoreSales, so a year of monthly data is a GROUP BY over
+at most 366 rows per store whatever the order volume. Buckets are in local
+time, weeks start on Monday, and empty buckets are filled with zeros.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+from .models import DailyStoreSales, HourlyStoreSales
+
+GRANULARITIES = ['hour', 'day', 'week', 'month']
+# Longest series one request may ask for
+MAX_BUCKETS = 1000
+
+
+def local_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def bucket_starts(start, end, granularity):
+    """Every bucket start covering the dates `start` to `end` inclusive."""
+    if granularity == 'hour':
+        # Stepped in UTC so DST changes neither skip nor repeat an hour
+        current = local_midnight(start).astimezone(dt_timezone.utc)
+        stop = local_midnight(end + timedelta(days=1))
+        starts = []
+        while current < stop:
+            starts.append(timezone.localtime(current))
+            current += timedelta(hours=1)
+        return starts
+    if granularity == 'month':
+        current, starts = start.replace(day=1), []
+        while current <= end:
+            starts.append(current)
+            current = (current + timedelta(days=32)).replace(day=1)
+        return starts
+    step = timedelta(days=7 if granularity == 'week' else 1)
+    current = start - timedelta(days=start.weekday()) if granularity == 'week' else start
+    starts = []
+    while current <= end:
+        starts.append(current)
+        current += step
+    return starts
+
+
+def bucket_count(start, end, granularity):
+    """Number of buckets bucket_starts would return, without building them."""
+    days = (end - start).days + 1
+    if granularity == 'hour':
+        return days * 24
+    if granularity == 'week':
+        return (end - timedelta(days=end.weekday()) - (start - timedelta(days=start.weekday()))).days // 7 + 1
+    if granularity == 'month':
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    return days
+
+
+def sales_series(start, end, granularity, **filters):
+    """
+    [{'start', 'revenue', 'units', 'orders'}] for every bucket from `start`
+    to `end`, over the rollup rows matching `filters` (e.g. store=store).
+    """
+    if granularity == 'hour':
+        rows = HourlyStoreSales.objects.filter(
+            hour__gte=local_midnight(start), hour__lt=local_midnight(end + timedelta(days=1)), **filters
+        )
+        bucket = F('hour')
+    else:
+        rows = DailyStoreSales.objects.filter(date__range=(start, end), **filters)
+        bucket = {'day': F('date'), 'week': TruncWeek('date'), 'month': TruncMonth('date')}[granularity]
+    grouped = {
+        row['bucket']: row
+        for row in rows.values(bucket=bucket).annotate(
+            revenue=Sum('revenue'), units=Sum('units'), orders=Sum('orders')
+        ).order_by()
+    }
+
+    series = []
+    for bucket_start in bucket_starts(start, end, granularity):
+        row = grouped.get(bucket_start, {})
+        series.append({
+            'start': bucket_start,
+            'revenue': row.get('revenue') or Decimal('0.00'),
+            'units': row.get('units') or 0,
+            'orders': row.get('orders') or 0,
+        })
+    return series
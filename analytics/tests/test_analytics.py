@@ -1,10 +1,16 @@
+import time
 import pytest
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework import status
 from account.models import SellerProfile
 from store.models import Store
 from product.models import Product
 from order.models import Order, OrderItem
+from order.fulfilment import create_store_orders
+from core.cache import get_version
+from analytics import dashboard_cache
+from analytics.dashboard_cache import DASHBOARD_FRESH_FOR, dashboard_version_key
 from decimal import Decimal
 
 @pytest.fixture
@@ -29,9 +35,10 @@ class TestAnalyticsAPI:
         
         # Create an order
         order = Order.objects.create(user=customer_user, total_amount=100.00)
-        OrderItem.objects.create(
-            order=order, product=product, quantity=2, price=50.00, store=store
+        item = OrderItem.objects.create(
+            order=order, product=product, quantity=2, price=Decimal("50.00"), store=store
         )
+        create_store_orders(order, [item])
         
         api_client.force_authenticate(user=analytics_seller)
         url = reverse("analytics:analytics-seller-dashboard")
@@ -55,3 +62,156 @@ class TestAnalyticsAPI:
         
         assert len(response.data["low_stock_alerts"]) == 1
         assert response.data["low_stock_alerts"][0]["name"] == "Empty Item"
+
+    def test_seller_dashboard_query_count_is_fixed(
+        self, api_client, analytics_seller, customer_user, django_assert_num_queries
+    ):
+        store = Store.objects.get(seller__user=analytics_seller)
+        products = [
+            Product.objects.create(store=store, name=f"Item {i}", price=10, stock_quantity=3 + i, is_approved=True)
+            for i in range(3)
+        ]
+        url = reverse("analytics:analytics-seller-dashboard")
+        statuses = [Order.Status.PENDING, Order.Status.SHIPPED, Order.Status.DELIVERED, Order.Status.CANCELLED]
+
+        def place_orders(count):
+            for i in range(count):
+                order = Order.objects.create(user=customer_user, status=statuses[i % len(statuses)])
+                items = [
+                    OrderItem.objects.create(order=order, product=product, quantity=2, price=10, store=store)
+                    for product in products[:i % 3 + 1]
+                ]
+                create_store_orders(order, items)
+
+        # Store, rollup totals with status counts and daily sales, customer count, product count, low stock, top products
+        api_client.force_authenticate(user=analytics_seller)
+        place_orders(4)
+        with django_assert_num_queries(6):
+            small = api_client.get(url)
+        place_orders(40)
+        with django_assert_num_queries(6):
+            large = api_client.get(url)
+
+        assert small.data["total_orders"] == 4
+        assert large.data["total_orders"] == 44
+        assert large.data["total_customers"] == 1
+        assert large.data["order_status_distribution"] == {
+            "Pending": 11, "Shipped": 11, "Delivered": 11, "Cancelled": 11
+        }
+        # 44 orders cycling through 1, 2 and 3 products, two units per line
+        assert [row["units_sold"] for row in large.data["top_selling_products"]] == [88, 56, 28]
+        assert large.data["total_revenue"] == Decimal(86 * 20)
+        assert large.data["daily_sales"][-1]["revenue"] == Decimal(86 * 20)
+        assert sum(day["revenue"] for day in large.data["daily_sales"]) == Decimal(86 * 20)
+
+    def test_seller_dashboard_still_adds_up_after_orders_are_archived(
+        self, api_client, analytics_seller, customer_user, settings, tmp_path
+    ):
+        from datetime import timedelta
+        from django.utils import timezone
+        from order.archive import archive_orders
+        from order.fulfilment import set_fulfilment_status
+        settings.ORDER_ARCHIVE_DIR = tmp_path
+        store = Store.objects.get(seller__user=analytics_seller)
+        product = Product.objects.create(store=store, name="Widget", price=10, stock_quantity=10, is_approved=True)
+        orders = []
+        for _ in range(3):
+            order = Order.objects.create(user=customer_user)
+            item = OrderItem.objects.create(order=order, product=product, quantity=1, price=Decimal("10"), store=store)
+            create_store_orders(order, [item])
+            orders.append(order)
+        set_fulfilment_status(orders[0], Order.Status.DELIVERED)
+        Order.objects.filter(pk=orders[0].pk).update(created_at=timezone.now() - timedelta(days=400))
+        assert archive_orders() == 1
+
+        api_client.force_authenticate(user=analytics_seller)
+        data = api_client.get(reverse("analytics:analytics-seller-dashboard")).data
+        assert data["total_orders"] == 3
+        assert data["order_status_distribution"] == {"Pending": 2, "Delivered": 1}
+        assert data["total_customers"] == 1
+
+    def test_seller_dashboard_is_cached_until_the_store_gets_an_order(
+        self, api_client, analytics_seller, customer_user, django_assert_num_queries
+    ):
+        store = Store.objects.get(seller__user=analytics_seller)
+        product = Product.objects.create(store=store, name="Widget", price=10, stock_quantity=10, is_approved=True)
+        url = reverse("analytics:analytics-seller-dashboard")
+        api_client.force_authenticate(user=analytics_seller)
+
+        assert api_client.get(url).data["total_orders"] == 0
+        # Only the store lookup while the entry is fresh
+        with django_assert_num_queries(1):
+            assert api_client.get(url).data["total_orders"] == 0
+
+        order = Order.objects.create(user=customer_user)
+        item = OrderItem.objects.create(order=order, product=product, quantity=1, price=Decimal("10"), store=store)
+        create_store_orders(order, [item])
+        assert api_client.get(url).data["total_orders"] == 1
+
+    def test_stale_seller_dashboard_is_served_while_one_request_refreshes_it(
+        self, api_client, analytics_seller, customer_user, django_assert_num_queries, monkeypatch
+    ):
+        store = Store.objects.get(seller__user=analytics_seller)
+        url = reverse("analytics:analytics-seller-dashboard")
+        api_client.force_authenticate(user=analytics_seller)
+        api_client.get(url)
+
+        # Change the data behind the cache's back, then let the entry go stale
+        Product.objects.create(store=store, name="Widget", price=10, stock_quantity=10, is_approved=True)
+        later = time.time() + DASHBOARD_FRESH_FOR + 1
+        monkeypatch.setattr(dashboard_cache.time, "time", lambda: later)
+
+        key = f"analytics:dashboard:{store.pk}:{get_version(dashboard_version_key(store.pk))}"
+        cache.add(f"{key}:lock", 1)
+        with django_assert_num_queries(1):
+            assert api_client.get(url).data["total_products"] == 0
+
+        cache.delete(f"{key}:lock")
+        assert api_client.get(url).data["total_products"] == 1
+        assert cache.get(f"{key}:lock") is None
+        assert cache.get(key)["fresh_until"] > later
+
+    def test_invalidated_seller_dashboard_is_rebuilt_by_one_request(
+        self, api_client, analytics_seller, django_assert_num_queries
+    ):
+        from analytics.dashboard_cache import invalidate_dashboards
+        store = Store.objects.get(seller__user=analytics_seller)
+        url = reverse("analytics:analytics-seller-dashboard")
+        api_client.force_authenticate(user=analytics_seller)
+        api_client.get(url)
+
+        Product.objects.create(store=store, name="Widget", price=10, stock_quantity=10, is_approved=True)
+        invalidate_dashboards([store.pk])
+        key = f"analytics:dashboard:{store.pk}:{get_version(dashboard_version_key(store.pk))}"
+        # While another request rebuilds the new version, the previous payload is served
+        cache.add(f"{key}:lock", 1)
+        with django_assert_num_queries(1):
+            assert api_client.get(url).data["total_products"] == 0
+
+        cache.delete(f"{key}:lock")
+        assert api_client.get(url).data["total_products"] == 1
+
+
+def test_concurrent_dashboard_misses_build_once():
+    import threading
+    builds = []
+    barrier = threading.Barrier(6)
+
+    def build():
+        builds.append(1)
+        time.sleep(0.3)
+        return {"total_orders": len(builds)}
+
+    results = []
+
+    def request():
+        barrier.wait()
+        results.append(dashboard_cache.cached_dashboard(0, build))
+
+    threads = [threading.Thread(target=request) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1
+    assert results == [{"total_orders": 1}] * 6
@@ -0,0 +1,99 @@
+from decimal import Decimal
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.urls import reverse
+from account.models import SellerProfile
+from store.models import Store
+from product.models import Product
+from order.models import Order, OrderItem
+from order.cancellation import cancel_orders
+from order.fulfilment import create_store_orders, set_fulfilment_status
+
+URL = reverse("analytics:analytics-platform")
+
+
+@pytest.fixture
+def staff_user(db):
+    return get_user_model().objects.create(
+        email="staff@test.com", password=make_password("StaffPass123"), phone="+201333333333", is_staff=True
+    )
+
+
+@pytest.fixture
+def products(db_user):
+    profile, _ = SellerProfile.objects.get_or_create(user=db_user)
+    products = []
+    for index, rate in enumerate(['10.00', '5.00', '0.00']):
+        store = Store.objects.create(
+            seller=profile, name=f"Store {index}", is_approved=True, commission_rate=Decimal(rate)
+        )
+        products.append(Product.objects.create(store=store, name=f"Item {index}", price=10, stock_quantity=100,
+                                               is_approved=True))
+    return products
+
+
+def place_order(user, lines):
+    order = Order.objects.create(user=user)
+    items = [
+        OrderItem.objects.create(order=order, product=product, quantity=quantity, price=Decimal('10'),
+                                 store=product.store)
+        for product, quantity in lines
+    ]
+    create_store_orders(order, items)
+    return order
+
+
+@pytest.mark.django_db
+def test_platform_totals_and_stores_by_gmv(api_client, staff_user, customer_user, products):
+    first, second, idle = products
+    place_order(customer_user, [(first, 3), (second, 1)])
+    cancelled = place_order(customer_user, [(first, 2)])
+    delivered = place_order(customer_user, [(second, 5)])
+    cancel_orders([cancelled.pk])
+    set_fulfilment_status(delivered, Order.Status.DELIVERED)
+
+    api_client.force_authenticate(user=staff_user)
+    response = api_client.get(URL, {'page_size': 2})
+    assert response.status_code == 200
+
+    totals = response.data['totals']
+    assert totals['gmv'] == '110.00'
+    assert totals['cancelled_amount'] == '20.00'
+    assert totals['net_gmv'] == '90.00'
+    # 10% of 30 net from the first store, 5% of 60 from the second
+    assert totals['commission'] == '6.00'
+    assert totals['orders'] == 4
+    assert totals['active_stores'] == 2
+    assert totals['live_stores'] == 3
+    assert totals['order_funnel'] == {
+        'Pending': 2, 'Processing': 0, 'Shipped': 0, 'Delivered': 1, 'Cancelled': 1, 'Returned': 0,
+    }
+
+    stores = response.data['results']
+    assert [(store['id'], store['gmv'], store['commission']) for store in stores] == [
+        (second.store_id, '60.00', '3.00'), (first.store_id, '50.00', '3.00'),
+    ]
+    assert stores[1]['order_funnel']['Cancelled'] == 1
+
+    rest = api_client.get(response.data['next'])
+    assert [(store['id'], store['gmv']) for store in rest.data['results']] == [(idle.store_id, '0.00')]
+    assert rest.data['next'] is None
+
+
+@pytest.mark.django_db
+def test_platform_analytics_is_staff_only_and_reads_the_rollup(
+    api_client, staff_user, db_user, customer_user, products, django_assert_num_queries
+):
+    for _ in range(5):
+        place_order(customer_user, [(product, 1) for product in products])
+
+    api_client.force_authenticate(user=db_user)
+    assert api_client.get(URL).status_code == 403
+
+    api_client.force_authenticate(user=staff_user)
+    # One page of stores, the range totals and the live store count
+    with django_assert_num_queries(3) as context:
+        response = api_client.get(URL)
+    assert all("order_orderitem" not in query['sql'] for query in context.captured_queries)
+    assert response.data['totals']['units'] == 15
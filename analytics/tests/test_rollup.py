@@ -0,0 +1,124 @@
+from decimal import Decimal
+from io import StringIO
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from account.models import SellerProfile
+from store.models import Store
+from product.models import Product
+from order.models import Order, OrderItem
+from order.cancellation import cancel_orders
+from order.fulfilment import create_store_orders, set_fulfilment_status
+from analytics.models import DailyProductSales, DailyStoreSales, HourlyStoreSales
+
+
+@pytest.fixture
+def products(db_user, customer_user):
+    profile, _ = SellerProfile.objects.get_or_create(user=db_user)
+    other, _ = SellerProfile.objects.get_or_create(user=customer_user)
+    return [
+        Product.objects.create(
+            store=Store.objects.create(seller=seller, name=name, is_approved=True),
+            name=f"{name} item", price=10, stock_quantity=100, is_approved=True,
+        )
+        for seller, name in ((profile, "Rollup Store"), (other, "Other Store"))
+    ]
+
+
+def place_order(user, lines):
+    order = Order.objects.create(user=user)
+    items = [
+        OrderItem.objects.create(order=order, product=product, quantity=quantity, price=Decimal('10'),
+                                 store=product.store)
+        for product, quantity in lines
+    ]
+    create_store_orders(order, items)
+    return order
+
+
+def rollup(store):
+    return DailyStoreSales.objects.filter(store=store).values(
+        'date', 'revenue', 'units', 'orders', 'cancelled_amount', 'returned_amount'
+    ).get()
+
+
+@pytest.mark.django_db
+def test_rollup_follows_orders_and_matches_a_rebuild(customer_user, products):
+    mine, theirs = products
+    first = place_order(customer_user, [(mine, 2), (theirs, 1)])
+    second = place_order(customer_user, [(mine, 3)])
+    third = place_order(customer_user, [(mine, 1)])
+
+    assert rollup(mine.store) == {
+        'date': timezone.localdate(), 'revenue': Decimal('60.00'), 'units': 6, 'orders': 3,
+        'cancelled_amount': Decimal('0.00'), 'returned_amount': Decimal('0.00'),
+    }
+    assert rollup(theirs.store)['revenue'] == Decimal('10.00')
+
+    cancel_orders([second.pk])
+    set_fulfilment_status(third, Order.Status.DELIVERED)
+    set_fulfilment_status(third, Order.Status.RETURNED)
+    # A seller moving only their part of a shared order
+    set_fulfilment_status(first, Order.Status.RETURNED, seller=theirs.store.seller)
+
+    live = {store: rollup(store) for store in (mine.store, theirs.store)}
+    assert live[mine.store]['cancelled_amount'] == Decimal('30.00')
+    assert live[mine.store]['returned_amount'] == Decimal('10.00')
+    assert live[mine.store]['revenue'] == Decimal('60.00')
+    assert live[theirs.store]['returned_amount'] == Decimal('10.00')
+
+    # Moving back out of a tracked status takes the amount off again
+    set_fulfilment_status(third, Order.Status.DELIVERED)
+    assert rollup(mine.store)['returned_amount'] == Decimal('0.00')
+    live[mine.store]['returned_amount'] = Decimal('0.00')
+
+    hourly = list(HourlyStoreSales.objects.order_by('store', 'hour').values('store', 'hour', 'revenue', 'units', 'orders'))
+    assert sum(row['orders'] for row in hourly if row['store'] == mine.store_id) == 3
+    product_rows = list(DailyProductSales.objects.values_list('store', 'product', 'date', 'units', 'revenue'))
+    assert sorted(product_rows) == sorted([
+        (mine.store_id, mine.pk, timezone.localdate(), 6, Decimal('60.00')),
+        (theirs.store_id, theirs.pk, timezone.localdate(), 1, Decimal('10.00')),
+    ])
+
+    DailyStoreSales.objects.update(revenue=0, units=0, orders=0)
+    HourlyStoreSales.objects.all().delete()
+    DailyProductSales.objects.all().delete()
+    out = StringIO()
+    call_command('rebuild_sales_rollup', stdout=out)
+    assert "Rebuilt 2 days of sales for 2 stores." in out.getvalue()
+    assert {store: rollup(store) for store in (mine.store, theirs.store)} == live
+    assert list(
+        HourlyStoreSales.objects.order_by('store', 'hour').values('store', 'hour', 'revenue', 'units', 'orders')
+    ) == hourly
+    assert list(DailyProductSales.objects.values_list('store', 'product', 'date', 'units', 'revenue')) == product_rows
+
+
+@pytest.mark.django_db
+def test_rebuild_keeps_days_whose_orders_were_archived(customer_user, products, settings, tmp_path):
+    from datetime import timedelta
+    from order.archive import archive_orders
+
+    settings.ORDER_ARCHIVE_DIR = tmp_path
+    mine, _ = products
+    old = place_order(customer_user, [(mine, 2)])
+    placed_at = timezone.now() - timedelta(days=400)
+    Order.objects.filter(pk=old.pk).update(created_at=placed_at, status=Order.Status.DELIVERED)
+    # Move its rollup to the day it was placed, as if it had been counted then
+    DailyStoreSales.objects.filter(store=mine.store).update(date=timezone.localdate(placed_at))
+    HourlyStoreSales.objects.filter(store=mine.store).update(hour=placed_at.replace(minute=0, second=0, microsecond=0))
+    DailyProductSales.objects.filter(store=mine.store).update(date=timezone.localdate(placed_at))
+    place_order(customer_user, [(mine, 1)])
+
+    def totals():
+        return (
+            list(DailyStoreSales.objects.filter(store=mine.store).order_by('date').values_list('date', 'revenue', 'units')),
+            HourlyStoreSales.objects.filter(store=mine.store).count(),
+            list(DailyProductSales.objects.filter(store=mine.store).order_by('date').values_list('date', 'units')),
+        )
+
+    before = totals()
+    assert archive_orders() == 1
+    assert DailyStoreSales.objects.get(store=mine.store, date=timezone.localdate(placed_at)).has_archived_orders
+
+    call_command('rebuild_sales_rollup', str(mine.store_id), stdout=StringIO())
+    assert totals() == before
@@ -0,0 +1,90 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from account.models import SellerProfile
+from store.models import Store
+from product.models import Product
+from order.models import Order, OrderItem
+from order.fulfilment import create_store_orders
+
+URL = reverse("analytics:analytics-sales-series")
+
+
+@pytest.fixture
+def product(db_user):
+    profile, _ = SellerProfile.objects.get_or_create(user=db_user)
+    store = Store.objects.create(seller=profile, name="Series Store", is_approved=True)
+    return Product.objects.create(store=store, name="Gadget", price=10, stock_quantity=100, is_approved=True)
+
+
+def place_order(user, product, placed_at, quantity=1):
+    order = Order.objects.create(user=user)
+    Order.objects.filter(pk=order.pk).update(created_at=placed_at)
+    order.created_at = placed_at
+    item = OrderItem.objects.create(order=order, product=product, quantity=quantity, price=Decimal('10'),
+                                    store=product.store, created_at=placed_at)
+    create_store_orders(order, [item])
+
+
+def at(day, hour=12):
+    return timezone.make_aware(datetime(day.year, day.month, day.day, hour))
+
+
+@pytest.mark.django_db
+def test_series_buckets_are_zero_filled_at_every_granularity(api_client, db_user, customer_user, product):
+    place_order(customer_user, product, at(date(2026, 1, 5), 9), quantity=2)
+    place_order(customer_user, product, at(date(2026, 1, 5), 9))
+    place_order(customer_user, product, at(date(2026, 1, 7), 15))
+    place_order(customer_user, product, at(date(2026, 3, 1), 8))
+    api_client.force_authenticate(user=db_user)
+
+    response = api_client.get(URL, {'from': '2026-01-05', 'to': '2026-01-07', 'granularity': 'day'})
+    assert response.status_code == 200
+    assert [(bucket['start'], bucket['revenue'], bucket['units'], bucket['orders'])
+            for bucket in response.data['buckets']] == [
+        ('2026-01-05', '30.00', 3, 2), ('2026-01-06', '0.00', 0, 0), ('2026-01-07', '10.00', 1, 1),
+    ]
+
+    hours = api_client.get(URL, {'from': '2026-01-05', 'to': '2026-01-05', 'granularity': 'hour'}).data['buckets']
+    assert len(hours) == 24
+    assert hours[9]['start'] == at(date(2026, 1, 5), 9).isoformat()
+    assert [bucket['orders'] for bucket in hours if bucket['orders']] == [2]
+
+    # 2026-01-05 is a Monday; weeks start there
+    weeks = api_client.get(URL, {'from': '2026-01-07', 'to': '2026-01-20', 'granularity': 'week'}).data['buckets']
+    assert [(bucket['start'], bucket['orders']) for bucket in weeks] == [('2026-01-05', 1), ('2026-01-12', 0), ('2026-01-19', 0)]
+
+    months = api_client.get(URL, {'from': '2025-04-01', 'to': '2026-03-31', 'granularity': 'month'}).data
+    assert months['from'] == '2025-04-01'
+    assert len(months['buckets']) == 12
+    assert [(bucket['start'], bucket['revenue']) for bucket in months['buckets'] if bucket['orders']] == [
+        ('2026-01-01', '40.00'), ('2026-03-01', '10.00'),
+    ]
+
+
+@pytest.mark.django_db
+def test_series_reads_only_the_rollup(api_client, db_user, customer_user, product, django_assert_num_queries):
+    for offset in range(40):
+        place_order(customer_user, product, at(date(2026, 1, 1) + timedelta(days=offset * 7)))
+    api_client.force_authenticate(user=db_user)
+
+    # Store lookup and one grouped query over the daily rows
+    with django_assert_num_queries(2) as context:
+        response = api_client.get(URL, {'from': '2026-01-01', 'to': '2026-12-31', 'granularity': 'month'})
+    assert "order_orderitem" not in context.captured_queries[-1]['sql']
+    assert sum(bucket['orders'] for bucket in response.data['buckets']) == 40
+
+
+@pytest.mark.django_db
+def test_series_rejects_bad_ranges(api_client, db_user, product):
+    api_client.force_authenticate(user=db_user)
+    assert api_client.get(URL, {'from': '2026-02-01', 'to': '2026-01-01'}).status_code == 400
+    assert api_client.get(URL, {'granularity': 'minute'}).status_code == 400
+    assert api_client.get(URL, {'from': '2020-01-01', 'to': '2026-01-01', 'granularity': 'hour'}).status_code == 400
+
+    response = api_client.get(URL)
+    assert response.status_code == 200
+    assert response.data['to'] == timezone.localdate().isoformat()
+    assert len(response.data['buckets']) == 30
@@ -1,16 +1,26 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from drf_spectacular.utils import extend_schema
-from django.db.models import Sum, Count, F, Q
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from django.db.models import Sum, Q
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
 
-from order.models import Order, OrderItem
+from order.models import Order
 from product.models import Product
 from store.models import Store
-from .serializers import SellerDashboardSerializer
+from .dashboard_cache import cached_dashboard
+from .models import DailyProductSales, DailyStoreSales, StoreCustomer
+from .pagination import StoreSalesPagination
+from .platform import platform_totals, stores_by_gmv
+from .rollup import STATUS_COUNTS
+from .serializers import (
+    SellerDashboardSerializer, SalesSeriesQuerySerializer, SalesSeriesSerializer, DateRangeQuerySerializer,
+    PlatformAnalyticsSerializer, PlatformTotalsSerializer, StoreSalesSerializer
+)
+from .series import GRANULARITIES, sales_series
 
 @extend_schema(tags=['Analytics'])
 class AnalyticsViewSet(viewsets.ViewSet):
@@ -24,6 +34,8 @@ class AnalyticsViewSet(viewsets.ViewSet):
 
     @extend_schema(
         summary="Get seller dashboard analytics",
+        description="Cached per store: refreshed at most once a minute, and straight away after the store "
+                    "gets a new order, a cancellation or a status change.",
         responses={200: SellerDashboardSerializer}
     )
     @action(detail=False, methods=['get'], url_path='seller-dashboard')
@@ -34,44 +46,104 @@ class AnalyticsViewSet(viewsets.ViewSet):
         if not store:
             return Response({"error": "No store found for this seller"}, status=status.HTTP_404_NOT_FOUND)
 
-        
-        store_items = OrderItem.objects.filter(store=store)
-        store_orders = Order.objects.filter(items__store=store).distinct()
+        return Response(cached_dashboard(store.pk, lambda: self.build_dashboard(store)))
 
-        
-        total_revenue = store_items.aggregate(total=Sum(F('price') * F('quantity')))['total'] or Decimal('0.00')
-        total_orders = store_orders.count()
-        total_products = Product.objects.filter(store=store).count()
-        total_customers = store_orders.values('user').distinct().count()
+    @extend_schema(
+        summary="Get the seller's sales time series",
+        description="Revenue, units and orders per bucket between two dates (inclusive, local time), with "
+                    "empty buckets filled with zeros. Defaults to the last 30 days by day.",
+        parameters=[
+            OpenApiParameter(name='from', type=OpenApiTypes.DATE, description='First day (default: 29 days before `to`)'),
+            OpenApiParameter(name='to', type=OpenApiTypes.DATE, description='Last day (default: today)'),
+            OpenApiParameter(name='granularity', type=str, enum=GRANULARITIES, description='Bucket size (default: day)'),
+        ],
+        responses={200: SalesSeriesSerializer}
+    )
+    @action(detail=False, methods=['get'], url_path='sales-series')
+    def sales_series(self, request):
+        store = self.get_seller_store(request.user)
+        if not store:
+            return Response({"error": "No store found for this seller"}, status=status.HTTP_404_NOT_FOUND)
 
-        
-        status_dist = {}
-        for s_code, s_name in Order.Status.choices:
-            count = store_orders.filter(status=s_code).count()
-            if count > 0:
-                status_dist[s_name] = count
+        params = SalesSeriesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        start, end, granularity = (params.validated_data[key] for key in ('from', 'to', 'granularity'))
+        series = {
+            'from': start,
+            'to': end,
+            'granularity': granularity,
+            'buckets': sales_series(start, end, granularity, store=store),
+        }
+        return Response(SalesSeriesSerializer(series).data)
+
+    @extend_schema(
+        summary="Get platform analytics",
+        description="GMV, commission, active stores and the order funnel between two dates (inclusive, "
+                    "defaults to the last 30 days), overall and per store. Stores are paginated by GMV, "
+                    "highest first. Only staff users can access this.",
+        parameters=[
+            OpenApiParameter(name='from', type=OpenApiTypes.DATE, description='First day (default: 29 days before `to`)'),
+            OpenApiParameter(name='to', type=OpenApiTypes.DATE, description='Last day (default: today)'),
+        ],
+        responses={200: PlatformAnalyticsSerializer}
+    )
+    @action(detail=False, methods=['get'], url_path='platform', permission_classes=[permissions.IsAdminUser])
+    def platform(self, request):
+        params = DateRangeQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        start, end = params.validated_data['from'], params.validated_data['to']
+
+        paginator = StoreSalesPagination()
+        page = paginator.paginate_queryset(stores_by_gmv(start, end), request, view=self)
+        response = paginator.get_paginated_response(StoreSalesSerializer(page, many=True).data)
+        response.data = {
+            'from': start,
+            'to': end,
+            'totals': PlatformTotalsSerializer(platform_totals(start, end)).data,
+            **response.data,
+        }
+        return response
+
+    def build_dashboard(self, store):
+        today = timezone.localdate()
+        first_day = today - timedelta(days=6)
+        days = [first_day + timedelta(days=i) for i in range(7)]
+
+        # Totals, the status breakdown and the last seven days in one pass over the store's rollup rows
+        sales = DailyStoreSales.objects.filter(store=store).aggregate(
+            total_revenue=Sum('revenue', default=Decimal('0.00')),
+            total_orders=Sum('orders', default=0),
+            **{
+                f'status_{s_code}': Sum(column, default=0)
+                for s_code, column in STATUS_COUNTS.items()
+            },
+            **{
+                f'day_{i}': Sum('revenue', filter=Q(date=day), default=Decimal('0.00'))
+                for i, day in enumerate(days)
+            }
+        )
+        total_revenue = sales['total_revenue']
+        total_orders = sales['total_orders']
+        total_products = Product.objects.filter(store=store).count()
+        total_customers = StoreCustomer.objects.filter(store=store).count()
+        status_dist = {
+            s_name: sales[f'status_{s_code}']
+            for s_code, s_name in Order.Status.choices
+            if sales[f'status_{s_code}'] > 0
+        }
 
-        
         low_stock = Product.objects.filter(store=store, stock_quantity__lt=5).values('id', 'name', 'stock_quantity')
 
-        
-        top_products = Product.objects.filter(store=store)\
-            .annotate(units_sold=Sum('order_items__quantity'))\
+        top_products = DailyProductSales.objects.filter(store=store)\
+            .values('product_id', 'product__name')\
+            .annotate(units_sold=Sum('units'))\
             .filter(units_sold__gt=0)\
-            .order_by('-units_sold')[:5]\
-            .values('id', 'name', 'units_sold')
+            .order_by('-units_sold', 'product_id')[:5]
 
-        
-        last_7_days = []
-        now = timezone.now()
-        for i in range(6, -1, -1):
-            date = (now - timedelta(days=i)).date()
-            daily_rev = store_items.filter(order__created_at__date=date)\
-                .aggregate(total=Sum(F('price') * F('quantity')))['total'] or Decimal('0.00')
-            last_7_days.append({
-                "date": date.strftime('%Y-%m-%d'),
-                "revenue": daily_rev
-            })
+        last_7_days = [
+            {"date": day.strftime('%Y-%m-%d'), "revenue": sales[f'day_{i}']}
+            for i, day in enumerate(days)
+        ]
 
         data = {
             "total_revenue": total_revenue,
@@ -80,8 +152,10 @@ class AnalyticsViewSet(viewsets.ViewSet):
             "total_customers": total_customers,
             "order_status_distribution": status_dist,
             "low_stock_alerts": list(low_stock),
-            "top_selling_products": list(top_products),
+            "top_selling_products": [
+                {"id": row['product_id'], "name": row['product__name'], "units_sold": row['units_sold']}
+                for row in top_products
+            ],
             "daily_sales": last_7_days
         }
-
-        return Response(data)
+        return data
@@ -1,10 +1,17 @@
 import pytest
+from django.core.cache import cache
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
 
 User = get_user_model()
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Response and facet caches outlive the per-test database rollback
+    cache.clear()
+    yield
+
 @pytest.fixture
 def api_client():
     return APIClient()
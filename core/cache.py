@@ -0,0 +1,46 @@
+import time
+from django.core.cache import cache
+from django.db import transaction
+
+
+def get_versions(keys):
+    """
+    Read version counters used to namespace cache entries, creating any that
+    are missing. Counters are seeded with a timestamp rather than 0 so an
+    evicted counter can never line up with entries written under an older value.
+    """
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def get_version(key):
+    return get_versions([key])[0]
+
+
+def _incr_versions(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_versions(keys):
+    """
+    Invalidate every cache entry namespaced under these counters.
+
+    The counters move immediately and again once the surrounding transaction
+    commits, so an entry rebuilt from not-yet-committed data in between is
+    discarded as well.
+    """
+    keys = list(keys)
+    _incr_versions(keys)
+    transaction.on_commit(lambda: _incr_versions(keys))
+
+
+def bump_version(key):
+    bump_versions([key])
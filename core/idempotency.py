@@ -0,0 +1,87 @@
+import hashlib
+import json
+import time
+from functools import wraps
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+# How long a finished request's response is replayed for its key
+IDEMPOTENCY_TTL = 60 * 60 * 24
+# Upper bound on how long a request may hold its key; also how long a duplicate waits for it
+IN_FLIGHT_TIMEOUT = 30
+POLL_INTERVAL = 0.05
+
+
+def idempotency_cache_key(request, key):
+    # Keys are scoped to the caller and the endpoint so they cannot collide across users
+    return f"idempotency:{request.user.pk}:{request.method}:{request.path}:{key}"
+
+
+def request_fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def replay(entry):
+    response = Response(entry['data'], status=entry['status'])
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view_method):
+    """
+    Honour an `Idempotency-Key` header on a mutating view or action.
+
+    The first request with a key runs normally and its response is stored
+    in the cache for IDEMPOTENCY_TTL; retries with the same key get that
+    response back without the view running again. A duplicate that arrives
+    while the first is still running waits for it instead of executing in
+    parallel. Reusing a key with a different body is rejected with a 422.
+    Requests without the header are unaffected.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        cache_key = idempotency_cache_key(request, key)
+        lock_key = f"{cache_key}:lock"
+        fingerprint = request_fingerprint(request)
+
+        deadline = time.monotonic() + IN_FLIGHT_TIMEOUT
+        while True:
+            entry = cache.get(cache_key)
+            if entry is not None:
+                if entry['fingerprint'] != fingerprint:
+                    return Response(
+                        {'error': f'{IDEMPOTENCY_HEADER} was already used for a different request'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                return replay(entry)
+            # cache.add is SET NX: exactly one request gets to run
+            if cache.add(lock_key, fingerprint, timeout=IN_FLIGHT_TIMEOUT):
+                break
+            if time.monotonic() >= deadline:
+                return Response(
+                    {'error': 'A request with this Idempotency-Key is still being processed'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            time.sleep(POLL_INTERVAL)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+            # Server errors may be transient, so those retries run again
+            if response.status_code < 500:
+                cache.set(cache_key, {
+                    'fingerprint': fingerprint,
+                    'status': response.status_code,
+                    'data': response.data,
+                }, timeout=IDEMPOTENCY_TTL)
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    return wrapper
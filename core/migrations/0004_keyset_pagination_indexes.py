@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 20:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0003_user_is_email_verified'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-date_joined', 'id'], name='core_user_date_jo_acd0b3_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+from django.core.exceptions import ValidationError
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.permissions import BasePermission
+
+
+class ConditionalRetrieveMixin:
+    """
+    Answers If-None-Match / If-Modified-Since on `retrieve` with a 304.
+
+    The validators come from a query that selects only the object's
+    timestamp columns, so an unchanged object is never loaded or serialized.
+    The same visibility rules apply because the lookup goes through
+    `get_queryset()`; objects the caller cannot see still end in a 404.
+    When the action's permissions define object-level checks, a conditional
+    answer runs them first on the object, loaded without the relations only
+    the serializer needs.
+    """
+    last_modified_fields = ('updated_at',)
+
+    def get_last_modified(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            row = self.get_queryset().filter(**lookup).values_list(*self.last_modified_fields).first()
+        except (TypeError, ValueError, ValidationError):
+            return None
+        if row is None:
+            return None
+        return max(value for value in row if value is not None)
+
+    def retrieve(self, request, *args, **kwargs):
+        last_modified = self.get_last_modified()
+        if last_modified is None:
+            return self.build_retrieve_response(request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        etag = 'W/' + quote_etag(f"{self.kwargs[lookup_url_kwarg]}-{last_modified.timestamp():.6f}")
+        response = get_conditional_response(
+            request, etag=etag, last_modified=int(last_modified.timestamp())
+        )
+        if response is None:
+            response = self.build_retrieve_response(request, *args, **kwargs)
+        else:
+            self.check_conditional_permissions(request)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+    def check_conditional_permissions(self, request):
+        # BasePermission allows every object, so only overridden checks need the row
+        if all(
+            type(permission).has_object_permission is BasePermission.has_object_permission
+            for permission in self.get_permissions()
+        ):
+            return
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        obj = get_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request, obj)
+
+    def build_retrieve_response(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
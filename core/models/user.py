@@ -66,6 +66,11 @@ class User(AbstractUser):
 
     objects = CustomUserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=["-date_joined", "id"]),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -0,0 +1,23 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Opaque-cursor (keyset) pagination used by every list endpoint.
+
+    Pages are fetched by seeking past the cursor position on the leading
+    ordering field instead of OFFSET, and no COUNT(*) is ever issued. Endpoints
+    subclass it to pick their own ordering and `max_page_size` ceiling.
+    """
+    ordering = ('-created_at', 'id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        # Client-chosen orderings (e.g. ?ordering=current_price) are not unique,
+        # so always finish on the primary key to keep page boundaries stable.
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('id',)
+        return ordering
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Coupon, ProductDiscount
+from .models import Coupon, CouponRedemption, ProductDiscount
 
 @admin.register(Coupon)
 class CouponAdmin(admin.ModelAdmin):
@@ -14,3 +14,9 @@ class ProductDiscountAdmin(admin.ModelAdmin):
     list_filter = ['is_active', 'discount_type']
     search_fields = ['name']
     filter_horizontal = ['products', 'categories']
+
+@admin.register(CouponRedemption)
+class CouponRedemptionAdmin(admin.ModelAdmin):
+    list_display = ['coupon', 'user', 'order', 'created_at']
+    search_fields = ['coupon__code', 'user__email']
+    raw_id_fields = ['order']
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 20:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discount', '0001_initial'),
+        ('store', '0002_store_banner_store_logo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coupon',
+            index=models.Index(fields=['-start_date', 'id'], name='discount_co_start_d_fe8d8f_idx'),
+        ),
+    ]
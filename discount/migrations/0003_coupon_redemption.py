@@ -0,0 +1,42 @@
+# Generated by Django 6.0 on 2026-10-18 21:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_redemptions(apps, schema_editor):
+    # Past orders count towards each user's limit
+    Order = apps.get_model('order', 'Order')
+    CouponRedemption = apps.get_model('discount', 'CouponRedemption')
+    orders = Order.objects.filter(coupon__isnull=False).values_list('pk', 'coupon_id', 'user_id')
+    CouponRedemption.objects.bulk_create([
+        CouponRedemption(order_id=pk, coupon_id=coupon_id, user_id=user_id)
+        for pk, coupon_id, user_id in orders.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discount', '0002_keyset_pagination_indexes'),
+        ('order', '0003_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CouponRedemption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('coupon', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='redemptions', to='discount.coupon')),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='coupon_redemptions', to='order.order')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='coupon_redemptions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['coupon', 'user'], name='discount_co_coupon__c616db_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_redemptions, migrations.RunPython.noop),
+    ]
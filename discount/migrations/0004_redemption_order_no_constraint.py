@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 21:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discount', '0003_coupon_redemption'),
+        ('order', '0004_store_order'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='couponredemption',
+            name='order',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='coupon_redemptions', to='order.order'),
+        ),
+    ]
@@ -1,2 +1,3 @@
 from .coupon import Coupon
 from .discount import ProductDiscount
+from .coupon_redemption import CouponRedemption
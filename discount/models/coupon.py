@@ -29,6 +29,9 @@ class Coupon(models.Model):
 
     class Meta:
         ordering = ['-start_date']
+        indexes = [
+            models.Index(fields=['-start_date', 'id']),
+        ]
 
     def __str__(self):
         return self.code
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.db import models
+
+
+class CouponRedemption(models.Model):
+    """One use of a coupon by a user; Coupon.user_limit is enforced by counting these."""
+    coupon = models.ForeignKey('discount.Coupon', on_delete=models.CASCADE, related_name='redemptions')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='coupon_redemptions')
+    # No database FK: order_order is partitioned by created_at
+    order = models.ForeignKey(
+        'order.Order', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='coupon_redemptions', db_constraint=False
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['coupon', 'user']),
+        ]
+
+    def __str__(self):
+        return f"{self.coupon} used by {self.user}"
@@ -0,0 +1,6 @@
+from core.pagination import KeysetPagination
+
+
+class CouponPagination(KeysetPagination):
+    ordering = ('-start_date', 'id')
+    max_page_size = 50
@@ -0,0 +1,73 @@
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+
+class CouponUnavailable(Exception):
+    """The coupon's total or per-user usage limit has been reached."""
+
+
+def user_redemption_count(coupon, user):
+    from discount.models import CouponRedemption
+    return CouponRedemption.objects.filter(coupon=coupon, user=user).count()
+
+
+@transaction.atomic
+def redeem_coupon(coupon, user, order=None):
+    """
+    Record one use of `coupon` by `user`, or raise CouponUnavailable.
+
+    The coupon row is locked first so redemptions of the same coupon queue;
+    then one conditional UPDATE bumps used_count only while it is under
+    usage_limit and the user's redemption count is under user_limit. Both
+    limits are read in that same statement, after the lock, so parallel
+    checkouts cannot push a coupon past either limit.
+    """
+    from discount.models import Coupon, CouponRedemption
+
+    list(Coupon.objects.select_for_update().filter(pk=coupon.pk).values_list('pk', flat=True))
+    redeemed = CouponRedemption.objects.filter(coupon=OuterRef('pk'), user=user)\
+        .values('coupon').annotate(total=Count('pk')).values('total')
+    reserved = Coupon.objects.filter(pk=coupon.pk)\
+        .filter(Q(usage_limit__isnull=True) | Q(used_count__lt=F('usage_limit')))\
+        .filter(user_limit__gt=Coalesce(Subquery(redeemed), Value(0), output_field=IntegerField()))\
+        .update(used_count=F('used_count') + 1)
+
+    if not reserved:
+        coupon.refresh_from_db(fields=['used_count', 'usage_limit'])
+        if coupon.usage_limit and coupon.used_count >= coupon.usage_limit:
+            raise CouponUnavailable("This coupon has reached its usage limit.")
+        raise CouponUnavailable("You have already used this coupon the maximum number of times.")
+
+    return CouponRedemption.objects.create(coupon=coupon, user=user, order=order)
+
+
+@transaction.atomic
+def release_redemptions(order_ids):
+    """
+    Give back the coupon uses of orders that were cancelled: delete their
+    redemptions and take them off each coupon's used_count.
+
+    The coupons are locked in id order first, as redeem_coupon locks them,
+    and every coupon's count drops in one CASE UPDATE. Returns the number
+    of redemptions released.
+    """
+    from discount.models import Coupon, CouponRedemption
+
+    redemptions = CouponRedemption.objects.filter(order_id__in=order_ids)
+    released = dict(
+        redemptions.values('coupon_id').annotate(total=Count('pk')).order_by().values_list('coupon_id', 'total')
+    )
+    if not released:
+        return 0
+    list(Coupon.objects.select_for_update().filter(pk__in=released).order_by('pk').values_list('pk', flat=True))
+    redemptions.delete()
+    Coupon.objects.filter(pk__in=released).update(used_count=Greatest(
+        Case(
+            *[When(pk=pk, then=F('used_count') - total) for pk, total in released.items()],
+            default=F('used_count'),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    ))
+    return sum(released.values())
@@ -0,0 +1,68 @@
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from product.models import Product
+from product.pricing import discounted_product_ids, refresh_effective_prices
+from product.response_cache import invalidate_public_products
+from .models import ProductDiscount
+
+
+@receiver(post_save, sender=ProductDiscount)
+def refresh_prices_on_discount_save(sender, instance, **kwargs):
+    refresh_effective_prices(discounted_product_ids([instance]))
+
+
+@receiver(pre_delete, sender=ProductDiscount)
+def collect_prices_on_discount_delete(sender, instance, **kwargs):
+    # The links are gone by post_delete, so remember who was affected
+    instance._affected_product_ids = discounted_product_ids([instance])
+
+
+@receiver(post_delete, sender=ProductDiscount)
+def refresh_prices_on_discount_delete(sender, instance, **kwargs):
+    refresh_effective_prices(getattr(instance, '_affected_product_ids', ()))
+
+
+@receiver(m2m_changed, sender=ProductDiscount.products.through)
+def refresh_prices_on_product_links(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # product.discounts.add(...) etc. only ever touches this one product
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh_effective_prices([instance.pk])
+        return
+
+    if action == 'pre_clear':
+        instance._cleared_product_ids = list(instance.products.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        refresh_effective_prices(pk_set)
+    elif action == 'post_clear':
+        refresh_effective_prices(getattr(instance, '_cleared_product_ids', ()))
+
+
+@receiver(m2m_changed, sender=ProductDiscount.categories.through)
+def refresh_prices_on_category_links(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh_effective_prices(instance.products.values_list('pk', flat=True))
+        return
+
+    if action == 'pre_clear':
+        instance._cleared_category_ids = list(instance.categories.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        refresh_effective_prices(
+            Product.objects.filter(category_id__in=pk_set).values_list('pk', flat=True)
+        )
+    elif action == 'post_clear':
+        refresh_effective_prices(
+            Product.objects.filter(
+                category_id__in=getattr(instance, '_cleared_category_ids', ())
+            ).values_list('pk', flat=True)
+        )
+
+
+@receiver(post_save, sender=ProductDiscount)
+@receiver(post_delete, sender=ProductDiscount)
+@receiver(m2m_changed, sender=ProductDiscount.products.through)
+@receiver(m2m_changed, sender=ProductDiscount.categories.through)
+def invalidate_public_responses_on_discount_change(sender, **kwargs):
+    if kwargs.get('action', 'post_').startswith('post_'):
+        invalidate_public_products(pricing=True)
@@ -0,0 +1,118 @@
+import threading
+from datetime import timedelta
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from account.models import SellerProfile
+from store.models.store import Store
+from product.models.product import Product
+from discount.models import Coupon, CouponRedemption
+from discount.redemption import CouponUnavailable, redeem_coupon
+
+User = get_user_model()
+
+
+def make_coupon(**kwargs):
+    return Coupon.objects.create(
+        code=kwargs.pop('code', "LIMITED"), discount_type="fixed", value=5,
+        start_date=timezone.now() - timedelta(hours=1), end_date=timezone.now() + timedelta(days=1),
+        **kwargs
+    )
+
+
+def redeem_in_parallel(coupon, users):
+    outcomes = []
+    barrier = threading.Barrier(len(users))
+
+    def redeem(user):
+        try:
+            barrier.wait()
+            redeem_coupon(coupon, user)
+            outcomes.append(True)
+        except CouponUnavailable:
+            outcomes.append(False)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=redeem, args=(user,)) for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+@pytest.mark.django_db(transaction=True)
+def test_usage_limit_is_never_exceeded_under_parallel_load():
+    coupon = make_coupon(usage_limit=5)
+    users = [User.objects.create(email=f"buyer{i}@test.com", role="customer") for i in range(30)]
+
+    outcomes = redeem_in_parallel(coupon, users)
+
+    assert outcomes.count(True) == 5
+    coupon.refresh_from_db()
+    assert coupon.used_count == 5
+    assert CouponRedemption.objects.filter(coupon=coupon).count() == 5
+
+
+@pytest.mark.django_db(transaction=True)
+def test_user_limit_is_never_exceeded_under_parallel_load():
+    coupon = make_coupon(user_limit=2)
+    user = User.objects.create(email="eager@test.com", role="customer")
+
+    outcomes = redeem_in_parallel(coupon, [user] * 12)
+
+    assert outcomes.count(True) == 2
+    coupon.refresh_from_db()
+    assert coupon.used_count == 2
+
+
+@pytest.mark.django_db
+def test_second_order_with_single_use_coupon_is_rejected(api_client, customer_user, db_user):
+    profile, _ = SellerProfile.objects.get_or_create(user=db_user)
+    store = Store.objects.create(seller=profile, name="Coupon Store", is_approved=True, is_active=True)
+    product = Product.objects.create(store=store, name="Gift", price=50, stock_quantity=10, is_approved=True)
+    make_coupon(code="ONCE")
+
+    api_client.force_authenticate(user=customer_user)
+    data = {"items": [{"product": product.id, "quantity": 1}], "coupon_code": "ONCE"}
+    response = api_client.post(reverse("order:order-list"), data, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    assert CouponRedemption.objects.get().order_id == response.data["id"]
+
+    response = api_client.post(reverse("order:order-list"), data, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "coupon_code" in response.data
+    product.refresh_from_db()
+    assert product.stock_quantity == 9
+
+    response = api_client.post(reverse("discount:coupon-apply"), {"code": "ONCE", "order_amount": 50})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_cancelling_an_order_gives_its_coupon_use_back(api_client, customer_user, db_user):
+    profile, _ = SellerProfile.objects.get_or_create(user=db_user)
+    store = Store.objects.create(seller=profile, name="Refund Store", is_approved=True, is_active=True)
+    product = Product.objects.create(store=store, name="Gift", price=50, stock_quantity=10, is_approved=True)
+    coupon = make_coupon(code="ONCE", usage_limit=1)
+
+    api_client.force_authenticate(user=customer_user)
+    data = {"items": [{"product": product.id, "quantity": 1}], "coupon_code": "ONCE"}
+    response = api_client.post(reverse("order:order-list"), data, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    response = api_client.post(reverse("order:order-cancel", kwargs={"pk": response.data["id"]}))
+    assert response.status_code == status.HTTP_200_OK
+
+    assert not CouponRedemption.objects.exists()
+    coupon.refresh_from_db()
+    assert coupon.used_count == 0
+
+    # Neither the user limit nor the global limit is used up by the cancelled order
+    response = api_client.post(reverse("order:order-list"), data, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    coupon.refresh_from_db()
+    assert coupon.used_count == 1
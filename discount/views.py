@@ -7,11 +7,15 @@ from .serializers import CouponSerializer, ProductDiscountSerializer, CouponAppl
 from django.utils import timezone
 from django.db import models
 from .permissions import IsCouponOwnerOrStaff, IsVerifiedSeller
+from .pagination import CouponPagination
+from .redemption import user_redemption_count
+from core.idempotency import idempotent
 
 @extend_schema(tags=['Discounts'])
 class CouponViewSet(viewsets.ModelViewSet):
     queryset = Coupon.objects.all()
     serializer_class = CouponSerializer
+    pagination_class = CouponPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -39,6 +43,7 @@ class CouponViewSet(viewsets.ModelViewSet):
         responses={200: OpenApiResponse(description="Coupon valid"), 400: OpenApiResponse(description="Invalid coupon")}
     )
     @action(detail=False, methods=['post'])
+    @idempotent
     def apply(self, request):
         serializer = CouponApplySerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -54,6 +59,9 @@ class CouponViewSet(viewsets.ModelViewSet):
         if not coupon.is_valid:
             return Response({'error': 'Coupon is inactive or expired'}, status=status.HTTP_400_BAD_REQUEST)
             
+        if user_redemption_count(coupon, request.user) >= coupon.user_limit:
+            return Response({'error': 'You have already used this coupon'}, status=status.HTTP_400_BAD_REQUEST)
+
         if amount < coupon.min_purchase_amount:
              return Response({'error': f'Minimum purchase amount of {coupon.min_purchase_amount} required'}, status=status.HTTP_400_BAD_REQUEST)
              
@@ -0,0 +1,223 @@
+"""
+Row-level archive of finished orders.
+
+Orders that are delivered, cancelled or returned and older than a retention
+window are streamed, with their items and store orders, into append-only
+segment files under `<ORDER_ARCHIVE_DIR>/history`. Every chunk is written as
+its own gzip member, and a SQLite index maps each order number to the
+segment and byte offset of its member, so one archived order is found by
+reading a single chunk rather than scanning the archive. The index runs in
+WAL mode, so lookups keep reading it while an archival run writes to it.
+"""
+import gzip
+import json
+import os
+import sqlite3
+import zlib
+from contextlib import closing
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from analytics.rollup import mark_archived_days
+from .models import Order, OrderItem, OrderNumber, StoreOrder
+
+FINISHED_STATUSES = [Order.Status.DELIVERED, Order.Status.CANCELLED, Order.Status.RETURNED]
+RETENTION = timedelta(days=365)
+INDEX_NAME = 'index.sqlite3'
+
+
+def history_directory():
+    return os.path.join(settings.ORDER_ARCHIVE_DIR, 'history')
+
+
+def open_index(directory, readonly=False):
+    """A connection to the archive index; read-only connections never create it."""
+    path = os.path.join(directory, INDEX_NAME)
+    if readonly:
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    index = sqlite3.connect(path)
+    index.execute("PRAGMA journal_mode=WAL")
+    index.execute("CREATE TABLE IF NOT EXISTS orders (order_number TEXT PRIMARY KEY, location TEXT NOT NULL)")
+    return index
+
+
+def row(instance):
+    return {field.attname: getattr(instance, field.attname) for field in instance._meta.concrete_fields}
+
+
+def build_documents(orders):
+    """
+    One JSON-ready document per order, with its items, store orders and the
+    ids of its coupon redemptions; three queries per chunk.
+    """
+    from discount.models import CouponRedemption
+
+    ids = [order.pk for order in orders]
+    items, store_orders, redemptions = {}, {}, {}
+    for item in OrderItem.objects.filter(order_id__in=ids).select_related('product', 'store').order_by('pk'):
+        items.setdefault(item.order_id, []).append(
+            dict(row(item), product_name=item.product.name, store_name=item.store.name)
+        )
+    for store_order in StoreOrder.objects.filter(order_id__in=ids).order_by('pk'):
+        store_orders.setdefault(store_order.order_id, []).append(row(store_order))
+    # Redemptions stay behind (they still count towards coupon limits) and are relinked on restore
+    for order_id, redemption_id in CouponRedemption.objects.filter(order_id__in=ids).values_list('order_id', 'pk'):
+        redemptions.setdefault(order_id, []).append(redemption_id)
+    return [
+        dict(
+            row(order), items=items.get(order.pk, []), store_orders=store_orders.get(order.pk, []),
+            redemptions=redemptions.get(order.pk, []),
+        )
+        for order in orders
+    ]
+
+
+def write_chunk(segment, documents):
+    """Append `documents` to `segment` as one gzip member; returns its byte offset."""
+    payload = ''.join(json.dumps(document, cls=DjangoJSONEncoder) + '\n' for document in documents)
+    with open(segment, 'ab') as out:
+        offset = out.tell()
+        out.write(gzip.compress(payload.encode()))
+        out.flush()
+        os.fsync(out.fileno())
+    return offset
+
+
+def delete_orders(order_ids, batch_size):
+    # Small transactions keep row locks short on the live tables
+    for start in range(0, len(order_ids), batch_size):
+        with transaction.atomic():
+            Order.objects.filter(pk__in=order_ids[start:start + batch_size]).delete()
+
+
+def archive_orders(before=None, chunk_size=500, delete_batch_size=100, directory=None, progress=None):
+    """
+    Move finished orders created before `before` (default: now - RETENTION) to the archive.
+
+    Orders are read with `iterator(chunk_size=...)`; each chunk is written
+    and fsynced, indexed, and only then deleted from the database in
+    batches of `delete_batch_size`. `progress`, if given, is called with
+    the running total after every chunk. Returns the number archived.
+    """
+    before = before or timezone.now() - RETENTION
+    directory = directory or history_directory()
+    os.makedirs(directory, exist_ok=True)
+    segment_name = f"orders-{timezone.now():%Y%m%dT%H%M%S%f}.jsonl.gz"
+    segment = os.path.join(directory, segment_name)
+
+    orders = Order.objects.filter(status__in=FINISHED_STATUSES, created_at__lt=before).order_by('pk')
+    archived = 0
+    chunk = []
+    with closing(open_index(directory)) as index:
+        def flush():
+            nonlocal archived
+            documents = build_documents(chunk)
+            offset = write_chunk(segment, documents)
+            # Committed before the rows go, so an order is always either live or findable in the index
+            with index:
+                index.executemany(
+                    "INSERT OR REPLACE INTO orders (order_number, location) VALUES (?, ?)",
+                    [(order.order_number, f"{segment_name}:{offset}") for order in chunk],
+                )
+            # Their days stay in the sales rollup but can no longer be rebuilt from live rows
+            mark_archived_days({
+                (store_order['store_id'], timezone.localdate(order.created_at))
+                for order, document in zip(chunk, documents) for store_order in document['store_orders']
+            })
+            delete_orders([order.pk for order in chunk], delete_batch_size)
+            archived += len(chunk)
+            chunk.clear()
+            if progress:
+                progress(archived)
+
+        for order in orders.iterator(chunk_size=chunk_size):
+            chunk.append(order)
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+    return archived
+
+
+def read_documents(directory, location):
+    """Decode the single gzip member stored at `location` ("segment:offset")."""
+    segment_name, offset = location.rsplit(':', 1)
+    decompressor = zlib.decompressobj(wbits=31)
+    data = b''
+    with open(os.path.join(directory, segment_name), 'rb') as segment:
+        segment.seek(int(offset))
+        # decompressobj stops at the end of the member; later chunks are left unread
+        while not decompressor.eof:
+            block = segment.read(64 * 1024)
+            if not block:
+                break
+            data += decompressor.decompress(block)
+    return [json.loads(line) for line in data.decode().splitlines()]
+
+
+def find_archived_order(order_number, directory=None):
+    """The archived document for `order_number`, or None."""
+    directory = directory or history_directory()
+    if not os.path.exists(os.path.join(directory, INDEX_NAME)):
+        return None
+    with closing(open_index(directory, readonly=True)) as index:
+        found = index.execute("SELECT location FROM orders WHERE order_number = ?", [order_number]).fetchone()
+    if found is None:
+        return None
+    for document in read_documents(directory, found[0]):
+        if document['order_number'] == order_number:
+            return document
+    return None
+
+
+def build_instance(model, values):
+    return model(**{
+        field.attname: field.to_python(values[field.attname])
+        for field in model._meta.concrete_fields if field.attname in values
+    })
+
+
+@transaction.atomic
+def restore_orders(order_numbers, directory=None):
+    """
+    Put archived orders back into the live tables with their original ids.
+
+    Orders that already exist are skipped. Coupon redemptions that lost their
+    order on archival are linked back. Restored orders are removed from the
+    index; their archived copy stays in the segment. Returns the list of
+    restored order numbers.
+    """
+    from discount.models import CouponRedemption
+
+    directory = directory or history_directory()
+    existing = set(Order.objects.filter(order_number__in=order_numbers).values_list('order_number', flat=True))
+    documents = [
+        document for document in (find_archived_order(number, directory) for number in order_numbers
+                                  if number not in existing)
+        if document
+    ]
+    if not documents:
+        return []
+
+    # Numbers stay registered while archived; this only covers archives older than the registry
+    OrderNumber.objects.bulk_create(
+        [OrderNumber(number=document['order_number']) for document in documents], ignore_conflicts=True
+    )
+    Order.objects.bulk_create([build_instance(Order, document) for document in documents])
+    OrderItem.objects.bulk_create([
+        build_instance(OrderItem, item) for document in documents for item in document['items']
+    ])
+    StoreOrder.objects.bulk_create([
+        build_instance(StoreOrder, store_order)
+        for document in documents for store_order in document['store_orders']
+    ])
+    for document in documents:
+        CouponRedemption.objects.filter(pk__in=document.get('redemptions', []), order__isnull=True)\
+            .update(order_id=document['id'])
+
+    restored = [document['order_number'] for document in documents]
+    with closing(open_index(directory)) as index, index:
+        index.executemany("DELETE FROM orders WHERE order_number = ?", [(number,) for number in restored])
+    return restored
@@ -0,0 +1,89 @@
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from analytics.rollup import record_status_changes
+from discount.redemption import release_redemptions
+from product.inventory import restore_stock
+from product.response_cache import invalidate_public_products
+from .models import Order, OrderItem, StoreOrder
+
+
+def cancel_orders(order_ids, chunk_size=500, progress=None):
+    """
+    Cancel the pending orders among `order_ids` and put their stock back.
+
+    Each chunk of `chunk_size` orders is its own transaction: lock the
+    orders still pending, flip their status and their store orders' with
+    one UPDATE each, sum their item quantities per product and restore them
+    with one grouped UPDATE. Their coupon redemptions are released and the
+    daily sales rollup moves in the same transaction. Orders that are no longer pending, or that have a store
+    order some seller has already moved past pending, are skipped, so
+    re-running is harmless and no shipped units are put back on sale.
+
+    `progress`, if given, is called after each chunk with
+    (chunks_done, chunks_total, cancelled, units_restored) for that chunk.
+    Returns (cancelled, units_restored) over all chunks.
+    """
+    order_ids = sorted(set(order_ids))
+    chunks = [order_ids[i:i + chunk_size] for i in range(0, len(order_ids), chunk_size)]
+
+    total_cancelled = total_units = 0
+    for index, chunk in enumerate(chunks, start=1):
+        cancelled, units = cancel_chunk(chunk)
+        total_cancelled += cancelled
+        total_units += units
+        if progress:
+            progress(index, len(chunks), cancelled, units)
+    return total_cancelled, total_units
+
+
+@transaction.atomic
+def cancel_chunk(order_ids):
+    candidates = list(
+        Order.objects.select_for_update()
+        .filter(pk__in=order_ids, status=Order.Status.PENDING)
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
+    if not candidates:
+        return 0, 0
+
+    # A seller may have moved their part on while the order as a whole is still
+    # pending; such orders are left alone rather than un-shipping that part.
+    parts = list(
+        StoreOrder.objects.select_for_update(of=('self',))
+        .filter(order_id__in=candidates)
+        .order_by('pk')
+        .values_list('order_id', 'store_id', 'order__created_at', 'subtotal', 'status')
+    )
+    started = {part[0] for part in parts if part[4] != Order.Status.PENDING}
+    pending = [pk for pk in candidates if pk not in started]
+    if not pending:
+        return 0, 0
+
+    now = timezone.now()
+    Order.objects.filter(pk__in=pending).update(status=Order.Status.CANCELLED, updated_at=now)
+    StoreOrder.objects.filter(order_id__in=pending).update(status=Order.Status.CANCELLED, updated_at=now)
+    record_status_changes([part[1:] for part in parts if part[0] not in started], Order.Status.CANCELLED)
+    quantities = dict(
+        OrderItem.objects.filter(order_id__in=pending)
+        .values('product_id').annotate(total=Sum('quantity'))
+        .values_list('product_id', 'total')
+    )
+    restore_stock(quantities)
+    # After the product locks, the same order checkout takes them in
+    release_redemptions(pending)
+    invalidate_public_products(product_ids=quantities)
+    return len(pending), sum(quantities.values())
+
+
+def pending_order_ids(store=None, user=None, order_ids=None):
+    """Ids of pending orders matching every filter given (fulfilled by `store`, placed by `user`, in `order_ids`)."""
+    orders = Order.objects.filter(status=Order.Status.PENDING)
+    if store is not None:
+        orders = orders.filter(store_orders__store=store)
+    if user is not None:
+        orders = orders.filter(user=user)
+    if order_ids is not None:
+        orders = orders.filter(pk__in=order_ids)
+    return orders.order_by('pk').values_list('pk', flat=True).distinct()
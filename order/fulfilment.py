@@ -0,0 +1,64 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.utils import timezone
+from analytics.rollup import record_status_changes, record_store_orders
+from .models import Order, StoreOrder
+
+
+def create_store_orders(order, items):
+    """
+    Split `order` into one StoreOrder per store in `items` with a single
+    INSERT, and count them in the daily sales rollup.
+    """
+    subtotals = defaultdict(Decimal)
+    stores = {}
+    for item in items:
+        subtotals[item.store_id] += item.price * item.quantity
+        stores[item.store_id] = item.store
+    store_orders = [
+        StoreOrder(order=order, store=stores[store_id], status=order.status, subtotal=subtotal)
+        for store_id, subtotal in subtotals.items()
+    ]
+    store_orders = StoreOrder.objects.bulk_create(store_orders)
+    record_store_orders(order, items, store_orders)
+    return store_orders
+
+
+def seller_order_ids(seller):
+    """Order ids with a part fulfilled by one of the seller's stores, as a subquery."""
+    return StoreOrder.objects.filter(store__seller=seller).values('order_id')
+
+
+@transaction.atomic
+def set_fulfilment_status(order, status, seller=None):
+    """
+    Move the store orders of `order` to `status`.
+
+    With a `seller`, only that seller's store orders move and the parent
+    order takes the status its store orders share, if they all share one;
+    while they differ it keeps its current status. Without one (staff) the
+    whole order and every store order move together.
+    """
+    now = timezone.now()
+    # Lock the order before its parts, in the same order as cancellation does
+    list(Order.objects.select_for_update().filter(pk=order.pk).values_list('pk', flat=True))
+    store_orders = StoreOrder.objects.filter(order=order)
+    moving = store_orders if seller is None else store_orders.filter(store__seller=seller)
+    changes = [
+        (store_id, order.created_at, subtotal, previous)
+        for store_id, subtotal, previous in moving.select_for_update(of=('self',)).exclude(status=status)
+        .order_by('pk').values_list('store_id', 'subtotal', 'status')
+    ]
+    moving.update(status=status, updated_at=now)
+    record_status_changes(changes, status)
+
+    if seller is not None:
+        statuses = set(store_orders.values_list('status', flat=True))
+        status = statuses.pop() if len(statuses) == 1 else order.status
+
+    # The order's payload embeds its parts, so any part moving has to move its validators too
+    if changes or order.status != status:
+        order.status, order.updated_at = status, now
+        Order.objects.filter(pk=order.pk).update(status=status, updated_at=now)
+    return order
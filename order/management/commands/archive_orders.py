@@ -0,0 +1,35 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from order.archive import RETENTION, archive_orders, history_directory
+
+
+class Command(BaseCommand):
+    help = (
+        "Move delivered, cancelled and returned orders older than the retention window to the "
+        "compressed order archive, then delete them from the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=RETENTION.days)
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--delete-batch-size', type=int, default=100)
+        parser.add_argument('--archive-dir', help="Defaults to <ORDER_ARCHIVE_DIR>/history.")
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['older_than_days'])
+        directory = options['archive_dir'] or history_directory()
+
+        def progress(archived):
+            self.stdout.write(f"Archived {archived} orders.")
+
+        archived = archive_orders(
+            before=before,
+            chunk_size=options['chunk_size'],
+            delete_batch_size=options['delete_batch_size'],
+            directory=directory,
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} finished orders created before {before:%Y-%m-%d} to {directory}."
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from order.cancellation import cancel_orders, pending_order_ids
+
+
+class Command(BaseCommand):
+    help = "Cancel pending orders in bulk and restore their stock (fraud sweeps, store suspensions)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('order_ids', nargs='*', type=int, help="Only cancel these orders.")
+        parser.add_argument('--store', type=int, help="Cancel pending orders with items from this store.")
+        parser.add_argument('--user', type=int, help="Cancel pending orders placed by this user.")
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if not (options['order_ids'] or options['store'] or options['user']):
+            raise CommandError("Give order ids, --store or --user.")
+
+        order_ids = pending_order_ids(
+            store=options['store'],
+            user=options['user'],
+            order_ids=options['order_ids'] or None,
+        )
+
+        def progress(done, total, cancelled, units):
+            self.stdout.write(f"Chunk {done}/{total}: cancelled {cancelled} orders, restored {units} units.")
+
+        cancelled, restored = cancel_orders(order_ids, chunk_size=options['chunk_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(f"Cancelled {cancelled} orders, restored {restored} units."))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from order.partitioning import (
+    MONTHS_AHEAD, add_months, archive_directory, archive_month, detach_month, ensure_partitions,
+    month_start, monthly_partitions, partitioned_tables
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create upcoming monthly order partitions and detach or archive old ones (run from cron, "
+        "at least monthly)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=MONTHS_AHEAD)
+        parser.add_argument(
+            '--retain-months',
+            type=int,
+            help="Keep this many past months attached besides the current one; older months are archived.",
+        )
+        parser.add_argument(
+            '--detach-only',
+            action='store_true',
+            help="Detach old months but leave them as standalone tables instead of archiving and dropping them.",
+        )
+        parser.add_argument('--archive-dir', help="Defaults to settings.ORDER_ARCHIVE_DIR.")
+
+    def handle(self, *args, **options):
+        for name in ensure_partitions(options['months_ahead']):
+            self.stdout.write(f"Created partition {name}.")
+
+        if options['retain_months'] is None:
+            return
+
+        cutoff = add_months(month_start(timezone.localtime()), -options['retain_months'])
+        months = sorted({
+            month for table in partitioned_tables()
+            for month, _ in monthly_partitions(table) if month < cutoff
+        })
+        directory = options['archive_dir'] or archive_directory()
+        for month in months:
+            if options['detach_only']:
+                detached = detach_month(month)
+                self.stdout.write(f"{month:%Y-%m}: detached {', '.join(detached)}.")
+                continue
+            archived = archive_month(month, directory)
+            summary = ', '.join(f"{rows} rows from {name}" for name, rows in archived.items())
+            self.stdout.write(f"{month:%Y-%m}: archived {summary} to {directory}.")
+
+        self.stdout.write(self.style.SUCCESS(f"{len(months)} months older than {cutoff:%Y-%m} processed."))
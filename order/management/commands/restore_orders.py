@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from order.archive import history_directory, restore_orders
+
+
+class Command(BaseCommand):
+    help = "Restore archived orders, with their items and store orders, into the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('order_numbers', nargs='+')
+        parser.add_argument('--archive-dir', help="Defaults to <ORDER_ARCHIVE_DIR>/history.")
+
+    def handle(self, *args, **options):
+        restored = restore_orders(options['order_numbers'], options['archive_dir'] or history_directory())
+        for order_number in restored:
+            self.stdout.write(f"Restored {order_number}.")
+        missing = set(options['order_numbers']) - set(restored)
+        if missing:
+            self.stdout.write(self.style.WARNING(
+                f"Not restored (already live or not archived): {', '.join(sorted(missing))}."
+            ))
+        self.stdout.write(self.style.SUCCESS(f"Restored {len(restored)} orders."))
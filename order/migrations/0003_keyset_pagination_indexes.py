@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-18 20:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('address', '0004_alter_address_country'),
+        ('discount', '0002_keyset_pagination_indexes'),
+        ('order', '0002_order_coupon_order_discount_amount_order_subtotal'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-created_at', 'id'], name='order_order_created_66e693_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 6.0 on 2026-10-18 21:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_store_orders(apps, schema_editor):
+    OrderItem = apps.get_model('order', 'OrderItem')
+    StoreOrder = apps.get_model('order', 'StoreOrder')
+    parts = OrderItem.objects.values('order_id', 'store_id', 'order__status')\
+        .annotate(subtotal=models.Sum(models.F('price') * models.F('quantity')))\
+        .order_by('order_id', 'store_id')
+    StoreOrder.objects.bulk_create([
+        StoreOrder(
+            order_id=part['order_id'], store_id=part['store_id'],
+            status=part['order__status'], subtotal=part['subtotal'],
+        )
+        for part in parts.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0003_keyset_pagination_indexes'),
+        ('store', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoreOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled'), ('returned', 'Returned')], default='pending', max_length=20)),
+                ('subtotal', models.DecimalField(decimal_places=2, default=0.0, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='store_orders', to='order.order')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='store_orders', to='store.store')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['store', '-created_at'], name='order_store_store_i_987f15_idx')],
+                'constraints': [models.UniqueConstraint(fields=('order', 'store'), name='order_storeorder_unique_store')],
+            },
+        ),
+        migrations.RunPython(backfill_store_orders, migrations.RunPython.noop),
+    ]
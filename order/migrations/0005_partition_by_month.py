@@ -0,0 +1,61 @@
+# Generated by Django 6.0 on 2026-10-18 21:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from order.partitioning import convert_to_partitioned
+
+
+def copy_item_created_at(apps, schema_editor):
+    OrderItem = apps.get_model('order', 'OrderItem')
+    Order = apps.get_model('order', 'Order')
+    OrderItem.objects.update(
+        created_at=models.Subquery(Order.objects.filter(pk=models.OuterRef('order_id')).values('created_at')[:1])
+    )
+
+
+def partition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in ('order_order', 'order_orderitem'):
+        convert_to_partitioned(schema_editor.connection, table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('address', '0004_alter_address_country'),
+        ('discount', '0004_redemption_order_no_constraint'),
+        ('order', '0004_store_order'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='order_number',
+            field=models.CharField(db_index=True, editable=False, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='order',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='order.order'),
+        ),
+        migrations.AlterField(
+            model_name='storeorder',
+            name='order',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='store_orders', to='order.order'),
+        ),
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.UniqueConstraint(fields=('order_number', 'created_at'), name='order_order_number_unique'),
+        ),
+        migrations.RunPython(copy_item_created_at, migrations.RunPython.noop),
+        migrations.RunPython(partition_tables),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 21:55
+
+from django.db import migrations, models
+
+
+def register_order_numbers(apps, schema_editor):
+    Order = apps.get_model('order', 'Order')
+    OrderNumber = apps.get_model('order', 'OrderNumber')
+    numbers = Order.objects.order_by().values_list('order_number', flat=True).distinct().iterator()
+    OrderNumber.objects.bulk_create((OrderNumber(number=number) for number in numbers), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0005_partition_by_month'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderNumber',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.CharField(max_length=50, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(register_order_numbers, migrations.RunPython.noop),
+    ]
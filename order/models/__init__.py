@@ -1,2 +1,4 @@
 from .order import Order
 from .order_item import OrderItem
+from .store_order import StoreOrder
+from .order_number import OrderNumber
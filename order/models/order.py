@@ -1,7 +1,10 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.conf import settings
 import uuid
 
+# Fresh numbers tried before giving up; a clash among 16^12 values is already vanishingly rare
+ORDER_NUMBER_ATTEMPTS = 5
+
 class Order(models.Model):
     class Status(models.TextChoices):
         PENDING = 'pending', 'Pending'
@@ -18,7 +21,10 @@ class Order(models.Model):
         REFUNDED = 'refunded', 'Refunded'
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='orders')
-    order_number = models.CharField(max_length=50, unique=True, editable=False)
+    # Unique together with created_at: the table is range-partitioned by month
+    # on created_at, and Postgres only enforces uniqueness within a partition key.
+    # Global uniqueness comes from the OrderNumber registry, written on insert.
+    order_number = models.CharField(max_length=50, db_index=True, editable=False)
     
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
     payment_status = models.CharField(max_length=20, choices=PaymentStatus.choices, default=PaymentStatus.PENDING)
@@ -38,11 +44,41 @@ class Order(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['order_number', 'created_at'], name='order_order_number_unique'),
+        ]
 
     def save(self, *args, **kwargs):
-        if not self.order_number:
-            self.order_number = f"ORD-{uuid.uuid4().hex[:12].upper()}"
-        super().save(*args, **kwargs)
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            self.reserve_order_number()
+            super().save(*args, **kwargs)
+
+    def reserve_order_number(self):
+        """
+        Register this order's number, generating one if it has none.
+
+        A generated number that is already taken is replaced by a new one; an
+        explicitly set number that is taken raises IntegrityError.
+        """
+        from .order_number import OrderNumber
+
+        generated = not self.order_number
+        for _ in range(ORDER_NUMBER_ATTEMPTS if generated else 1):
+            if generated:
+                self.order_number = f"ORD-{uuid.uuid4().hex[:12].upper()}"
+            try:
+                with transaction.atomic():
+                    OrderNumber.objects.create(number=self.order_number)
+                return
+            except IntegrityError:
+                if not generated:
+                    raise
+        raise IntegrityError(f"Could not generate a free order number in {ORDER_NUMBER_ATTEMPTS} attempts")
 
     def __str__(self):
         return self.order_number
@@ -1,7 +1,10 @@
 from django.db import models
+from django.utils import timezone
 
 class OrderItem(models.Model):
-    order = models.ForeignKey('order.Order', on_delete=models.CASCADE, related_name='items')
+    # No database FK: order_order is partitioned, and a partitioned table can only
+    # be referenced through a key that includes its partition column
+    order = models.ForeignKey('order.Order', on_delete=models.CASCADE, related_name='items', db_constraint=False)
     product = models.ForeignKey('product.Product', on_delete=models.CASCADE, related_name='order_items')
     
     quantity = models.PositiveIntegerField(default=1)
@@ -10,6 +13,9 @@ class OrderItem(models.Model):
 
     store = models.ForeignKey('store.Store', on_delete=models.CASCADE, related_name='order_items')
 
+    # Copied from the order at checkout; partitions items into the same month as their order
+    created_at = models.DateTimeField(default=timezone.now)
+
     def __str__(self):
         return f"{self.quantity} x {self.product.name} (Order {self.order.order_number})"
 
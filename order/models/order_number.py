@@ -0,0 +1,18 @@
+from django.db import models
+
+
+class OrderNumber(models.Model):
+    """
+    Registry of every order number ever issued.
+
+    order_order is partitioned by created_at, and Postgres can only enforce
+    uniqueness there together with the partition key. This unpartitioned
+    table carries the global unique index instead. Rows are written in the
+    same transaction as their order and outlive it: archived and restored
+    orders keep their number, and no new order can reuse it.
+    """
+    number = models.CharField(max_length=50, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.number
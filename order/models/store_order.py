@@ -0,0 +1,34 @@
+from django.db import models
+from .order import Order
+
+
+class StoreOrder(models.Model):
+    """
+    The part of a marketplace order that one store fulfils.
+
+    Written at checkout, one per store in the cart. Sellers list and update
+    orders through these rows, so their lookups go straight to an index on
+    store instead of joining through every order item. Each store moves its
+    own status; the parent order follows once all its stores agree.
+    """
+    # No database FK: order_order is partitioned by created_at
+    order = models.ForeignKey('order.Order', on_delete=models.CASCADE, related_name='store_orders', db_constraint=False)
+    store = models.ForeignKey('store.Store', on_delete=models.CASCADE, related_name='store_orders')
+
+    status = models.CharField(max_length=20, choices=Order.Status.choices, default=Order.Status.PENDING)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'store'], name='order_storeorder_unique_store'),
+        ]
+        indexes = [
+            models.Index(fields=['store', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.order_id} / {self.store_id}"
@@ -0,0 +1,274 @@
+"""
+Monthly range partitions on created_at for order_order and order_orderitem.
+
+Each month lives in `<table>_pYYYY_MM`; rows outside every monthly partition
+land in `<table>_default`, which `ensure_partitions` keeps empty by creating
+months ahead of time. Old months are detached from the parent table, which
+takes them out of every hot query at once, and can then be archived to
+gzipped JSON Lines and dropped.
+"""
+import gzip
+import os
+from datetime import date, datetime, time as dt_time
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+PARTITION_KEY = 'created_at'
+MONTHS_AHEAD = 3
+
+
+def partitioned_tables():
+    from .models import Order, OrderItem
+    return [Order._meta.db_table, OrderItem._meta.db_table]
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month):
+    """[start, end) of a month as aware datetimes in the project time zone."""
+    tz = timezone.get_default_timezone()
+    start = timezone.make_aware(datetime.combine(month, dt_time.min), tz)
+    end = timezone.make_aware(datetime.combine(add_months(month, 1), dt_time.min), tz)
+    return start, end
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y_%m}"
+
+
+def default_partition_name(table):
+    return f"{table}_default"
+
+
+def monthly_partitions(table, using=None):
+    """[(month, partition name)] currently attached to `table`, oldest first."""
+    prefix = f"{table}_p"
+    with (using or connection).cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        if name.startswith(prefix):
+            year, month = name[len(prefix):].split('_')
+            partitions.append((date(int(year), int(month), 1), name))
+    return sorted(partitions)
+
+
+def create_partition(cursor, table, month):
+    """
+    Attach the partition for `month` to `table` if it is missing.
+
+    Rows for that month that already fell into the default partition are
+    moved into the new one, so this is safe to run after the fact.
+    """
+    quote = connection.ops.quote_name
+    name, default = partition_name(table, month), default_partition_name(table)
+    start, end = month_bounds(month)
+
+    cursor.execute("SELECT to_regclass(%s)", [name])
+    if cursor.fetchone()[0] is not None:
+        return False
+
+    cursor.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {quote(default)} WHERE {PARTITION_KEY} >= %s AND {PARTITION_KEY} < %s)",
+        [start, end],
+    )
+    if cursor.fetchone()[0]:
+        cursor.execute(f"ALTER TABLE {quote(table)} DETACH PARTITION {quote(default)}")
+        cursor.execute(
+            f"CREATE TABLE {quote(name)} PARTITION OF {quote(table)} FOR VALUES FROM (%s) TO (%s)", [start, end]
+        )
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {quote(default)} WHERE {PARTITION_KEY} >= %s AND {PARTITION_KEY} < %s "
+            f"RETURNING *) INSERT INTO {quote(table)} SELECT * FROM moved",
+            [start, end],
+        )
+        cursor.execute(f"ALTER TABLE {quote(table)} ATTACH PARTITION {quote(default)} DEFAULT")
+    else:
+        cursor.execute(
+            f"CREATE TABLE {quote(name)} PARTITION OF {quote(table)} FOR VALUES FROM (%s) TO (%s)", [start, end]
+        )
+    return True
+
+
+def ensure_partitions(months_ahead=MONTHS_AHEAD, now=None):
+    """Create this month's and the next `months_ahead` months' partitions; returns the names created."""
+    current = month_start(timezone.localtime(now))
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in partitioned_tables():
+            for offset in range(months_ahead + 1):
+                month = add_months(current, offset)
+                if create_partition(cursor, table, month):
+                    created.append(partition_name(table, month))
+    return created
+
+
+def convert_to_partitioned(connection, table, now=None):
+    """
+    Rebuild an ordinary table as one range-partitioned by month on created_at.
+
+    The primary key becomes (id, created_at), as Postgres requires the
+    partition key in every unique constraint. Indexes, unique constraints
+    and outgoing foreign keys are recreated under their original names, so
+    later migrations still find them. Nothing may reference the table with
+    a database foreign key.
+    """
+    quote = connection.ops.quote_name
+    legacy = f"{table}_unpartitioned"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype IN ('u', 'f')
+            """,
+            [table],
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT indexname, indexdef FROM pg_indexes
+            WHERE tablename = %s AND indexname NOT IN (
+                SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass
+            )
+            """,
+            [table, table],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(f"SELECT min({PARTITION_KEY}) FROM {quote(table)}")
+        oldest = cursor.fetchone()[0]
+
+        cursor.execute(f"ALTER TABLE {quote(table)} RENAME TO {quote(legacy)}")
+        cursor.execute(
+            f"CREATE TABLE {quote(table)} (LIKE {quote(legacy)} INCLUDING DEFAULTS INCLUDING IDENTITY "
+            f"INCLUDING CONSTRAINTS) PARTITION BY RANGE ({PARTITION_KEY})"
+        )
+        cursor.execute(f"CREATE TABLE {quote(default_partition_name(table))} PARTITION OF {quote(table)} DEFAULT")
+
+        current = month_start(timezone.localtime(now))
+        month = min(month_start(timezone.localtime(oldest)), current) if oldest else current
+        while month <= add_months(current, MONTHS_AHEAD):
+            create_partition(cursor, table, month)
+            month = add_months(month, 1)
+
+        cursor.execute(f"INSERT INTO {quote(table)} SELECT * FROM {quote(legacy)}")
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE((SELECT max(id) FROM {quote(table)}), 0) + 1, false)",
+            [table],
+        )
+        cursor.execute(f"DROP TABLE {quote(legacy)}")
+
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(table + '_pkey')} PRIMARY KEY (id, {PARTITION_KEY})"
+        )
+        for name, definition in constraints:
+            cursor.execute(f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(name)} {definition}")
+        for _, definition in indexes:
+            cursor.execute(definition)
+
+
+def archive_directory():
+    return settings.ORDER_ARCHIVE_DIR
+
+
+def dump_table(table, path, order_by='id'):
+    """Stream every row of `table` to `path` as gzipped JSON Lines through a server-side cursor; returns the row count."""
+    quote = connection.ops.quote_name
+    partial = f"{path}.partial"
+    rows = 0
+    with transaction.atomic(), connection.chunked_cursor() as cursor, gzip.open(partial, 'wt') as out:
+        cursor.execute(f"SELECT row_to_json(t)::text FROM {quote(table)} t ORDER BY {quote(order_by)}")
+        while True:
+            batch = cursor.fetchmany(2000)
+            if not batch:
+                break
+            out.writelines(f"{line}\n" for (line,) in batch)
+            rows += len(batch)
+    os.replace(partial, path)
+    return rows
+
+
+def detach_month(month):
+    """
+    Detach `month` from every partitioned table; returns the detached table names.
+
+    The month's days are flagged in the sales rollup, which keeps them while
+    no longer being able to rebuild them from live rows.
+    """
+    from analytics.rollup import mark_archived_period
+
+    quote = connection.ops.quote_name
+    detached = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in partitioned_tables():
+            name = partition_name(table, month)
+            cursor.execute("SELECT to_regclass(%s)", [name])
+            if cursor.fetchone()[0] is None:
+                continue
+            cursor.execute(f"ALTER TABLE {quote(table)} DETACH PARTITION {quote(name)}")
+            detached.append(name)
+        if detached:
+            mark_archived_period(month, add_months(month, 1))
+    return detached
+
+
+def archive_month(month, directory=None, drop=True):
+    """
+    Detach `month`'s partitions, write them to `<directory>/<partition>.jsonl.gz`
+    and, with `drop`, drop the detached tables. The month's store orders are
+    archived alongside and deleted, and coupon redemptions let go of the
+    archived orders. Returns {table name: rows archived}.
+    """
+    from discount.models import CouponRedemption
+    from .models import Order, StoreOrder
+
+    quote = connection.ops.quote_name
+    directory = directory or archive_directory()
+    os.makedirs(directory, exist_ok=True)
+
+    detached = detach_month(month)
+    archived = {}
+    for name in detached:
+        archived[name] = dump_table(name, os.path.join(directory, f"{name}.jsonl.gz"))
+
+    orders = partition_name(Order._meta.db_table, month)
+    if orders in detached:
+        # Store orders are small and unpartitioned; move those of the archived orders with them
+        store_orders = StoreOrder._meta.db_table
+        path = os.path.join(directory, f"{store_orders}_p{month:%Y_%m}.jsonl.gz")
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE archived_store_orders ON COMMIT DROP AS "
+                f"SELECT s.* FROM {quote(store_orders)} s WHERE s.order_id IN (SELECT id FROM {quote(orders)})"
+            )
+            archived[store_orders] = dump_table('archived_store_orders', path)
+            cursor.execute(
+                f"DELETE FROM {quote(store_orders)} WHERE id IN (SELECT id FROM archived_store_orders)"
+            )
+            # Redemptions still count towards coupon limits; they just lose their order, as on delete
+            cursor.execute(
+                f"UPDATE {quote(CouponRedemption._meta.db_table)} SET order_id = NULL "
+                f"WHERE order_id IN (SELECT id FROM {quote(orders)})"
+            )
+
+    if drop:
+        with connection.cursor() as cursor:
+            for name in detached:
+                cursor.execute(f"DROP TABLE {quote(name)}")
+    return archived
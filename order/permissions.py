@@ -11,7 +11,7 @@ class IsOrderSeller(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if not hasattr(request.user, 'seller_profile'):
             return False
-        return obj.items.filter(store__seller=request.user.seller_profile).exists()
+        return obj.store_orders.filter(store__seller=request.user.seller_profile).exists()
 
 class CanUpdateOrderStatus(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -22,5 +22,5 @@ class CanUpdateOrderStatus(permissions.BasePermission):
         # A more robust way is per-item status, but let's allow sellers to see/update 
         # orders with their products for now as a common multi-vendor approach.
         if hasattr(request.user, 'seller_profile'):
-             return obj.items.filter(store__seller=request.user.seller_profile).exists()
+             return obj.store_orders.filter(store__seller=request.user.seller_profile).exists()
         return False
@@ -1,7 +1,17 @@
+from decimal import Decimal
 from rest_framework import serializers
-from .models import Order, OrderItem
+from .models import Order, OrderItem, StoreOrder
+from .fulfilment import create_store_orders, set_fulfilment_status
 from product.models import Product
+from product.inventory import (
+    MAX_HELD_UNITS, HoldLimitExceeded, InsufficientStock, active_holds, place_holds, release_holds, reserve_stock
+)
+from product.pricing import PRICE_QUANTUM, resolve_product_prices
+from product.response_cache import invalidate_public_products
 from address.models import Address
+from store.models.store import Store
+from discount.redemption import CouponUnavailable, redeem_coupon
+from django.contrib.auth import get_user_model
 from django.db import transaction
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -13,8 +23,17 @@ class OrderItemSerializer(serializers.ModelSerializer):
         fields = ['id', 'product', 'product_name', 'quantity', 'price', 'store', 'store_name']
         read_only_fields = ['price', 'store']
 
+class StoreOrderSerializer(serializers.ModelSerializer):
+    store_name = serializers.ReadOnlyField(source='store.name')
+
+    class Meta:
+        model = StoreOrder
+        fields = ['id', 'store', 'store_name', 'status', 'subtotal', 'updated_at']
+        read_only_fields = fields
+
 class OrderSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
+    store_orders = StoreOrderSerializer(many=True, read_only=True)
     user_email = serializers.ReadOnlyField(source='user.email')
     
     class Meta:
@@ -23,89 +42,222 @@ class OrderSerializer(serializers.ModelSerializer):
             'id', 'user', 'user_email', 'order_number', 'status', 
             'payment_status', 'subtotal', 'discount_amount', 'total_amount', 
             'coupon', 'shipping_address', 'billing_address', 'items', 
-            'created_at', 'updated_at'
+            'store_orders', 'created_at', 'updated_at'
         ]
         read_only_fields = ['order_number', 'user', 'subtotal', 'discount_amount', 'total_amount']
 
-class OrderCreateSerializer(serializers.ModelSerializer):
+class CartItemsMixin:
+    """Validation shared by everything that takes a cart of {product, quantity} lines."""
+
+    def validate_items(self, items):
+        # Shape only; availability and stock are checked against locked rows when saving
+        quantities = {}
+        for item in items:
+            if 'product' not in item or 'quantity' not in item:
+                raise serializers.ValidationError("Each item must have a product ID and quantity.")
+            try:
+                product_id, quantity = int(item['product']), int(item['quantity'])
+            except (TypeError, ValueError):
+                raise serializers.ValidationError("Product ID and quantity must be integers.")
+            if quantity < 1:
+                raise serializers.ValidationError("Quantity must be at least 1.")
+            # Repeated lines for the same product become one order item
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+        return [{'product': product_id, 'quantity': quantity} for product_id, quantity in quantities.items()]
+
+    def get_products(self, quantities):
+        products = list(
+            Product.objects.select_related('store')
+            .filter(id__in=quantities, is_active=True, is_approved=True)
+            .order_by('id')
+        )
+        found = {product.pk for product in products}
+        for product_id in quantities:
+            if product_id not in found:
+                raise serializers.ValidationError(
+                    {'items': [f"Product with ID {product_id} not found or not available."]}
+                )
+        return products
+
+    def stock_error(self, products, shortages):
+        return serializers.ValidationError({'items': [
+            f"Not enough stock for product {product.name}."
+            for product in products if product.pk in shortages
+        ]})
+
+
+class CheckoutHoldSerializer(CartItemsMixin, serializers.Serializer):
+    items = serializers.ListField(child=serializers.DictField(), min_length=1)
+    checkout = serializers.UUIDField(read_only=True)
+    expires_at = serializers.DateTimeField(read_only=True)
+
+    def create(self, validated_data):
+        items = validated_data['items']
+        quantities = {item['product']: item['quantity'] for item in items}
+        products = self.get_products(quantities)
+        try:
+            checkout, expires_at = place_holds(self.context['request'].user, quantities)
+        except HoldLimitExceeded as exc:
+            raise serializers.ValidationError({'items': [
+                f"You can hold at most {MAX_HELD_UNITS} units of product {product.name} at a time."
+                for product in products if product.pk in exc.excess
+            ]})
+        except InsufficientStock as exc:
+            raise self.stock_error(products, exc.shortages)
+        return {'items': items, 'checkout': checkout, 'expires_at': expires_at}
+
+
+class OrderCreateSerializer(CartItemsMixin, serializers.ModelSerializer):
     items = serializers.ListField(
         child=serializers.DictField(),
         write_only=True,
+        required=False,
         min_length=1
     )
+    # Converts the holds placed by POST /api/order/hold/ instead of taking `items`
+    checkout = serializers.UUIDField(required=False, write_only=True)
 
     coupon_code = serializers.CharField(required=False, write_only=True)
 
     class Meta:
         model = Order
-        fields = ['id', 'shipping_address', 'billing_address', 'items', 'coupon_code']
+        fields = ['id', 'shipping_address', 'billing_address', 'items', 'checkout', 'coupon_code']
 
-    def validate_items(self, items):
-        for item in items:
-            if 'product' not in item or 'quantity' not in item:
-                raise serializers.ValidationError("Each item must have a product ID and quantity.")
-            
-            try:
-                product = Product.objects.get(id=item['product'], is_active=True, is_approved=True)
-            except Product.DoesNotExist:
-                raise serializers.ValidationError(f"Product with ID {item['product']} not found or not available.")
-            
-            if product.stock_quantity < item['quantity']:
-                raise serializers.ValidationError(f"Not enough stock for product {product.name}.")
-        return items
+    def validate(self, attrs):
+        if ('items' in attrs) == ('checkout' in attrs):
+            raise serializers.ValidationError("Provide either items or a checkout, not both.")
+        return attrs
+
+    def get_quantities(self, validated_data, user):
+        checkout = validated_data.pop('checkout', None)
+        if checkout is None:
+            return {item['product']: item['quantity'] for item in validated_data.pop('items')}, None
+        quantities = active_holds(checkout, user)
+        if not quantities:
+            raise serializers.ValidationError({'checkout': ["This checkout has expired or does not exist."]})
+        return quantities, checkout
+
+    def reserve_stock(self, products, quantities, checkout=None):
+        try:
+            reserve_stock(quantities, checkout=checkout)
+        except InsufficientStock as exc:
+            raise self.stock_error(products, exc.shortages)
+        if checkout:
+            release_holds(checkout)
+        invalidate_public_products(product_ids=quantities)
 
     @transaction.atomic
     def create(self, validated_data):
-        items_data = validated_data.pop('items')
         coupon_code = validated_data.pop('coupon_code', None)
         user = self.context['request'].user
-        
-        # Initial creation
-        order = Order.objects.create(user=user, **validated_data)
-        
-        subtotal = 0
-        for item_data in items_data:
-            product = Product.objects.get(id=item_data['product'])
-            quantity = item_data['quantity']
-            # Important: price should be the discounted price if any automatic discount exists
-            price = product.get_discounted_price()
-            
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                quantity=quantity,
-                price=price,
-                store=product.store
-            )
-            
-            # Reduce stock
-            product.stock_quantity -= quantity
-            product.save()
-            
-            subtotal += price * quantity
-        
-        order.subtotal = subtotal
-        
+
+        quantities, checkout = self.get_quantities(validated_data, user)
+        products = self.get_products(quantities)
+        # Take the stock first; a short line aborts the transaction before anything is written
+        self.reserve_stock(products, quantities, checkout)
+        # Price should be the discounted price if any automatic discount exists
+        pricing = resolve_product_prices(products)
+
+        items = []
+        subtotal = Decimal('0')
+        for product in products:
+            price = pricing[product.pk][1].quantize(PRICE_QUANTUM)
+            items.append(OrderItem(
+                product=product, quantity=quantities[product.pk], price=price, store=product.store
+            ))
+            subtotal += price * quantities[product.pk]
+
         # Handle Coupon
-        discount_amount = 0
+        coupon = None
+        discount_amount = Decimal('0')
         if coupon_code:
             from discount.models import Coupon
             try:
                 coupon = Coupon.objects.get(code=coupon_code)
                 if coupon.is_valid and subtotal >= coupon.min_purchase_amount:
-                     discount_amount = coupon.calculate_discount(subtotal)
-                     order.coupon = coupon
-                     coupon.used_count += 1
-                     coupon.save()
+                    discount_amount = Decimal(coupon.calculate_discount(subtotal)).quantize(PRICE_QUANTUM)
+                else:
+                    coupon = None
             except Coupon.DoesNotExist:
                 pass # Or raise error if you want strict validation
-        
-        order.discount_amount = discount_amount
-        order.total_amount = subtotal - discount_amount
-        order.save()
+
+        order = Order.objects.create(
+            user=user,
+            coupon=coupon,
+            subtotal=subtotal,
+            discount_amount=discount_amount,
+            total_amount=subtotal - discount_amount,
+            **validated_data
+        )
+        for item in items:
+            item.order = order
+            item.created_at = order.created_at
+        OrderItem.objects.bulk_create(items)
+        store_orders = create_store_orders(order, items)
+
+        if coupon:
+            try:
+                redeem_coupon(coupon, user, order)
+            except CouponUnavailable as exc:
+                raise serializers.ValidationError({'coupon_code': [str(exc)]})
+
+        # Let the response serializer read the items without going back to the database
+        order._prefetched_objects_cache = {'items': items, 'store_orders': store_orders}
         return order
 
 class OrderStatusUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = ['status']
+
+    def update(self, instance, validated_data):
+        if 'status' not in validated_data:
+            return instance
+        # Sellers move only their own stores' part of the order
+        user = self.context['request'].user
+        seller = None if user.is_staff else user.seller_profile
+        return set_fulfilment_status(instance, validated_data['status'], seller)
+
+class BulkCancelSerializer(serializers.Serializer):
+    orders = serializers.ListField(child=serializers.IntegerField(), required=False, min_length=1)
+    store = serializers.PrimaryKeyRelatedField(queryset=Store.objects.all(), required=False)
+    user = serializers.PrimaryKeyRelatedField(queryset=get_user_model().objects.all(), required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("Provide orders, a store or a user whose pending orders to cancel.")
+        return attrs
+
+class ArchivedOrderItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    product = serializers.IntegerField(source='product_id')
+    product_name = serializers.CharField()
+    quantity = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=12, decimal_places=2)
+    store = serializers.IntegerField(source='store_id')
+    store_name = serializers.CharField()
+
+class ArchivedStoreOrderSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    store = serializers.IntegerField(source='store_id')
+    status = serializers.CharField()
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+    updated_at = serializers.DateTimeField()
+
+class ArchivedOrderSerializer(serializers.Serializer):
+    """Read-only view of an order document from the archive."""
+    id = serializers.IntegerField()
+    user = serializers.IntegerField(source='user_id')
+    order_number = serializers.CharField()
+    status = serializers.CharField()
+    payment_status = serializers.CharField()
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+    discount_amount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    total_amount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    coupon = serializers.IntegerField(source='coupon_id', allow_null=True)
+    shipping_address = serializers.IntegerField(source='shipping_address_id', allow_null=True)
+    billing_address = serializers.IntegerField(source='billing_address_id', allow_null=True)
+    items = ArchivedOrderItemSerializer(many=True)
+    store_orders = ArchivedStoreOrderSerializer(many=True)
+    created_at = serializers.DateTimeField()
+    updated_at = serializers.DateTimeField()
@@ -0,0 +1,155 @@
+import gzip
+import os
+from datetime import timedelta
+from io import StringIO
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from account.models import SellerProfile
+from store.models.store import Store
+from product.models.product import Product
+from order.models import Order, OrderItem, StoreOrder
+from order.fulfilment import create_store_orders
+from discount.models import Coupon, CouponRedemption
+from order.archive import archive_orders, find_archived_order, history_directory, open_index, restore_orders
+
+
+@pytest.fixture
+def archive_dir(settings, tmp_path):
+    settings.ORDER_ARCHIVE_DIR = tmp_path
+    return history_directory()
+
+
+@pytest.fixture
+def product(db_user):
+    profile, _ = SellerProfile.objects.get_or_create(user=db_user)
+    store = Store.objects.create(seller=profile, name="History Store", is_approved=True, is_active=True)
+    return Product.objects.create(store=store, name="Vintage", price=10, stock_quantity=10, is_approved=True)
+
+
+def place_order(user, product, status, age_days):
+    order = Order.objects.create(user=user, status=status, subtotal=20, total_amount=20)
+    item = OrderItem.objects.create(order=order, product=product, quantity=2, price=10, store=product.store)
+    create_store_orders(order, [item])
+    created_at = timezone.now() - timedelta(days=age_days)
+    Order.objects.filter(pk=order.pk).update(created_at=created_at)
+    OrderItem.objects.filter(order=order).update(created_at=created_at)
+    return order
+
+
+@pytest.mark.django_db
+def test_archive_moves_only_old_finished_orders(customer_user, product, archive_dir):
+    old = [place_order(customer_user, product, status, 400) for status in
+           (Order.Status.DELIVERED, Order.Status.CANCELLED, Order.Status.RETURNED)]
+    kept = [
+        place_order(customer_user, product, Order.Status.SHIPPED, 400),
+        place_order(customer_user, product, Order.Status.DELIVERED, 10),
+    ]
+
+    reported = []
+    assert archive_orders(chunk_size=2, progress=reported.append) == 3
+    assert reported == [2, 3]
+
+    assert set(Order.objects.values_list('pk', flat=True)) == {order.pk for order in kept}
+    assert not OrderItem.objects.filter(order_id__in=[order.pk for order in old]).exists()
+    assert not StoreOrder.objects.filter(order_id__in=[order.pk for order in old]).exists()
+
+    # One segment holding one gzip member per chunk
+    segments = [name for name in os.listdir(archive_dir) if name.endswith('.jsonl.gz')]
+    assert len(segments) == 1
+    with gzip.open(os.path.join(archive_dir, segments[0]), 'rt') as segment:
+        assert len(segment.readlines()) == 3
+
+    document = find_archived_order(old[2].order_number)
+    assert document['id'] == old[2].pk
+    assert document['status'] == Order.Status.RETURNED
+    assert document['items'][0]['product_name'] == "Vintage"
+    assert document['store_orders'][0]['store_id'] == product.store_id
+    assert find_archived_order(kept[0].order_number) is None
+
+
+@pytest.mark.django_db
+def test_restore_puts_orders_back_with_their_ids(customer_user, product, archive_dir):
+    order = place_order(customer_user, product, Order.Status.DELIVERED, 400)
+    item = order.items.get()
+    archive_orders()
+
+    out = StringIO()
+    call_command('restore_orders', order.order_number, 'ORD-MISSING', stdout=out)
+    assert f"Restored {order.order_number}." in out.getvalue()
+    assert "ORD-MISSING" in out.getvalue()
+
+    restored = Order.objects.get(pk=order.pk)
+    assert restored.order_number == order.order_number
+    assert restored.status == Order.Status.DELIVERED
+    assert restored.total_amount == order.total_amount
+    assert list(restored.items.values_list('pk', 'quantity')) == [(item.pk, 2)]
+    assert restored.store_orders.get().store_id == product.store_id
+    # Restored orders leave the index, so a second restore is a no-op
+    assert find_archived_order(order.order_number) is None
+    assert restore_orders([order.order_number]) == []
+
+
+@pytest.mark.django_db
+def test_restore_relinks_coupon_redemptions(customer_user, product, archive_dir):
+    order = place_order(customer_user, product, Order.Status.DELIVERED, 400)
+    coupon = Coupon.objects.create(
+        code="KEEP", discount_type="fixed", value=5,
+        start_date=timezone.now() - timedelta(days=500), end_date=timezone.now() + timedelta(days=1),
+    )
+    redemption = CouponRedemption.objects.create(coupon=coupon, user=customer_user, order=order)
+    archive_orders()
+
+    # The redemption outlives the order so the coupon limits still count it
+    redemption.refresh_from_db()
+    assert redemption.order_id is None
+    assert find_archived_order(order.order_number)['redemptions'] == [redemption.pk]
+
+    restore_orders([order.order_number])
+    redemption.refresh_from_db()
+    assert redemption.order_id == order.pk
+
+
+@pytest.mark.django_db
+def test_lookup_reads_the_index_while_it_is_being_written(customer_user, product, archive_dir):
+    order = place_order(customer_user, product, Order.Status.DELIVERED, 400)
+    archive_orders()
+    later = place_order(customer_user, product, Order.Status.DELIVERED, 400)
+
+    # An archival run holding an open write transaction neither blocks nor hides earlier entries
+    writer = open_index(archive_dir)
+    writer.execute("INSERT INTO orders (order_number, location) VALUES (?, ?)", [later.order_number, "x:0"])
+    assert writer.in_transaction
+    assert find_archived_order(order.order_number)['id'] == order.pk
+    assert find_archived_order(later.order_number) is None
+    writer.rollback()
+    writer.close()
+
+
+@pytest.mark.django_db
+def test_archived_order_lookup_endpoint(api_client, customer_user, product, archive_dir):
+    order = place_order(customer_user, product, Order.Status.DELIVERED, 400)
+    call_command('archive_orders', stdout=StringIO())
+    url = reverse("order:order-archived", kwargs={'order_number': order.order_number})
+
+    api_client.force_authenticate(user=customer_user)
+    response = api_client.get(url)
+    assert response.status_code == 200
+    assert response.data['order_number'] == order.order_number
+    assert response.data['items'][0]['quantity'] == 2
+    assert response.data['items'][0]['price'] == '10.00'
+
+    # The seller owning the store sees it too; another customer gets a 404
+    api_client.force_authenticate(user=get_user_model().objects.get(pk=product.store.seller.user_id))
+    assert api_client.get(url).status_code == 200
+    stranger = get_user_model().objects.create(
+        email="stranger@test.com", password=make_password("StrangerPass123"), phone="+201222222222"
+    )
+    api_client.force_authenticate(user=stranger)
+    assert api_client.get(url).status_code == 404
+    missing = reverse("order:order-archived", kwargs={'order_number': 'ORD-MISSING'})
+    api_client.force_authenticate(user=customer_user)
+    assert api_client.get(missing).status_code == 404
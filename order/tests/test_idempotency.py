@@ -0,0 +1,77 @@
+import threading
+import pytest
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from account.models import SellerProfile
+from store.models.store import Store
+from product.models.product import Product
+from order.models import Order
+
+
+@pytest.fixture
+def product(db_user):
+    profile, _ = SellerProfile.objects.get_or_create(user=db_user)
+    store = Store.objects.create(seller=profile, name="Retry Store", is_approved=True, is_active=True)
+    return Product.objects.create(store=store, name="Retried", price=30, stock_quantity=10, is_approved=True)
+
+
+@pytest.mark.django_db
+def test_retried_order_is_created_once(api_client, customer_user, product):
+    api_client.force_authenticate(user=customer_user)
+    url = reverse("order:order-list")
+    data = {"items": [{"product": product.id, "quantity": 2}]}
+
+    first = api_client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY="checkout-1")
+    retry = api_client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY="checkout-1")
+    assert first.status_code == retry.status_code == status.HTTP_201_CREATED
+    assert retry.data["order_number"] == first.data["order_number"]
+    assert retry["Idempotent-Replayed"] == "true"
+    assert Order.objects.count() == 1
+    product.refresh_from_db()
+    assert product.stock_quantity == 8
+
+    # Same key, different body
+    data["items"][0]["quantity"] = 3
+    response = api_client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY="checkout-1")
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    # A new key is a new order, and keys do not leak between users
+    assert api_client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY="checkout-2").status_code == 201
+    cancel_url = reverse("order:order-cancel", kwargs={"pk": first.data["id"]})
+    assert api_client.post(cancel_url, HTTP_IDEMPOTENCY_KEY="cancel-1").status_code == status.HTTP_200_OK
+    replayed = api_client.post(cancel_url, HTTP_IDEMPOTENCY_KEY="cancel-1")
+    assert replayed.status_code == status.HTTP_200_OK
+    assert replayed["Idempotent-Replayed"] == "true"
+    product.refresh_from_db()
+    assert product.stock_quantity == 7
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_duplicates_wait_for_the_first(customer_user, product):
+    url = reverse("order:order-list")
+    data = {"items": [{"product": product.id, "quantity": 1}]}
+    barrier = threading.Barrier(8)
+    responses = []
+
+    def submit():
+        client = APIClient()
+        client.force_authenticate(user=customer_user)
+        try:
+            barrier.wait()
+            responses.append(client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY="tap-tap-tap"))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [response.status_code for response in responses] == [status.HTTP_201_CREATED] * 8
+    assert len({response.data["order_number"] for response in responses}) == 1
+    assert Order.objects.count() == 1
+    product.refresh_from_db()
+    assert product.stock_quantity == 9
@@ -1,10 +1,17 @@
 import pytest
+from datetime import timedelta
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from account.models import SellerProfile
 from store.models.store import Store
 from product.models.product import Product
-from order.models import Order, OrderItem
+from product.models import InventoryHold
+from order.models import Order, OrderItem, StoreOrder
+from order.fulfilment import create_store_orders
 from address.models import Address
 from django.contrib.contenttypes.models import ContentType
 
@@ -50,6 +57,10 @@ def test_address(customer_user):
         postal_code="12345"
     )
 
+def split_by_store(order):
+    # What checkout does for orders built by hand in these tests
+    return create_store_orders(order, list(order.items.select_related('store')))
+
 @pytest.mark.django_db
 class TestOrderAPI:
     
@@ -93,12 +104,138 @@ class TestOrderAPI:
         assert response.status_code == status.HTTP_400_BAD_REQUEST
         assert "Not enough stock" in str(response.data)
 
+    def test_create_order_query_count_is_independent_of_cart_size(self, api_client, customer_user, approved_store, test_address):
+        products = [
+            Product.objects.create(store=approved_store, name=f"Cart {i}", price=10 + i, stock_quantity=50, is_approved=True)
+            for i in range(30)
+        ]
+        api_client.force_authenticate(user=customer_user)
+        url = reverse("order:order-list")
+
+        def place(cart):
+            data = {
+                "shipping_address": test_address.id,
+                "billing_address": test_address.id,
+                "items": [{"product": product.id, "quantity": 1} for product in cart],
+            }
+            with CaptureQueriesContext(connection) as ctx:
+                response = api_client.post(url, data, format='json')
+            assert response.status_code == status.HTTP_201_CREATED
+            return response, len(ctx.captured_queries)
+
+        _, single = place(products[:1])
+        response, full = place(products)
+        assert full == single
+        assert len(response.data["items"]) == 30
+        assert response.data["items"][0]["store_name"] == approved_store.name
+        assert float(response.data["total_amount"]) == sum(10 + i for i in range(30))
+        assert set(Product.objects.values_list("stock_quantity", flat=True)) == {48, 49}
+
+    def test_create_order_merges_repeated_lines(self, api_client, customer_user, test_product, test_address):
+        api_client.force_authenticate(user=customer_user)
+        data = {
+            "shipping_address": test_address.id,
+            "billing_address": test_address.id,
+            "items": [{"product": test_product.id, "quantity": 6}, {"product": test_product.id, "quantity": 5}],
+        }
+        response = api_client.post(reverse("order:order-list"), data, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Not enough stock" in str(response.data)
+
+        data["items"][1]["quantity"] = 4
+        response = api_client.post(reverse("order:order-list"), data, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [(item["product"], item["quantity"]) for item in response.data["items"]] == [(test_product.id, 10)]
+        test_product.refresh_from_db()
+        assert test_product.stock_quantity == 0
+
+    def test_checkout_hold_reserves_stock_until_converted(self, api_client, customer_user, test_product, test_address):
+        api_client.force_authenticate(user=customer_user)
+        response = api_client.post(
+            reverse("order:order-hold"), {"items": [{"product": test_product.id, "quantity": 7}]}, format='json'
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        checkout = response.data["checkout"]
+
+        availability = api_client.get(reverse("product:product-availability", kwargs={"pk": test_product.pk}))
+        assert (availability.data["stock_quantity"], availability.data["available"]) == (10, 3)
+
+        # Another buyer cannot take the held units
+        from django.contrib.auth import get_user_model
+        rival = get_user_model().objects.create(email="rival@test.com", role="customer")
+        api_client.force_authenticate(user=rival)
+        response = api_client.post(
+            reverse("order:order-list"), {"items": [{"product": test_product.id, "quantity": 4}]}, format='json'
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Not enough stock" in str(response.data)
+        response = api_client.post(reverse("order:order-list"), {"checkout": checkout}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        api_client.force_authenticate(user=customer_user)
+        response = api_client.post(
+            reverse("order:order-list"),
+            {"checkout": checkout, "shipping_address": test_address.id, "billing_address": test_address.id},
+            format='json'
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [(item["product"], item["quantity"]) for item in response.data["items"]] == [(test_product.id, 7)]
+        assert not InventoryHold.objects.exists()
+        test_product.refresh_from_db()
+        assert test_product.stock_quantity == 3
+
+        response = api_client.post(reverse("order:order-list"), {"checkout": checkout}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_holds_per_customer_are_capped(self, api_client, customer_user, approved_store):
+        from product.inventory import MAX_HELD_UNITS
+        product = Product.objects.create(
+            store=approved_store, name="Plenty", price=5, stock_quantity=MAX_HELD_UNITS * 5, is_approved=True
+        )
+        url = reverse("order:order-hold")
+        api_client.force_authenticate(user=customer_user)
+        response = api_client.post(url, {"items": [{"product": product.id, "quantity": MAX_HELD_UNITS - 2}]}, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+
+        # A second checkout counts towards the same limit, whatever stock is left
+        response = api_client.post(url, {"items": [{"product": product.id, "quantity": 3}]}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert f"at most {MAX_HELD_UNITS} units" in str(response.data)
+        response = api_client.post(url, {"items": [{"product": product.id, "quantity": 2}]}, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+
+        # Expired holds no longer count
+        InventoryHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        response = api_client.post(url, {"items": [{"product": product.id, "quantity": MAX_HELD_UNITS}]}, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_expired_holds_are_ignored_and_swept(self, api_client, customer_user, test_product):
+        api_client.force_authenticate(user=customer_user)
+        response = api_client.post(
+            reverse("order:order-hold"), {"items": [{"product": test_product.id, "quantity": 10}]}, format='json'
+        )
+        checkout = response.data["checkout"]
+        response = api_client.post(
+            reverse("order:order-hold"), {"items": [{"product": test_product.id, "quantity": 1}]}, format='json'
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        InventoryHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        availability = api_client.get(reverse("product:product-availability", kwargs={"pk": test_product.pk}))
+        assert availability.data["available"] == 10
+        response = api_client.post(reverse("order:order-list"), {"checkout": checkout}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        call_command("release_expired_holds", stdout=open("/dev/null", "w"))
+        assert not InventoryHold.objects.exists()
+
     def test_seller_can_see_order_with_their_product(self, api_client, product_owner, customer_user, test_product, test_address):
         # Create order first
         order = Order.objects.create(user=customer_user, total_amount=100)
         OrderItem.objects.create(
             order=order, product=test_product, quantity=1, price=100, store=test_product.store
         )
+        split_by_store(order)
         
         # Authenticate as seller
         api_client.force_authenticate(user=product_owner)
@@ -106,8 +243,8 @@ class TestOrderAPI:
         response = api_client.get(url)
         
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 1
-        assert response.data[0]["order_number"] == order.order_number
+        assert len(response.data["results"]) == 1
+        assert response.data["results"][0]["order_number"] == order.order_number
 
     def test_customer_only_sees_own_orders(self, api_client, customer_user, db_user, test_product):
         # Create an order for a different user
@@ -122,27 +259,126 @@ class TestOrderAPI:
         response = api_client.get(url)
         
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 0
+        assert len(response.data["results"]) == 0
 
     def test_seller_update_order_status(self, api_client, product_owner, customer_user, test_product):
         order = Order.objects.create(user=customer_user, total_amount=100)
         OrderItem.objects.create(
             order=order, product=test_product, quantity=1, price=100, store=test_product.store
         )
+        split_by_store(order)
         
         api_client.force_authenticate(user=product_owner)
         url = reverse("order:order-update-status", kwargs={"pk": order.pk})
         response = api_client.patch(url, {"status": "processing"})
         
         assert response.status_code == status.HTTP_200_OK
+        assert [part["status"] for part in response.data["store_orders"]] == ["processing"]
         order.refresh_from_db()
         assert order.status == "processing"
 
+    def test_each_store_moves_its_own_part_of_an_order(self, api_client, product_owner, customer_user, test_product, test_address):
+        from django.contrib.auth import get_user_model
+        other_seller = get_user_model().objects.create(email="second_seller@test.com", role="seller")
+        other_profile = SellerProfile.objects.create(user=other_seller, display_name="Second Shop", is_verified=True)
+        other_store = Store.objects.create(seller=other_profile, name="Second Store", is_approved=True, is_active=True)
+        other_product = Product.objects.create(
+            store=other_store, name="Second Product", price=30, stock_quantity=5, is_approved=True
+        )
+
+        api_client.force_authenticate(user=customer_user)
+        response = api_client.post(reverse("order:order-list"), {"items": [
+            {"product": test_product.id, "quantity": 2}, {"product": other_product.id, "quantity": 1},
+        ]}, format='json')
+        order_id = response.data["id"]
+        assert sorted((part["store_name"], float(part["subtotal"])) for part in response.data["store_orders"]) == [
+            ("Order Test Store", 200.0), ("Second Store", 30.0)
+        ]
+
+        url = reverse("order:order-update-status", kwargs={"pk": order_id})
+        api_client.force_authenticate(user=product_owner)
+        response = api_client.patch(url, {"status": "shipped"})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["status"] == "pending"
+        assert sorted((part["store_name"], part["status"]) for part in response.data["store_orders"]) == [
+            ("Order Test Store", "shipped"), ("Second Store", "pending")
+        ]
+        assert StoreOrder.objects.get(order_id=order_id, store=test_product.store).status == "shipped"
+        assert StoreOrder.objects.get(order_id=order_id, store=other_store).status == "pending"
+
+        api_client.force_authenticate(user=other_seller)
+        assert len(api_client.get(reverse("order:order-list")).data["results"]) == 1
+        response = api_client.patch(url, {"status": "shipped"})
+        assert response.data["status"] == "shipped"
+        assert [part["status"] for part in response.data["store_orders"]] == ["shipped", "shipped"]
+        assert Order.objects.get(pk=order_id).status == "shipped"
+
+    def test_moving_one_part_invalidates_the_order_etag(self, api_client, product_owner, customer_user, test_product, test_address):
+        from django.contrib.auth import get_user_model
+        other_seller = get_user_model().objects.create(email="etag_seller@test.com", role="seller")
+        other_profile = SellerProfile.objects.create(user=other_seller, display_name="Etag Shop", is_verified=True)
+        other_store = Store.objects.create(seller=other_profile, name="Etag Store", is_approved=True, is_active=True)
+        other_product = Product.objects.create(
+            store=other_store, name="Etag Product", price=30, stock_quantity=5, is_approved=True
+        )
+
+        api_client.force_authenticate(user=customer_user)
+        response = api_client.post(reverse("order:order-list"), {"items": [
+            {"product": test_product.id, "quantity": 1}, {"product": other_product.id, "quantity": 1},
+        ]}, format='json')
+        url = reverse("order:order-detail", kwargs={"pk": response.data["id"]})
+        etag = api_client.get(url)["ETag"]
+
+        api_client.force_authenticate(user=product_owner)
+        api_client.patch(reverse("order:order-update-status", kwargs={"pk": response.data["id"]}), {"status": "shipped"})
+
+        # The order itself stays pending, but its payload changed
+        api_client.force_authenticate(user=customer_user)
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["status"] == "pending"
+        assert sorted(part["status"] for part in response.data["store_orders"]) == ["pending", "shipped"]
+
+    def test_customer_cannot_cancel_once_a_store_has_shipped(self, api_client, product_owner, customer_user, test_product, test_address):
+        from django.contrib.auth import get_user_model
+        from order.cancellation import cancel_orders
+        other_seller = get_user_model().objects.create(email="third_seller@test.com", role="seller")
+        other_profile = SellerProfile.objects.create(user=other_seller, display_name="Third Shop", is_verified=True)
+        other_store = Store.objects.create(seller=other_profile, name="Third Store", is_approved=True, is_active=True)
+        other_product = Product.objects.create(
+            store=other_store, name="Third Product", price=30, stock_quantity=5, is_approved=True
+        )
+
+        api_client.force_authenticate(user=customer_user)
+        response = api_client.post(reverse("order:order-list"), {"items": [
+            {"product": test_product.id, "quantity": 2}, {"product": other_product.id, "quantity": 1},
+        ]}, format='json')
+        order_id = response.data["id"]
+
+        api_client.force_authenticate(user=product_owner)
+        api_client.patch(reverse("order:order-update-status", kwargs={"pk": order_id}), {"status": "shipped"})
+        assert Order.objects.get(pk=order_id).status == "pending"
+
+        api_client.force_authenticate(user=customer_user)
+        response = api_client.post(reverse("order:order-cancel", kwargs={"pk": order_id}))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        # Bulk cancellation skips it as well
+        assert cancel_orders([order_id]) == (0, 0)
+
+        assert Order.objects.get(pk=order_id).status == "pending"
+        assert dict(StoreOrder.objects.filter(order_id=order_id).values_list('store_id', 'status')) == {
+            test_product.store_id: "shipped", other_store.pk: "pending"
+        }
+        test_product.refresh_from_db()
+        other_product.refresh_from_db()
+        assert (test_product.stock_quantity, other_product.stock_quantity) == (8, 4)
+
     def test_other_seller_cannot_update_order_status(self, api_client, customer_user, test_product):
         order = Order.objects.create(user=customer_user, total_amount=100)
         OrderItem.objects.create(
             order=order, product=test_product, quantity=1, price=100, store=test_product.store
         )
+        split_by_store(order)
         
         # Create another seller
         from django.contrib.auth import get_user_model
@@ -176,9 +412,137 @@ class TestOrderAPI:
         url_cancel = reverse("order:order-cancel", kwargs={"pk": order_id})
         response = api_client.post(url_cancel)
         assert response.status_code == status.HTTP_200_OK
+        assert response.data["status"] == "cancelled"
+        assert [part["status"] for part in response.data["store_orders"]] == ["cancelled"]
         
         # Verify status and stock
         order = Order.objects.get(id=order_id)
         assert order.status == "cancelled"
         test_product.refresh_from_db()
         assert test_product.stock_quantity == 10 # Restored
+
+    def test_staff_bulk_cancel_restores_stock(self, api_client, customer_user, approved_store, test_product):
+        other = Product.objects.create(store=approved_store, name="Other", price=5, stock_quantity=0, is_approved=True)
+        orders = []
+        for i in range(6):
+            order = Order.objects.create(user=customer_user, total_amount=10)
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=test_product, quantity=1, price=100, store=approved_store),
+                OrderItem(order=order, product=other, quantity=2, price=5, store=approved_store),
+            ])
+            split_by_store(order)
+            orders.append(order)
+        Order.objects.filter(pk=orders[0].pk).update(status=Order.Status.SHIPPED)
+
+        url = reverse("order:order-bulk-cancel")
+        api_client.force_authenticate(user=customer_user)
+        assert api_client.post(url, {"store": approved_store.pk}, format='json').status_code == status.HTTP_403_FORBIDDEN
+
+        from django.contrib.auth import get_user_model
+        staff_user = get_user_model().objects.create(email="staff_cancel@test.com", is_staff=True, role="staff")
+        api_client.force_authenticate(user=staff_user)
+        assert api_client.post(url, {}, format='json').status_code == status.HTTP_400_BAD_REQUEST
+
+        response = api_client.post(url, {"store": approved_store.pk}, format='json')
+        assert response.data == {"cancelled": 5, "restored_units": 15}
+        test_product.refresh_from_db()
+        other.refresh_from_db()
+        assert (test_product.stock_quantity, other.stock_quantity) == (15, 10)
+        assert Order.objects.filter(status=Order.Status.CANCELLED).count() == 5
+
+        # Nothing left pending, so a retry restores nothing
+        response = api_client.post(url, {"store": approved_store.pk}, format='json')
+        assert response.data == {"cancelled": 0, "restored_units": 0}
+
+    def test_cancel_orders_command_reports_chunks(self, customer_user, test_product):
+        from io import StringIO
+        for _ in range(5):
+            order = Order.objects.create(user=customer_user, total_amount=100)
+            OrderItem.objects.create(order=order, product=test_product, quantity=2, price=100, store=test_product.store)
+
+        out = StringIO()
+        call_command("cancel_orders", "--user", str(customer_user.pk), "--chunk-size", "2", stdout=out)
+        assert "Chunk 3/3: cancelled 1 orders, restored 2 units." in out.getvalue()
+        assert "Cancelled 5 orders, restored 10 units." in out.getvalue()
+        test_product.refresh_from_db()
+        assert test_product.stock_quantity == 20
+
+    def test_order_list_query_count_is_independent_of_history(self, api_client, customer_user, product_owner, approved_store):
+        products = [
+            Product.objects.create(store=approved_store, name=f"Line {i}", price=5, stock_quantity=100, is_approved=True)
+            for i in range(3)
+        ]
+
+        def place_orders(count):
+            for _ in range(count):
+                order = Order.objects.create(user=customer_user, total_amount=15)
+                OrderItem.objects.bulk_create([
+                    OrderItem(order=order, product=product, quantity=1, price=5, store=approved_store)
+                    for product in products
+                ])
+                split_by_store(order)
+
+        def list_queries(user):
+            # A fresh instance, so per-user lookups are not cached between calls
+            api_client.force_authenticate(user=type(user).objects.get(pk=user.pk))
+            with CaptureQueriesContext(connection) as ctx:
+                response = api_client.get(reverse("order:order-list"), {"page_size": 50})
+            assert response.status_code == status.HTTP_200_OK
+            return len(response.data["results"]), len(ctx.captured_queries)
+
+        place_orders(1)
+        small = {user.pk: list_queries(user) for user in (customer_user, product_owner)}
+        place_orders(20)
+        for user in (customer_user, product_owner):
+            count, queries = list_queries(user)
+            assert count == 21
+            assert queries == small[user.pk][1]
+
+        response = api_client.get(reverse("order:order-list"))
+        item = response.data["results"][0]["items"][0]
+        assert item["product_name"].startswith("Line") and item["store_name"] == approved_store.name
+        assert response.data["results"][0]["user_email"] == customer_user.email
+
+        order = Order.objects.first()
+        api_client.force_authenticate(user=customer_user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(reverse("order:order-detail", kwargs={"pk": order.pk}))
+        assert len(response.data["items"]) == 3
+        # Seller-profile check, validators, the order with its user, its items and its store orders
+        assert len(ctx.captured_queries) == 5
+
+    def test_order_detail_conditional_get(self, api_client, customer_user, monkeypatch):
+        order = Order.objects.create(user=customer_user, total_amount=100)
+        url = reverse("order:order-detail", kwargs={"pk": order.pk})
+        api_client.force_authenticate(user=customer_user)
+
+        etag = api_client.get(url)["ETag"]
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        # Object permissions still run before a 304
+        from rest_framework.permissions import BasePermission
+        from order.views import OrderViewSet
+
+        class DenyObject(BasePermission):
+            def has_object_permission(self, request, view, obj):
+                return False
+
+        with monkeypatch.context() as patch:
+            patch.setattr(OrderViewSet, "get_permissions", lambda view: [DenyObject()])
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        # Someone who cannot see the order gets no validator hints
+        from django.contrib.auth import get_user_model
+        stranger = get_user_model().objects.create(email="stranger@test.com", role="customer")
+        api_client.force_authenticate(user=stranger)
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+        api_client.force_authenticate(user=customer_user)
+        order.status = Order.Status.PROCESSING
+        order.save()
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["status"] == "processing"
@@ -0,0 +1,108 @@
+import gzip
+import json
+from datetime import timedelta
+from io import StringIO
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from account.models import SellerProfile
+from store.models.store import Store
+from product.models.product import Product
+from order.models import Order, OrderItem, StoreOrder
+from order.fulfilment import create_store_orders
+from order.partitioning import (
+    add_months, create_partition, ensure_partitions, month_start, monthly_partitions, partition_name
+)
+
+
+@pytest.fixture
+def product(db_user):
+    profile, _ = SellerProfile.objects.get_or_create(user=db_user)
+    store = Store.objects.create(seller=profile, name="Archive Store", is_approved=True, is_active=True)
+    return Product.objects.create(store=store, name="Archived", price=10, stock_quantity=10, is_approved=True)
+
+
+def place_order(user, product, created_at=None):
+    order = Order.objects.create(user=user, total_amount=10)
+    item = OrderItem.objects.create(order=order, product=product, quantity=1, price=10, store=product.store)
+    create_store_orders(order, [item])
+    if created_at:
+        Order.objects.filter(pk=order.pk).update(created_at=created_at)
+        OrderItem.objects.filter(order=order).update(created_at=created_at)
+    return order
+
+
+def partition_of(table, pk):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT tableoid::regclass::text FROM {table} WHERE id = %s", [pk])
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+def test_orders_and_items_land_in_monthly_partitions(customer_user, product):
+    assert ensure_partitions() == []
+    current = month_start(timezone.localtime())
+    for table in ("order_order", "order_orderitem"):
+        months = [month for month, _ in monthly_partitions(table)]
+        assert [add_months(current, offset) for offset in range(4)] == months[-4:]
+
+    order = place_order(customer_user, product)
+    assert partition_of("order_order", order.pk) == partition_name("order_order", current)
+    assert partition_of("order_orderitem", order.items.get().pk) == partition_name("order_orderitem", current)
+
+    # A month with no partition falls into the default one until its partition is created
+    old = timezone.now() - timedelta(days=400)
+    stale = place_order(customer_user, product, created_at=old)
+    assert partition_of("order_order", stale.pk) == "order_order_default"
+    with connection.cursor() as cursor:
+        assert create_partition(cursor, "order_order", month_start(timezone.localtime(old)))
+    assert partition_of("order_order", stale.pk) == partition_name("order_order", month_start(timezone.localtime(old)))
+
+
+@pytest.mark.django_db
+def test_old_months_are_archived_and_dropped(customer_user, product, tmp_path):
+    old = timezone.now() - timedelta(days=400)
+    old_month = month_start(timezone.localtime(old))
+    with connection.cursor() as cursor:
+        for table in ("order_order", "order_orderitem"):
+            create_partition(cursor, table, old_month)
+    archived = place_order(customer_user, product, created_at=old)
+    recent = place_order(customer_user, product)
+    with connection.cursor() as cursor:
+        # Fire the deferred FK checks now; the test's single transaction would otherwise block the DROP
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+    out = StringIO()
+    call_command("order_partitions", "--retain-months", "6", "--archive-dir", str(tmp_path), stdout=out)
+
+    assert list(Order.objects.values_list("pk", flat=True)) == [recent.pk]
+    assert list(StoreOrder.objects.values_list("order_id", flat=True)) == [recent.pk]
+    assert old_month not in [month for month, _ in monthly_partitions("order_order")]
+
+    with gzip.open(tmp_path / f"{partition_name('order_order', old_month)}.jsonl.gz", "rt") as archive:
+        rows = [json.loads(line) for line in archive]
+    assert [row["order_number"] for row in rows] == [archived.order_number]
+    with gzip.open(tmp_path / f"{partition_name('order_orderitem', old_month)}.jsonl.gz", "rt") as archive:
+        assert [json.loads(line)["order_id"] for line in archive] == [archived.pk]
+    assert (tmp_path / f"order_storeorder_p{old_month:%Y_%m}.jsonl.gz").exists()
+
+
+@pytest.mark.django_db
+def test_order_numbers_stay_globally_unique_across_partitions(customer_user, monkeypatch):
+    from django.db import IntegrityError, transaction
+    from order.models import OrderNumber
+
+    first = Order.objects.create(user=customer_user)
+    assert OrderNumber.objects.filter(number=first.order_number).exists()
+
+    # A later order reusing the number has a different created_at, so only the registry catches it
+    with pytest.raises(IntegrityError), transaction.atomic():
+        Order.objects.create(user=customer_user, order_number=first.order_number)
+
+    # A generated number that clashes is replaced by a fresh one
+    taken = first.order_number.removeprefix("ORD-").lower()
+    hexes = iter([taken + "0" * 20, "a" * 32])
+    monkeypatch.setattr("order.models.order.uuid.uuid4", lambda: type("U", (), {"hex": next(hexes)})())
+    second = Order.objects.create(user=customer_user)
+    assert second.order_number == "ORD-AAAAAAAAAAAA"
@@ -0,0 +1,99 @@
+import random
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from django.db import connection
+from rest_framework.exceptions import ValidationError
+from account.models import SellerProfile
+from store.models.store import Store
+from product.models.product import Product
+from order.models import Order, OrderItem
+from order.serializers import OrderCreateSerializer
+
+ORDERS = 2000
+WORKERS = 16
+
+
+@pytest.fixture
+def hot_products(db_user):
+    profile, _ = SellerProfile.objects.get_or_create(user=db_user)
+    store = Store.objects.create(seller=profile, name="Flash Sale Store", is_approved=True, is_active=True)
+    return [
+        Product.objects.create(store=store, name=f"Hot {i}", price=10, stock_quantity=40, is_approved=True)
+        for i in range(3)
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_checkouts_never_oversell(hot_products, customer_user, record_property):
+    initial = {product.pk: product.stock_quantity for product in hot_products}
+    request = SimpleNamespace(user=customer_user)
+    tickets = iter(range(ORDERS))
+    lock = threading.Lock()
+    outcomes = {'placed': 0, 'rejected': 0, 'errors': []}
+
+    def checkout():
+        rng = random.Random()
+        try:
+            while True:
+                with lock:
+                    if next(tickets, None) is None:
+                        return
+                cart = rng.sample(hot_products, rng.randint(1, len(hot_products)))
+                items = [{'product': product.pk, 'quantity': rng.randint(1, 3)} for product in cart]
+                serializer = OrderCreateSerializer(data={'items': items}, context={'request': request})
+                serializer.is_valid(raise_exception=True)
+                try:
+                    serializer.save()
+                    outcome = 'placed'
+                except ValidationError:
+                    outcome = 'rejected'
+                with lock:
+                    outcomes[outcome] += 1
+        except Exception as exc:
+            outcomes['errors'].append(exc)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=checkout) for _ in range(WORKERS)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    assert outcomes['errors'] == []
+    assert outcomes['placed'] + outcomes['rejected'] == ORDERS
+    assert Order.objects.count() == outcomes['placed']
+    for product in Product.objects.filter(pk__in=initial):
+        sold = sum(OrderItem.objects.filter(product=product).values_list('quantity', flat=True))
+        assert product.stock_quantity >= 0
+        assert sold == initial[product.pk] - product.stock_quantity
+    # Surfaces in the JUnit XML report (--junitxml) for tracking throughput across runs
+    record_property('checkouts_per_second', round(ORDERS / elapsed))
+    record_property('orders_placed', outcomes['placed'])
+
+
+@pytest.mark.django_db
+def test_short_lines_are_all_reported(hot_products, customer_user):
+    first, second, third = hot_products
+    serializer = OrderCreateSerializer(
+        data={'items': [
+            {'product': first.pk, 'quantity': 41},
+            {'product': second.pk, 'quantity': 1},
+            {'product': third.pk, 'quantity': 99},
+        ]},
+        context={'request': SimpleNamespace(user=customer_user)},
+    )
+    serializer.is_valid(raise_exception=True)
+    with pytest.raises(ValidationError) as excinfo:
+        serializer.save()
+
+    assert sorted(str(message) for message in excinfo.value.detail['items']) == [
+        "Not enough stock for product Hot 0.", "Not enough stock for product Hot 2."
+    ]
+    # The line that fit was rolled back with the rest
+    second.refresh_from_db()
+    assert second.stock_quantity == 40
@@ -1,40 +1,84 @@
-from django.db import transaction
+from django.db.models import Prefetch
+from django.http import Http404
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, OpenApiResponse
-from .models import Order
-from .serializers import OrderSerializer, OrderCreateSerializer, OrderStatusUpdateSerializer
+from .models import Order, OrderItem, StoreOrder
+from .serializers import (
+    OrderSerializer, OrderCreateSerializer, OrderStatusUpdateSerializer, CheckoutHoldSerializer, BulkCancelSerializer,
+    ArchivedOrderSerializer
+)
+from .archive import find_archived_order
+from .cancellation import cancel_orders, pending_order_ids
+from .fulfilment import seller_order_ids
 from .permissions import IsOrderOwner, IsOrderSeller, CanUpdateOrderStatus
+from .pagination import OrderPagination
+from core.mixins import ConditionalRetrieveMixin
+from core.idempotency import idempotent
+from product.inventory import MAX_HELD_UNITS
 
 @extend_schema(tags=['Orders'])
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ConditionalRetrieveMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and managing orders.
     """
     queryset = Order.objects.all()
+    pagination_class = OrderPagination
 
     def get_serializer_class(self):
         if self.action == 'create':
             return OrderCreateSerializer
+        if self.action == 'hold':
+            return CheckoutHoldSerializer
+        if self.action == 'bulk_cancel':
+            return BulkCancelSerializer
         if self.action in ['update', 'partial_update', 'update_status']:
             return OrderStatusUpdateSerializer
         return OrderSerializer
 
+    # Actions that answer with OrderSerializer and so read every item
+    serialized_actions = ['list', 'retrieve', 'cancel', 'update_status']
+
     def get_queryset(self):
         user = self.request.user
         if not user.is_authenticated:
             return Order.objects.none()
-        
+
+        queryset = Order.objects.all()
+        if self.action in self.serialized_actions:
+            queryset = self.with_items(queryset)
+
         if user.is_staff:
-            return Order.objects.all()
+            return queryset
         
         if hasattr(user, 'seller_profile'):
-            # Orders containing items from this seller's store
-            return Order.objects.filter(items__store__seller=user.seller_profile).distinct()
+            # Orders with a part fulfilled by one of this seller's stores
+            return queryset.filter(pk__in=seller_order_ids(user.seller_profile))
         
         # Regular customer: only their own orders
-        return Order.objects.filter(user=user)
+        return queryset.filter(user=user)
+
+    def with_items(self, queryset):
+        """
+        Load what OrderSerializer reads in a fixed number of queries: the
+        user's email joined onto the orders, then one query for all their
+        items with product and store names and one for their store orders.
+        """
+        items = OrderItem.objects.select_related('product', 'store').only(
+            'id', 'order_id', 'product_id', 'store_id', 'quantity', 'price', 'product__name', 'store__name'
+        )
+        store_orders = StoreOrder.objects.select_related('store').only(
+            'id', 'order_id', 'store_id', 'status', 'subtotal', 'updated_at', 'store__name'
+        )
+        order_fields = [field.name for field in Order._meta.concrete_fields]
+        return queryset.select_related('user').only(*order_fields, 'user__email').prefetch_related(
+            Prefetch('items', queryset=items), Prefetch('store_orders', queryset=store_orders)
+        )
+
+    def reload(self, order):
+        # Store orders are changed with queryset updates, so the prefetched ones are stale
+        return self.with_items(Order.objects.all()).get(pk=order.pk)
 
     def get_permissions(self):
         if self.action == 'create':
@@ -45,14 +89,36 @@ class OrderViewSet(viewsets.ModelViewSet):
             return [CanUpdateOrderStatus()]
         if self.action == 'update_status':
             return [CanUpdateOrderStatus()]
+        if self.action == 'bulk_cancel':
+            return [permissions.IsAdminUser()]
         return [permissions.IsAuthenticated()]
 
+    @idempotent
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         order = serializer.save()
         return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
 
+    @extend_schema(
+        summary="Hold cart stock",
+        description="Set the cart's quantities aside for a limited time while the customer pays. "
+                    "Pass the returned checkout to order creation to turn the holds into an order. "
+                    f"A customer can hold at most {MAX_HELD_UNITS} units of a product across their active checkouts.",
+        request=CheckoutHoldSerializer,
+        responses={
+            201: CheckoutHoldSerializer,
+            400: OpenApiResponse(description="Unavailable product, not enough stock or hold limit reached")
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='hold')
+    @idempotent
+    def hold(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
     @extend_schema(
         summary="Cancel order",
         description="Cancel an order if it is still pending. Only the order owner can do this.",
@@ -63,6 +129,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         }
     )
     @action(detail=True, methods=['post'], url_path='cancel')
+    @idempotent
     def cancel(self, request, pk=None):
         order = self.get_object()
         if order.user != request.user:
@@ -70,18 +137,66 @@ class OrderViewSet(viewsets.ModelViewSet):
         
         if order.status != Order.Status.PENDING:
             return Response({'error': 'Only pending orders can be cancelled'}, status=status.HTTP_400_BAD_REQUEST)
+        if any(part.status != Order.Status.PENDING for part in order.store_orders.all()):
+            return Response(
+                {'error': 'Part of this order is already being fulfilled and can no longer be cancelled'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        with transaction.atomic():
-            order.status = Order.Status.CANCELLED
-            order.save()
-            
-            # Restore stock
-            for item in order.items.all():
-                product = item.product
-                product.stock_quantity += item.quantity
-                product.save()
-                
-        return Response(OrderSerializer(order).data)
+        # Only a still-pending order is cancelled, so a repeated request cannot restore stock twice
+        cancelled, _ = cancel_orders([order.pk])
+        if not cancelled:
+            return Response({'error': 'Only pending orders can be cancelled'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(OrderSerializer(self.reload(order)).data)
+
+    @extend_schema(
+        summary="Cancel orders in bulk",
+        description="Cancel every pending order matching the given ids, store and/or customer and restore "
+                    "their stock, in chunked transactions. Only staff users can perform this action.",
+        request=BulkCancelSerializer,
+        responses={
+            200: OpenApiResponse(description="Number of orders cancelled and units restored"),
+            400: OpenApiResponse(description="No filter given"),
+            403: OpenApiResponse(description="Permission denied")
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='bulk-cancel')
+    @idempotent
+    def bulk_cancel(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        order_ids = pending_order_ids(
+            store=serializer.validated_data.get('store'),
+            user=serializer.validated_data.get('user'),
+            order_ids=serializer.validated_data.get('orders'),
+        )
+        cancelled, restored = cancel_orders(order_ids)
+        return Response({'cancelled': cancelled, 'restored_units': restored})
+
+    @extend_schema(
+        summary="Look up an archived order",
+        description="Read an order that has been moved to the archive, by order number. Customers see "
+                    "their own orders, sellers orders with a part from one of their stores, staff any order.",
+        responses={
+            200: ArchivedOrderSerializer,
+            404: OpenApiResponse(description="No archived order with this number")
+        }
+    )
+    @action(detail=False, methods=['get'], url_path=r'archived/(?P<order_number>[^/]+)')
+    def archived(self, request, order_number=None):
+        document = find_archived_order(order_number)
+        if document is None or not self.can_view_archived(request.user, document):
+            raise Http404
+        return Response(ArchivedOrderSerializer(document).data)
+
+    def can_view_archived(self, user, document):
+        if user.is_staff or document['user_id'] == user.pk:
+            return True
+        if hasattr(user, 'seller_profile'):
+            store_ids = set(user.seller_profile.store.values_list('pk', flat=True))
+            return any(part['store_id'] in store_ids for part in document['store_orders'])
+        return False
 
     @extend_schema(
         summary="Update order status",
@@ -96,7 +211,7 @@ class OrderViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['patch'], url_path='update-status')
     def update_status(self, request, pk=None):
         order = self.get_object()
-        serializer = OrderStatusUpdateSerializer(order, data=request.data, partial=True)
+        serializer = self.get_serializer(order, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        return Response(OrderSerializer(order).data)
+        return Response(OrderSerializer(self.reload(order)).data)
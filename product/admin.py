@@ -1,6 +1,7 @@
 from django.contrib import admin
 from .models.product import Product
 from .models.category import Category
+from .models.inventory_hold import InventoryHold
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -14,3 +15,9 @@ class ProductAdmin(admin.ModelAdmin):
     search_fields = ['name', 'store__name']
     prepopulated_fields = {'slug': ('name',)}
     readonly_fields = ['approved_at']
+
+@admin.register(InventoryHold)
+class InventoryHoldAdmin(admin.ModelAdmin):
+    list_display = ['product', 'user', 'quantity', 'checkout', 'expires_at']
+    list_filter = ['expires_at']
+    search_fields = ['product__name', 'user__email']
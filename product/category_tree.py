@@ -0,0 +1,49 @@
+import hashlib
+import json
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from core.cache import get_version, bump_version
+from .models.category import Category
+from .serializers import CategorySerializer
+
+TREE_VERSION_KEY = "categories:tree:version"
+
+
+def invalidate_category_tree():
+    bump_version(TREE_VERSION_KEY)
+
+
+def build_category_tree():
+    """
+    Nest all active categories in one query. Rows come back in path order, so
+    every parent is seen before its children; a category under an inactive
+    parent is dropped together with that parent.
+    """
+    nodes = {}
+    roots = []
+    for category in Category.objects.filter(is_active=True).order_by('path'):
+        node = dict(CategorySerializer(category).data, children=[])
+        if category.parent_id is None:
+            roots.append(node)
+        elif category.parent_id in nodes:
+            nodes[category.parent_id]['children'].append(node)
+        else:
+            continue
+        nodes[category.pk] = node
+    return roots
+
+
+def get_category_tree():
+    """
+    Return (etag, tree), building the tree only when the cached copy for the
+    current version is missing. The version is bumped by any Category change.
+    """
+    key = f"categories:tree:{get_version(TREE_VERSION_KEY)}"
+    cached = cache.get(key)
+    if cached is None:
+        tree = build_category_tree()
+        payload = json.dumps(tree, cls=DjangoJSONEncoder, sort_keys=True)
+        etag = f'"{hashlib.sha256(payload.encode()).hexdigest()}"'
+        cached = (etag, tree)
+        cache.set(key, cached, timeout=None)
+    return cached
@@ -0,0 +1,129 @@
+import hashlib
+from django.core.cache import cache
+from django.db import models
+from core.cache import get_versions, bump_versions
+
+FACETS_CACHE_TIMEOUT = 60 * 10
+
+# (lower bound, upper bound) on the effective price; None means unbounded
+PRICE_BANDS = (
+    (0, 25),
+    (25, 50),
+    (50, 100),
+    (100, 250),
+    (250, 500),
+    (500, None),
+)
+
+# Query parameters that page or sort the list but do not change the result set
+NON_FILTER_PARAMS = {'cursor', 'page_size', 'ordering', 'facets'}
+
+CATALOG_VERSION_KEY = "facets:version:catalog"
+
+
+def store_version_key(store_id):
+    return f"facets:version:store:{store_id}"
+
+
+def category_version_key(category_id):
+    return f"facets:version:category:{category_id}"
+
+
+def facet_signature(query_params, audience):
+    """
+    Normalize the list filters into a stable string: parameter order, repeated
+    values and paging/sorting parameters do not produce different entries.
+    """
+    parts = [f"audience={audience}"]
+    for key in sorted(query_params.keys()):
+        if key in NON_FILTER_PARAMS:
+            continue
+        values = sorted(value for value in query_params.getlist(key) if value != '')
+        if values:
+            parts.append(f"{key}={','.join(values)}")
+    return '&'.join(parts)
+
+
+def bump_facet_versions(store_ids=(), category_ids=()):
+    """
+    Invalidate cached facets touching the given stores and categories.
+
+    Entries filtered by store or category carry only those scopes' versions,
+    so they survive changes elsewhere in the catalog. Unfiltered entries
+    span every store and carry the catalog-wide version, which any change
+    moves as well.
+    """
+    keys = [CATALOG_VERSION_KEY]
+    keys += [store_version_key(store_id) for store_id in set(store_ids) if store_id]
+    keys += [category_version_key(category_id) for category_id in set(category_ids) if category_id]
+    bump_versions(keys)
+
+
+def facet_version_keys(query_params):
+    # The result set of a store or category filter only changes with that scope
+    version_keys = [store_version_key(store_id) for store_id in query_params.getlist('store') if store_id]
+    version_keys += [
+        category_version_key(category_id) for category_id in query_params.getlist('category') if category_id
+    ]
+    return version_keys or [CATALOG_VERSION_KEY]
+
+
+def facet_cache_key(signature, query_params):
+    versions = ':'.join(str(version) for version in get_versions(facet_version_keys(query_params)))
+    digest = hashlib.md5(f"{signature}|{versions}".encode()).hexdigest()
+    return f"facets:{digest}"
+
+
+def price_band_expression():
+    whens = []
+    for index, (low, high) in enumerate(PRICE_BANDS):
+        condition = models.Q(effective_price__gte=low)
+        if high is not None:
+            condition &= models.Q(effective_price__lt=high)
+        whens.append(models.When(condition, then=models.Value(index)))
+    return models.Case(*whens, default=models.Value(None), output_field=models.IntegerField())
+
+
+def compute_facets(queryset):
+    """
+    Count the filtered products per category, per store and per price band.
+
+    A single GROUP BY over (category, store, band) returns every combination
+    present in the result set; the per-facet totals are then rolled up here.
+    """
+    rows = queryset.order_by().annotate(
+        price_band=price_band_expression()
+    ).values(
+        'category_id', 'category__name', 'store_id', 'store__name', 'price_band'
+    ).annotate(count=models.Count('id'))
+
+    categories, stores, bands = {}, {}, {}
+    for row in rows:
+        if row['category_id'] is not None:
+            entry = categories.setdefault(
+                row['category_id'], {'id': row['category_id'], 'name': row['category__name'], 'count': 0}
+            )
+            entry['count'] += row['count']
+        entry = stores.setdefault(row['store_id'], {'id': row['store_id'], 'name': row['store__name'], 'count': 0})
+        entry['count'] += row['count']
+        if row['price_band'] is not None:
+            bands[row['price_band']] = bands.get(row['price_band'], 0) + row['count']
+
+    return {
+        'categories': sorted(categories.values(), key=lambda entry: -entry['count']),
+        'stores': sorted(stores.values(), key=lambda entry: -entry['count']),
+        'price_bands': [
+            {'min': low, 'max': high, 'count': bands.get(index, 0)}
+            for index, (low, high) in enumerate(PRICE_BANDS)
+        ],
+    }
+
+
+def get_facets(queryset, query_params, audience):
+    signature = facet_signature(query_params, audience)
+    key = facet_cache_key(signature, query_params)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset)
+        cache.set(key, facets, timeout=FACETS_CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,25 @@
+import django_filters
+from .models.category import Category
+from .models.product import Product
+
+
+class ProductFilter(django_filters.FilterSet):
+    # Filter on the materialized price so the range is an indexed SQL predicate
+    min_price = django_filters.NumberFilter(field_name='effective_price', lookup_expr='gte')
+    max_price = django_filters.NumberFilter(field_name='effective_price', lookup_expr='lte')
+    category_tree = django_filters.NumberFilter(
+        method='filter_category_tree',
+        help_text="Products in this category or any of its descendants",
+    )
+
+    class Meta:
+        model = Product
+        fields = ['store', 'category']
+
+    def filter_category_tree(self, queryset, name, value):
+        # Resolve the root first so the subtree match is a constant prefix
+        # (`path LIKE '/1/4/%'`) that the path index can serve.
+        root_path = Category.objects.filter(pk=value).values_list('path', flat=True).first()
+        if root_path is None:
+            return queryset.none()
+        return queryset.filter(category__path__startswith=root_path)
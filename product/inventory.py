@@ -0,0 +1,205 @@
+import uuid
+from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import Case, F, PositiveIntegerField, Sum, When
+from django.utils import timezone
+
+# How long a checkout keeps its units before they go back on sale
+HOLD_TTL = timedelta(minutes=15)
+# Most units of one product a single user may hold across their active checkouts
+MAX_HELD_UNITS = 10
+
+
+class InsufficientStock(Exception):
+    """Raised when one or more lines could not be reserved; carries {product_id: requested}."""
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        super().__init__(f"Not enough stock for products {sorted(shortages)}")
+
+
+class HoldLimitExceeded(Exception):
+    """Raised when holds would take a user past MAX_HELD_UNITS of a product; carries {product_id: requested}."""
+
+    def __init__(self, excess):
+        self.excess = excess
+        super().__init__(f"Hold limit exceeded for products {sorted(excess)}")
+
+
+def lock_products(product_ids):
+    """
+    SELECT ... FOR UPDATE the given products in id order and return {id: stock_quantity}.
+
+    Everything that takes stock or places holds locks through here first, so
+    concurrent checkouts sharing products queue instead of deadlocking, and
+    each sees the holds committed by the one before it.
+    """
+    from product.models import Product
+    return dict(
+        Product.objects.select_for_update()
+        .filter(pk__in=product_ids)
+        .order_by('pk')
+        .values_list('pk', 'stock_quantity')
+    )
+
+
+def held_quantities(product_ids, exclude_checkout=None, now=None, user=None):
+    """{product_id: units under unexpired holds}, optionally only `user`'s, in one aggregate."""
+    from product.models import InventoryHold
+    holds = InventoryHold.objects.filter(product_id__in=product_ids, expires_at__gt=now or timezone.now())
+    if user is not None:
+        holds = holds.filter(user=user)
+    if exclude_checkout:
+        holds = holds.exclude(checkout=exclude_checkout)
+    return dict(holds.values('product_id').annotate(held=Sum('quantity')).values_list('product_id', 'held'))
+
+
+def available_to_sell(product_ids):
+    """{product_id: stock_quantity minus active holds} for the given products, in two queries."""
+    from product.models import Product
+    held = held_quantities(product_ids)
+    stock = Product.objects.filter(pk__in=product_ids).values_list('pk', 'stock_quantity')
+    return {pk: max(0, quantity - held.get(pk, 0)) for pk, quantity in stock}
+
+
+@transaction.atomic
+def place_holds(user, quantities, ttl=HOLD_TTL):
+    """
+    Set `quantities` ({product_id: quantity}) aside for `user` until now + ttl.
+
+    Returns (checkout, expires_at). Raises HoldLimitExceeded naming every
+    line that would take the user past MAX_HELD_UNITS of a product, else
+    InsufficientStock naming every line that exceeds what is available to
+    sell; nothing is held then.
+    """
+    from product.models import InventoryHold
+
+    now = timezone.now()
+    stock = lock_products(quantities)
+    # Under the product locks, so concurrent requests by one user cannot both slip under the limit
+    mine = held_quantities(quantities, now=now, user=user)
+    excess = {
+        pk: quantity for pk, quantity in quantities.items()
+        if mine.get(pk, 0) + quantity > MAX_HELD_UNITS
+    }
+    if excess:
+        raise HoldLimitExceeded(excess)
+
+    held = held_quantities(quantities, now=now)
+    shortages = {
+        pk: quantity for pk, quantity in quantities.items()
+        if stock.get(pk, 0) - held.get(pk, 0) < quantity
+    }
+    if shortages:
+        raise InsufficientStock(shortages)
+
+    checkout, expires_at = uuid.uuid4(), now + ttl
+    InventoryHold.objects.bulk_create([
+        InventoryHold(product_id=pk, user=user, checkout=checkout, quantity=quantity, expires_at=expires_at)
+        for pk, quantity in quantities.items()
+    ])
+    return checkout, expires_at
+
+
+def active_holds(checkout, user):
+    """{product_id: quantity} still held by `user` under `checkout`."""
+    from product.models import InventoryHold
+    return dict(
+        InventoryHold.objects.filter(checkout=checkout, user=user, expires_at__gt=timezone.now())
+        .values_list('product_id', 'quantity')
+    )
+
+
+def release_holds(checkout):
+    from product.models import InventoryHold
+    return InventoryHold.objects.filter(checkout=checkout).delete()[0]
+
+
+def release_expired_holds(batch_size=5000):
+    """Delete expired holds in batches of `batch_size` ids; returns the number released."""
+    from product.models import InventoryHold
+
+    now = timezone.now()
+    released = 0
+    while True:
+        ids = list(
+            InventoryHold.objects.filter(expires_at__lte=now)
+            .order_by('expires_at').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return released
+        released += InventoryHold.objects.filter(pk__in=ids).delete()[0]
+
+
+@transaction.atomic
+def reserve_stock(quantities, checkout=None):
+    """
+    Atomically take `quantities` ({product_id: quantity}) out of Product.stock_quantity.
+
+    The rows are locked in id order first, then a single conditional UPDATE
+    decrements only the rows where stock minus other checkouts' active holds
+    still covers the quantity. Units held by `checkout` itself count as
+    available, which is how a hold is converted into a sale.
+
+    Raises InsufficientStock naming every line that was short, after rolling
+    back the lines that did fit.
+    """
+    from product.models import InventoryHold, Product
+
+    if not quantities:
+        return
+    product_ids = sorted(quantities)
+    lock_products(product_ids)
+
+    table = connection.ops.quote_name(Product._meta.db_table)
+    holds = connection.ops.quote_name(InventoryHold._meta.db_table)
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH requested (id, quantity) AS (
+                SELECT * FROM unnest(%s::bigint[], %s::integer[])
+            ), held AS (
+                SELECT h.product_id, SUM(h.quantity) AS quantity FROM {holds} h
+                WHERE h.product_id IN (SELECT id FROM requested)
+                  AND h.expires_at > %s
+                  AND h.checkout IS DISTINCT FROM %s::uuid
+                GROUP BY h.product_id
+            )
+            UPDATE {table} AS p
+            SET stock_quantity = p.stock_quantity - r.quantity, update_at = %s
+            FROM requested r LEFT JOIN held ON held.product_id = r.id
+            WHERE p.id = r.id
+              AND p.stock_quantity - COALESCE(held.quantity, 0) >= r.quantity
+            RETURNING p.id
+            """,
+            [product_ids, [quantities[pk] for pk in product_ids], now, checkout, now],
+        )
+        reserved = {row[0] for row in cursor.fetchall()}
+
+    shortages = {pk: quantities[pk] for pk in product_ids if pk not in reserved}
+    if shortages:
+        raise InsufficientStock(shortages)
+
+
+@transaction.atomic
+def restore_stock(quantities):
+    """
+    Put `quantities` ({product_id: quantity}) back into Product.stock_quantity.
+
+    Locks in the same id order as reserve_stock, then adds every line with a
+    single CASE UPDATE. Returns the number of product rows updated.
+    """
+    from product.models import Product
+
+    if not quantities:
+        return 0
+    lock_products(quantities)
+    return Product.objects.filter(pk__in=quantities).update(
+        stock_quantity=Case(
+            *[When(pk=pk, then=F('stock_quantity') + quantity) for pk, quantity in quantities.items()],
+            default=F('stock_quantity'),
+            output_field=PositiveIntegerField(),
+        ),
+        update_at=timezone.now(),
+    )
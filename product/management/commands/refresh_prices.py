@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from discount.models import ProductDiscount
+from product.models import Product
+from product.pricing import discounted_product_ids, refresh_effective_prices
+from product.response_cache import invalidate_public_products
+
+BOUNDARY_CACHE_KEY = "pricing:last_boundary_sync"
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialized effective price of products."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--boundaries',
+            action='store_true',
+            help="Only refresh products whose discounts started or ended since the last run (run from cron).",
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help="Number of chunks recomputed in parallel, each on its own database connection.",
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        if options['boundaries']:
+            product_ids = self.boundary_product_ids(now)
+        else:
+            product_ids = Product.objects.order_by('pk').values_list('pk', flat=True)
+        product_ids = sorted(product_ids)
+
+        chunk_size = options['chunk_size']
+        chunks = [product_ids[i:i + chunk_size] for i in range(0, len(product_ids), chunk_size)]
+
+        if options['workers'] > 1:
+            with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                updated = sum(executor.map(self.refresh_chunk, chunks))
+        else:
+            updated = sum(refresh_effective_prices(chunk, chunk_size) for chunk in chunks)
+
+        if options['boundaries']:
+            cache.set(BOUNDARY_CACHE_KEY, now, timeout=None)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {len(product_ids)} products in {len(chunks)} chunks, {updated} prices changed."
+        ))
+
+    def boundary_product_ids(self, now):
+        last_run = cache.get(BOUNDARY_CACHE_KEY) or now - timedelta(days=1)
+        # A discount applies while start_date <= now <= end_date
+        crossed = ProductDiscount.objects.filter(
+            Q(start_date__gt=last_run, start_date__lte=now) |
+            Q(end_date__gte=last_run, end_date__lt=now)
+        )
+        if crossed.exists():
+            # Cached pages still show the old discount_info even if no price moved
+            invalidate_public_products(pricing=True)
+        return discounted_product_ids(crossed)
+
+    def refresh_chunk(self, product_ids):
+        try:
+            return refresh_effective_prices(product_ids, chunk_size=len(product_ids))
+        finally:
+            connection.close()
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from product.inventory import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Delete expired inventory holds so their rows stop weighing on the hold index (run from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        released = release_expired_holds(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Released {released} expired holds."))
@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-18 20:21
+
+from django.db import migrations, models
+
+
+def backfill_effective_price(apps, schema_editor):
+    # Undiscounted starting point; `manage.py refresh_prices` applies live discounts
+    Product = apps.get_model('product', 'Product')
+    Product.objects.update(effective_price=models.F('price'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0003_product_approved_at_product_rejection_reason'),
+        ('store', '0002_store_banner_store_logo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['effective_price'], name='product_pro_effecti_a9539e_idx'),
+        ),
+        migrations.RunPython(backfill_effective_price, migrations.RunPython.noop),
+    ]
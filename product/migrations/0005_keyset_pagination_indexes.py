@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 20:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0004_product_effective_price'),
+        ('store', '0002_store_banner_store_logo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-created_at', 'id'], name='product_pro_created_2194cd_idx'),
+        ),
+    ]
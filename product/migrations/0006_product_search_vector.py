@@ -0,0 +1,72 @@
+# Generated by Django 6.0 on 2026-10-18 20:26
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import DatabaseError, migrations, transaction
+
+
+SEARCH_VECTOR_TRIGGER = """
+CREATE OR REPLACE FUNCTION product_product_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER product_product_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description ON product_product
+    FOR EACH ROW EXECUTE FUNCTION product_product_search_vector_update();
+
+UPDATE product_product SET name = name;
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER = """
+DROP TRIGGER IF EXISTS product_product_search_vector_trigger ON product_product;
+DROP FUNCTION IF EXISTS product_product_search_vector_update();
+"""
+
+
+def enable_trigram_search(apps, schema_editor):
+    # pg_trgm powers the typo-tolerant fallback. It is optional: hosts that
+    # do not ship it or refuse CREATE EXTENSION fall back to substring search.
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS product_product_name_trgm "
+                    "ON product_product USING gin (name gin_trgm_ops)"
+                )
+        except DatabaseError:
+            pass
+
+
+def disable_trigram_search(apps, schema_editor):
+    schema_editor.execute("DROP INDEX IF EXISTS product_product_name_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0005_keyset_pagination_indexes'),
+        ('store', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_pro_search__e78047_gin'),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_TRIGGER, DROP_SEARCH_VECTOR_TRIGGER),
+        migrations.RunPython(enable_trigram_search, disable_trigram_search),
+    ]
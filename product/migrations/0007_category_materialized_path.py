@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-18 20:32
+
+from django.db import migrations, models
+
+
+def backfill_category_paths(apps, schema_editor):
+    Category = apps.get_model('product', 'Category')
+    level = list(Category.objects.filter(parent__isnull=True))
+    paths = {}
+    depth = 0
+    while level:
+        for category in level:
+            parent_path = paths[category.parent_id] if category.parent_id else "/"
+            category.path = paths[category.pk] = f"{parent_path}{category.pk}/"
+            category.depth = depth
+        Category.objects.bulk_update(level, ['path', 'depth'])
+        level = list(Category.objects.filter(parent_id__in=[category.pk for category in level]))
+        depth += 1
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0006_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['path'], name='product_category_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(backfill_category_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 20:44
+
+from django.db import migrations, models
+
+
+def backfill_public_visibility(apps, schema_editor):
+    Product = apps.get_model('product', 'Product')
+    Store = apps.get_model('store', 'Store')
+    public_store = Store.objects.filter(
+        pk=models.OuterRef('store_id'), is_active=True, is_approved=True, is_suspended=False
+    )
+    Product.objects.filter(is_approved=True).filter(models.Exists(public_store))\
+        .update(is_publicly_visible=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0007_category_materialized_path'),
+        ('store', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='is_publicly_visible',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_publicly_visible', True)), fields=['-created_at', 'id'], name='product_public_created_idx'),
+        ),
+        migrations.RunPython(backfill_public_visibility, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 23:40
+
+from django.db import migrations, models
+
+
+def backfill_missing_effective_price(apps, schema_editor):
+    # Rows written in bulk before the column was guarded; `manage.py refresh_prices` applies live discounts
+    Product = apps.get_model('product', 'Product')
+    Product.objects.filter(effective_price__isnull=True).update(effective_price=models.F('price'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0009_inventory_hold'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_missing_effective_price, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=10),
+        ),
+    ]
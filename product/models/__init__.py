@@ -1,3 +1,4 @@
 from .product import Product
 from .category import Category
 from .image import ProductImage
+from .inventory_hold import InventoryHold
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Concat, Substr
 from django.utils.text import slugify
 
 
@@ -29,16 +30,72 @@ class Category(models.Model):
         on_delete=models.CASCADE
     )
     
+    """
+    path is the materialized chain of ids from the root, maintained on save:
+    Electronics.path = "/1/"
+    Mobiles.path = "/1/4/"
+    Android.path = "/1/4/9/"
+
+    Category.objects.filter(path__startswith=electronics.path)  # whole subtree
+    """
+    path = models.CharField(max_length=255, blank=True, editable=False)
+    depth = models.PositiveIntegerField(default=0, editable=False)
+
     description = models.TextField(blank=True)
     icon = models.CharField(max_length=50, blank=True) # for fontawesome etc
     image = models.ImageField(upload_to="category/images", blank=True, null=True)
 
     is_active = models.BooleanField(default=True)
     
+    class Meta:
+        indexes = [
+            # varchar_pattern_ops lets `path LIKE '/1/4/%'` use the index
+            models.Index(fields=["path"], name="product_category_path_idx", opclasses=["varchar_pattern_ops"]),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
-        
+
+        with transaction.atomic():
+            # Read the stored position rather than trusting this instance: an
+            # ancestor may have been moved since it was loaded.
+            current = None
+            if self.pk:
+                current = Category.objects.filter(pk=self.pk).values_list('path', 'depth').first()
+
+            parent_path = "/"
+            if self.parent_id:
+                parent_path = Category.objects.filter(pk=self.parent_id).values_list('path', flat=True).get()
+                if current and current[0] and parent_path.startswith(current[0]):
+                    raise ValueError("A category cannot be moved under itself or one of its descendants.")
+
+            super().save(*args, **kwargs)
+
+            path = f"{parent_path}{self.pk}/"
+            depth = path.count("/") - 2
+            if current and current[0] and current[0] != path:
+                # Re-parenting: rewrite the prefix of the whole subtree in one UPDATE
+                old_path, old_depth = current
+                Category.objects.filter(path__startswith=old_path).update(
+                    path=Concat(models.Value(path), Substr('path', len(old_path) + 1)),
+                    depth=models.F('depth') + (depth - old_depth),
+                )
+            elif not current or current[0] != path:
+                Category.objects.filter(pk=self.pk).update(path=path, depth=depth)
+            self.path, self.depth = path, depth
+
+    def get_descendants(self, include_self=False):
+        descendants = Category.objects.filter(path__startswith=self.path)
+        if not include_self:
+            descendants = descendants.exclude(pk=self.pk)
+        return descendants.order_by('path')
+
+    def get_ancestors(self, include_self=False):
+        ids = [int(pk) for pk in self.path.strip("/").split("/") if pk]
+        if not include_self:
+            ids = ids[:-1]
+        return Category.objects.filter(pk__in=ids).order_by('depth')
+
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.db import models
+
+
+class InventoryHold(models.Model):
+    """
+    Units of a product set aside for one checkout until `expires_at`.
+
+    Holds do not touch Product.stock_quantity; available-to-sell is the
+    stock minus the quantity of unexpired holds, read from the
+    (product, expires_at) index below. Expired rows are ignored by every
+    reader and deleted by `manage.py release_expired_holds`.
+    """
+    product = models.ForeignKey('product.Product', on_delete=models.CASCADE, related_name='holds')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='inventory_holds')
+    # Groups the holds placed by one checkout; converted or released together
+    checkout = models.UUIDField(db_index=True)
+    quantity = models.PositiveIntegerField()
+
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Covers SUM(quantity) per product over active holds with an index-only scan
+            models.Index(fields=['product', 'expires_at'], include=['quantity'], name='product_hold_active_idx'),
+            models.Index(fields=['expires_at'], name='product_hold_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} held until {self.expires_at}"
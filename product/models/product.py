@@ -1,5 +1,44 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.text import slugify
+from product.visibility import is_store_public
+
+
+class ProductQuerySet(models.QuerySet):
+    """
+    Bulk writes skip Product.save(), so the ones that touch the price or the
+    category refresh effective_price themselves through
+    product.pricing.refresh_effective_prices. Raw SQL writers must call it too.
+    """
+    PRICING_FIELDS = {'price', 'category', 'category_id'}
+
+    def update(self, **kwargs):
+        if self.PRICING_FIELDS.isdisjoint(kwargs) or 'effective_price' in kwargs:
+            return super().update(**kwargs)
+        from product.pricing import refresh_effective_prices
+        product_ids = list(self.values_list('pk', flat=True))
+        updated = super().update(**kwargs)
+        refresh_effective_prices(product_ids)
+        return updated
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from product.pricing import refresh_effective_prices
+        objs = list(objs)
+        for obj in objs:
+            if obj.effective_price is None:
+                obj.effective_price = obj.price
+        objs = super().bulk_create(objs, *args, **kwargs)
+        refresh_effective_prices([obj.pk for obj in objs if obj.pk is not None])
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        updated = super().bulk_update(objs, fields, *args, **kwargs)
+        if not self.PRICING_FIELDS.isdisjoint(fields) and 'effective_price' not in fields:
+            from product.pricing import refresh_effective_prices
+            refresh_effective_prices([obj.pk for obj in objs])
+        return updated
 
 
 class Product(models.Model):
@@ -19,15 +58,35 @@ class Product(models.Model):
         blank=True
     )
 
+    # Price after the winning automatic discount, kept in sync by product.pricing
+    # so the catalog can be sorted and range-filtered in SQL. Never NULL: it
+    # starts out as the list price when nothing else has computed it.
+    effective_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        editable=False
+    )
+
     stock_quantity = models.PositiveIntegerField(default = 0)
     
     is_active = models.BooleanField(default=True)
     is_approved = models.BooleanField(default=False)
     approved_at = models.DateTimeField(null=True, blank=True)
     rejection_reason = models.TextField(blank=True)
+
+    # is_approved and the store is active, approved and not suspended.
+    # Denormalized so catalog reads need no join to store; kept in sync on
+    # save here and in bulk by product.visibility when a store is moderated.
+    is_publicly_visible = models.BooleanField(default=False, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
     update_at = models.DateTimeField(auto_now=True)
+
+    # Weighted tsvector over name (A) and description (B), maintained by a
+    # database trigger (see migration 0006) so bulk writes stay in sync too.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ProductQuerySet.as_manager()
     
     class Meta:
         # Inside the SAME store, two products cannot have the same slug But different stores CAN use the same slug
@@ -37,6 +96,16 @@ class Product(models.Model):
                 name = "unique_product_slug_per_store"
             )
         ]
+        indexes = [
+            models.Index(fields=["effective_price"]),
+            models.Index(fields=["-created_at", "id"]),
+            GinIndex(fields=["search_vector"]),
+            models.Index(
+                fields=["-created_at", "id"],
+                condition=models.Q(is_publicly_visible=True),
+                name="product_public_created_idx",
+            ),
+        ]
         ordering = ["-created_at"]
 
     def get_active_discount(self):
@@ -44,13 +113,14 @@ class Product(models.Model):
         from django.utils import timezone
         now = timezone.now()
         
-        # Check direct product discounts
-        discount = self.discounts.filter(
-            is_active=True, start_date__lte=now, end_date__gte=now
-        ).order_by('-priority', '-start_date').first()
-        
-        if discount:
-            return discount
+        # Check direct product discounts (an unsaved product cannot have any yet)
+        if self.pk:
+            discount = self.discounts.filter(
+                is_active=True, start_date__lte=now, end_date__gte=now
+            ).order_by('-priority', '-start_date').first()
+            
+            if discount:
+                return discount
             
         # Check category discounts
         if self.category:
@@ -62,22 +132,15 @@ class Product(models.Model):
         return None
 
     def get_discounted_price(self):
-        from decimal import Decimal
-        discount = self.get_active_discount()
-        price = Decimal(str(self.price))
-        if not discount:
-            return price
-            
-        discount_value = Decimal(str(discount.value))
-        if discount.discount_type == 'percentage':
-            return price * (Decimal('1') - discount_value / Decimal('100'))
-        return max(Decimal('0'), price - discount_value)
-        
+        from product.pricing import calculate_discounted_price
+        return calculate_discounted_price(self.price, self.get_active_discount())
         
     def save(self, *args, **kwargs):
         if not self.slug:
             base_slug = slugify(self.name)
             self.slug = base_slug
+        self.effective_price = self.get_discounted_price()
+        self.is_publicly_visible = self.is_approved and is_store_public(self.store)
         super().save(*args, **kwargs)
 
     def __str__(self):
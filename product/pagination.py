@@ -0,0 +1,15 @@
+from core.pagination import KeysetPagination
+
+
+class ProductPagination(KeysetPagination):
+    max_page_size = 100
+
+
+class ProductSearchPagination(ProductPagination):
+    ordering = ('-rank', 'id')
+
+
+class CategoryPagination(KeysetPagination):
+    # Categories have no timestamps; the primary key is their natural order
+    ordering = ('id',)
+    max_page_size = 200
@@ -0,0 +1,118 @@
+from decimal import Decimal
+from django.utils import timezone
+
+PRICE_QUANTUM = Decimal('0.01')
+
+
+def calculate_discounted_price(price, discount):
+    price = Decimal(str(price))
+    if not discount:
+        return price
+
+    discount_value = Decimal(str(discount.value))
+    if discount.discount_type == 'percentage':
+        return price * (Decimal('1') - discount_value / Decimal('100'))
+    return max(Decimal('0'), price - discount_value)
+
+
+def resolve_product_prices(products, now=None):
+    """
+    Resolve the winning discount and the discounted price for a batch of products.
+
+    Follows the same rules as Product.get_active_discount (direct product discounts
+    win over category discounts, then highest priority and latest start date) but
+    costs at most two queries whatever the size of the batch.
+
+    Returns a dict of {product_id: (discount or None, price)}.
+    """
+    from discount.models import ProductDiscount
+
+    products = [product for product in products if product.pk is not None]
+    if not products:
+        return {}
+
+    now = now or timezone.now()
+    active = {
+        'productdiscount__is_active': True,
+        'productdiscount__start_date__lte': now,
+        'productdiscount__end_date__gte': now,
+    }
+    ordering = ('-productdiscount__priority', '-productdiscount__start_date')
+
+    winners = {}
+    direct_links = ProductDiscount.products.through.objects.filter(
+        product_id__in=[product.pk for product in products], **active
+    ).select_related('productdiscount').order_by(*ordering)
+    for link in direct_links:
+        winners.setdefault(link.product_id, link.productdiscount)
+
+    category_ids = {
+        product.category_id for product in products
+        if product.pk not in winners and product.category_id
+    }
+    category_winners = {}
+    if category_ids:
+        category_links = ProductDiscount.categories.through.objects.filter(
+            category_id__in=category_ids, **active
+        ).select_related('productdiscount').order_by(*ordering)
+        for link in category_links:
+            category_winners.setdefault(link.category_id, link.productdiscount)
+
+    pricing = {}
+    for product in products:
+        discount = winners.get(product.pk) or category_winners.get(product.category_id)
+        pricing[product.pk] = (discount, calculate_discounted_price(product.price, discount))
+    return pricing
+
+
+def discounted_product_ids(discounts):
+    """
+    Ids of every product a set of discounts can apply to, either directly
+    or through the product's category.
+    """
+    from product.models import Product
+
+    direct = Product.objects.filter(discounts__in=discounts).values_list('pk', flat=True)
+    by_category = Product.objects.filter(category__discounts__in=discounts).values_list('pk', flat=True)
+    return set(direct) | set(by_category)
+
+
+def refresh_effective_prices(product_ids, chunk_size=500):
+    """
+    Recompute the materialized Product.effective_price for the given products.
+
+    Works in chunks of `chunk_size`: one read, the bulk discount resolution
+    and one bulk update per chunk, writing only the rows whose price moved.
+    Returns the number of products updated.
+    """
+    from product.facets import bump_facet_versions
+    from product.models import Product
+    from product.response_cache import invalidate_public_products
+
+    product_ids = sorted(set(product_ids))
+    updated = 0
+    for start in range(0, len(product_ids), chunk_size):
+        products = list(
+            Product.objects.filter(pk__in=product_ids[start:start + chunk_size])
+            .only('id', 'price', 'store_id', 'category_id', 'effective_price')
+        )
+        pricing = resolve_product_prices(products)
+
+        changed = []
+        for product in products:
+            _, price = pricing[product.pk]
+            price = price.quantize(PRICE_QUANTUM)
+            if product.effective_price != price:
+                product.effective_price = price
+                changed.append(product)
+
+        Product.objects.bulk_update(changed, ['effective_price'])
+        updated += len(changed)
+        if changed:
+            # Price bands moved without going through Product.save()
+            bump_facet_versions(
+                [product.store_id for product in changed],
+                [product.category_id for product in changed],
+            )
+            invalidate_public_products(product_ids=[product.pk for product in changed])
+    return updated
@@ -0,0 +1,83 @@
+import hashlib
+from urllib.parse import urlencode
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.response import Response
+from core.cache import get_version, get_versions, bump_versions
+
+PUBLIC_RESPONSE_TIMEOUT = 60 * 5
+
+# Any visible change can reorder or reshape list pages, so lists share one counter
+LIST_VERSION_KEY = "products:public:list:version"
+# Discount changes alter current_price/discount_info on lists and details alike
+PRICING_VERSION_KEY = "products:public:pricing:version"
+PRICING_CHANGED_AT_KEY = "products:public:pricing:changed_at"
+
+
+def product_version_key(product_id):
+    return f"products:public:product:{product_id}:version"
+
+
+def store_version_key(store_id):
+    return f"products:public:store:{store_id}:version"
+
+
+def invalidate_public_products(product_ids=(), store_ids=(), pricing=False):
+    keys = [LIST_VERSION_KEY]
+    keys += [product_version_key(product_id) for product_id in set(product_ids) if product_id]
+    keys += [store_version_key(store_id) for store_id in set(store_ids) if store_id]
+    if pricing:
+        keys.append(PRICING_VERSION_KEY)
+        # Discounts change current_price without touching Product.update_at
+        cache.set(PRICING_CHANGED_AT_KEY, timezone.now(), timeout=None)
+    bump_versions(keys)
+
+
+def get_pricing_changed_at():
+    return cache.get(PRICING_CHANGED_AT_KEY)
+
+
+def list_cache_key(request):
+    # Sorted parameters so ?a=1&b=2 and ?b=2&a=1 share an entry; the host is
+    # part of the key because pagination links are absolute URLs.
+    params = urlencode(sorted(
+        (key, value) for key, values in request.query_params.lists() for value in values
+    ))
+    digest = hashlib.md5(f"{request.get_host()}{request.path}?{params}".encode()).hexdigest()
+    list_version, pricing_version = get_versions([LIST_VERSION_KEY, PRICING_VERSION_KEY])
+    return f"products:public:list:{list_version}:{pricing_version}:{digest}"
+
+
+def cached_list_response(request, build_response):
+    key = list_cache_key(request)
+    data = cache.get(key)
+    if data is not None:
+        return Response(data)
+
+    response = build_response()
+    if response.status_code == 200:
+        cache.set(key, response.data, timeout=PUBLIC_RESPONSE_TIMEOUT)
+    return response
+
+
+def cached_detail_response(product_id, build_response):
+    """
+    Detail entries are keyed by the product's own version and remember the
+    version of its store when written, so store moderation only has to bump
+    one counter to invalidate every product the store lists.
+    """
+    product_version, pricing_version = get_versions([product_version_key(product_id), PRICING_VERSION_KEY])
+    key = f"products:public:detail:{product_id}:{product_version}:{pricing_version}"
+    entry = cache.get(key)
+    if entry is not None and entry['store_version'] == get_version(store_version_key(entry['store_id'])):
+        return Response(entry['data'])
+
+    response = build_response()
+    if response.status_code == 200:
+        store_id = response.data['store']
+        cache.set(key, {
+            'store_id': store_id,
+            'store_version': get_version(store_version_key(store_id)),
+            'data': response.data,
+        }, timeout=PUBLIC_RESPONSE_TIMEOUT)
+    return response
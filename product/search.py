@@ -0,0 +1,46 @@
+from functools import cache
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection, models
+
+SEARCH_CONFIG = 'english'
+
+
+@cache
+def has_trigram_support():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def search_products(queryset, query):
+    """
+    Rank `queryset` against a free-text query, annotating each match with `rank`.
+
+    Uses the weighted `search_vector` (name over description) first. When that
+    finds nothing, typos are caught with pg_trgm similarity on the name.
+    Without pg_trgm, or off Postgres, a plain substring match is used instead.
+    """
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+        matches = queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(models.F('search_vector'), search_query)
+        )
+        if matches.exists():
+            return matches
+
+        if has_trigram_support():
+            return queryset.filter(name__trigram_similar=query).annotate(
+                rank=TrigramSimilarity('name', query)
+            )
+
+    return queryset.filter(
+        models.Q(name__icontains=query) | models.Q(description__icontains=query)
+    ).annotate(
+        rank=models.Case(
+            models.When(name__icontains=query, then=models.Value(1.0)),
+            default=models.Value(0.5),
+            output_field=models.FloatField(),
+        )
+    )
@@ -1,11 +1,30 @@
+from django.db import models
 from rest_framework import serializers
 from .models.product import Product
 from .models.category import Category
+from .pricing import resolve_product_prices
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug', 'description', 'parent', 'icon', 'image']
+        fields = ['id', 'name', 'slug', 'description', 'parent', 'depth', 'icon', 'image']
+        read_only_fields = ['depth']
+
+    def validate_parent(self, parent):
+        if parent and self.instance and parent.path.startswith(self.instance.path):
+            raise serializers.ValidationError("A category cannot be moved under itself or one of its descendants.")
+        return parent
+
+class ProductListSerializer(serializers.ListSerializer):
+    """
+    Resolves discounts for the whole page up front so each product row
+    reads its price from the serializer context instead of querying.
+    """
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        products = list(iterable)
+        self.context['pricing'] = resolve_product_prices(products)
+        return super().to_representation(products)
 
 class ProductSerializer(serializers.ModelSerializer):
     store_name = serializers.ReadOnlyField(source='store.name')
@@ -24,12 +43,20 @@ class ProductSerializer(serializers.ModelSerializer):
             'rejection_reason', 'created_at', 'update_at'
         ]
         read_only_fields = ['slug', 'is_approved', 'approved_at', 'rejection_reason', 'store']
+        list_serializer_class = ProductListSerializer
+
+    def get_pricing(self, obj):
+        pricing = self.context.setdefault('pricing', {})
+        if obj.pk not in pricing:
+            pricing.update(resolve_product_prices([obj]))
+        return pricing[obj.pk]
 
     def get_current_price(self, obj):
-        return obj.get_discounted_price()
+        _, price = self.get_pricing(obj)
+        return price
 
     def get_discount_info(self, obj):
-        discount = obj.get_active_discount()
+        discount, _ = self.get_pricing(obj)
         if discount:
             return {
                 "name": discount.name,
@@ -0,0 +1,64 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from store.models import Store
+from .category_tree import invalidate_category_tree
+from .facets import bump_facet_versions
+from .pricing import refresh_effective_prices
+from .response_cache import invalidate_public_products
+from .visibility import refresh_store_visibility
+from .models import Product, Category
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_scope(sender, instance, **kwargs):
+    # A product moved to another store or category changes the old scope's counts too
+    instance._previous_scope = None
+    if instance.pk:
+        instance._previous_scope = Product.objects.filter(pk=instance.pk).values_list(
+            'store_id', 'category_id'
+        ).first()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_facets_on_product_change(sender, instance, **kwargs):
+    store_ids, category_ids = [instance.store_id], [instance.category_id]
+    previous = getattr(instance, '_previous_scope', None)
+    if previous:
+        store_ids.append(previous[0])
+        category_ids.append(previous[1])
+    bump_facet_versions(store_ids, category_ids)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_public_responses_on_product_change(sender, instance, **kwargs):
+    # Covers edits as well as the approve/reject actions, which save the product
+    invalidate_public_products(product_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Store)
+def invalidate_caches_on_store_change(sender, instance, created, **kwargs):
+    # Moderation flags decide whether the store's products are listed at all
+    if not created:
+        refresh_store_visibility(instance)
+        bump_facet_versions(store_ids=[instance.pk])
+        invalidate_public_products(store_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_tree_on_category_change(sender, instance, **kwargs):
+    invalidate_category_tree()
+
+
+@receiver(pre_delete, sender=Category)
+def collect_products_on_category_delete(sender, instance, **kwargs):
+    # SET_NULL runs as a plain UPDATE, so the products are gone from the category by post_delete
+    instance._uncategorized_product_ids = list(instance.products.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+def refresh_prices_on_category_delete(sender, instance, **kwargs):
+    # Category discounts no longer reach these products
+    refresh_effective_prices(getattr(instance, '_uncategorized_product_ids', ()))
@@ -13,7 +13,7 @@ class TestCategoryAPI:
         response = api_client.get(url)
         
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 2
+        assert len(response.data["results"]) == 2
 
     def test_create_category_as_admin(self, api_client):
         from django.contrib.auth import get_user_model
@@ -54,3 +54,108 @@ class TestCategoryAPI:
         response = api_client.delete(url)
         assert response.status_code == status.HTTP_204_NO_CONTENT
         assert not Category.objects.filter(pk=category.pk).exists()
+
+    def test_category_path_is_maintained_on_reparent(self):
+        electronics = Category.objects.create(name="Electronics", slug="electronics")
+        mobiles = Category.objects.create(name="Mobiles", slug="mobiles", parent=electronics)
+        android = Category.objects.create(name="Android", slug="android", parent=mobiles)
+        gadgets = Category.objects.create(name="Gadgets", slug="gadgets")
+
+        assert android.path == f"/{electronics.pk}/{mobiles.pk}/{android.pk}/"
+        assert android.depth == 2
+
+        mobiles.parent = gadgets
+        mobiles.save()
+
+        android.refresh_from_db()
+        assert android.path == f"/{gadgets.pk}/{mobiles.pk}/{android.pk}/"
+        assert list(gadgets.get_descendants()) == [mobiles, android]
+        assert list(android.get_ancestors()) == [gadgets, mobiles]
+        assert not electronics.get_descendants().exists()
+
+        with pytest.raises(ValueError):
+            gadgets.parent = android
+            gadgets.save()
+
+    def test_category_descendants_endpoint(self, api_client):
+        electronics = Category.objects.create(name="Electronics", slug="electronics")
+        mobiles = Category.objects.create(name="Mobiles", slug="mobiles", parent=electronics)
+        Category.objects.create(name="iPhone", slug="iphone", parent=mobiles)
+
+        url = reverse("product:category-descendants", kwargs={"pk": electronics.pk})
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert [c["name"] for c in response.data] == ["Mobiles", "iPhone"]
+
+        url = reverse("product:category-ancestors", kwargs={"pk": mobiles.pk})
+        response = api_client.get(url)
+        assert [c["name"] for c in response.data] == ["Electronics"]
+
+    def test_filter_products_by_category_subtree(self, api_client, db_user):
+        from account.models import SellerProfile
+        from store.models.store import Store
+        from product.models.product import Product
+        profile, _ = SellerProfile.objects.get_or_create(user=db_user)
+        store = Store.objects.create(seller=profile, name="Tree Store", is_approved=True)
+        electronics = Category.objects.create(name="Electronics", slug="electronics")
+        mobiles = Category.objects.create(name="Mobiles", slug="mobiles", parent=electronics)
+        android = Category.objects.create(name="Android", slug="android", parent=mobiles)
+        fashion = Category.objects.create(name="Fashion", slug="fashion")
+        for category in (electronics, mobiles, android, fashion):
+            Product.objects.create(store=store, category=category, name=f"{category.name} item", price=1, is_approved=True)
+
+        url = reverse("product:product-list")
+        response = api_client.get(url, {"category_tree": mobiles.pk})
+        assert sorted(p["name"] for p in response.data["results"]) == ["Android item", "Mobiles item"]
+
+        response = api_client.get(url, {"category_tree": electronics.pk})
+        assert len(response.data["results"]) == 3
+
+    def test_cannot_move_category_under_its_descendant(self, api_client):
+        from django.contrib.auth import get_user_model
+        User = get_user_model()
+        admin_user = User.objects.create(email="admin_tree@test.com", is_staff=True, role="staff")
+        api_client.force_authenticate(user=admin_user)
+        root = Category.objects.create(name="Root", slug="root")
+        child = Category.objects.create(name="Child", slug="child", parent=root)
+
+        url = reverse("product:category-detail", kwargs={"pk": root.pk})
+        response = api_client.patch(url, {"parent": child.pk})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_category_tree_is_nested_and_skips_inactive(self, api_client):
+        electronics = Category.objects.create(name="Electronics", slug="electronics")
+        mobiles = Category.objects.create(name="Mobiles", slug="mobiles", parent=electronics)
+        Category.objects.create(name="Android", slug="android", parent=mobiles)
+        hidden = Category.objects.create(name="Hidden", slug="hidden", parent=electronics, is_active=False)
+        Category.objects.create(name="Under Hidden", slug="under-hidden", parent=hidden)
+
+        response = api_client.get(reverse("product:category-tree"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 1
+        root = response.data[0]
+        assert root["name"] == "Electronics"
+        assert [c["name"] for c in root["children"]] == ["Mobiles"]
+        assert [c["name"] for c in root["children"][0]["children"]] == ["Android"]
+
+    def test_category_tree_etag_revalidation(self, api_client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        category = Category.objects.create(name="Books", slug="books")
+        url = reverse("product:category-tree")
+
+        response = api_client.get(url)
+        etag = response["ETag"]
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert len(ctx.captured_queries) == 0
+
+        category.name = "Novels"
+        category.save()
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+        assert response.data[0]["name"] == "Novels"
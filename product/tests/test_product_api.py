@@ -1,10 +1,17 @@
 import pytest
+from datetime import timedelta
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from account.models import SellerProfile
 from store.models.store import Store
 from product.models.product import Product
 from product.models.category import Category
+from discount.models import ProductDiscount
 
 @pytest.fixture
 def product_owner(db_user):
@@ -46,8 +53,8 @@ class TestProductAPI:
         
         assert response.status_code == status.HTTP_200_OK
         # Should only see 1 product
-        assert len(response.data) == 1
-        assert response.data[0]["name"] == "Approved Phone"
+        assert len(response.data["results"]) == 1
+        assert response.data["results"][0]["name"] == "Approved Phone"
 
     def test_seller_can_see_their_own_pending_products(self, api_client, product_owner, approved_store):
         api_client.force_authenticate(user=product_owner)
@@ -59,7 +66,7 @@ class TestProductAPI:
         response = api_client.get(url)
         
         assert response.status_code == status.HTTP_200_OK
-        assert any(p["name"] == "My Pending Product" for p in response.data)
+        assert any(p["name"] == "My Pending Product" for p in response.data["results"])
 
     def test_create_product_success(self, api_client, product_owner, approved_store, test_category):
         api_client.force_authenticate(user=product_owner)
@@ -136,3 +143,367 @@ class TestProductAPI:
         response = api_client.delete(url)
         assert response.status_code == status.HTTP_204_NO_CONTENT
         assert not Product.objects.filter(pk=product.pk).exists()
+
+
+    def test_list_products_resolves_discounts_in_bulk(self, api_client, approved_store, test_category):
+        now = timezone.now()
+        direct = Product.objects.create(
+            store=approved_store, category=test_category, name="Direct Sale", price=100.00, is_approved=True
+        )
+        by_category = Product.objects.create(
+            store=approved_store, category=test_category, name="Category Sale", price=100.00, is_approved=True
+        )
+        product_sale = ProductDiscount.objects.create(
+            name="Product Sale", discount_type="percentage", value=50,
+            start_date=now - timedelta(hours=1), end_date=now + timedelta(hours=1)
+        )
+        product_sale.products.add(direct)
+        category_sale = ProductDiscount.objects.create(
+            name="Category Sale", discount_type="fixed", value=10, priority=5,
+            start_date=now - timedelta(hours=1), end_date=now + timedelta(hours=1)
+        )
+        category_sale.categories.add(test_category)
+
+        url = reverse("product:product-list")
+        response = api_client.get(url)
+        prices = {p["name"]: p for p in response.data["results"]}
+
+        assert float(prices["Direct Sale"]["current_price"]) == 50.00
+        assert prices["Direct Sale"]["discount_info"]["name"] == "Product Sale"
+        assert float(prices["Category Sale"]["current_price"]) == 90.00
+        assert prices["Category Sale"]["discount_info"]["name"] == "Category Sale"
+
+    def test_list_products_query_count_is_independent_of_page_size(self, api_client, approved_store, test_category):
+        def list_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = api_client.get(reverse("product:product-list"))
+            assert response.status_code == status.HTTP_200_OK
+            return len(ctx.captured_queries)
+
+        for i in range(2):
+            Product.objects.create(
+                store=approved_store, category=test_category, name=f"Small {i}", price=10.00, is_approved=True
+            )
+        small_page = list_queries()
+
+        for i in range(20):
+            Product.objects.create(
+                store=approved_store, category=test_category, name=f"Large {i}", price=10.00, is_approved=True
+            )
+        assert list_queries() == small_page
+
+    def test_discount_changes_refresh_effective_price(self, approved_store, test_category):
+        now = timezone.now()
+        product = Product.objects.create(
+            store=approved_store, category=test_category, name="Synced", price=80.00, is_approved=True
+        )
+        assert product.effective_price == 80
+
+        sale = ProductDiscount.objects.create(
+            name="Quarter Off", discount_type="percentage", value=25,
+            start_date=now - timedelta(hours=1), end_date=now + timedelta(hours=1)
+        )
+        sale.categories.add(test_category)
+        product.refresh_from_db()
+        assert product.effective_price == 60
+
+        sale.value = 50
+        sale.save()
+        product.refresh_from_db()
+        assert product.effective_price == 40
+
+        sale.categories.clear()
+        product.refresh_from_db()
+        assert product.effective_price == 80
+
+    def test_refresh_prices_command_handles_expired_discounts(self, approved_store):
+        from product.management.commands.refresh_prices import BOUNDARY_CACHE_KEY
+        cache.delete(BOUNDARY_CACHE_KEY)
+        now = timezone.now()
+        product = Product.objects.create(store=approved_store, name="Expiring", price=100.00, is_approved=True)
+        sale = ProductDiscount.objects.create(
+            name="Ending Soon", discount_type="fixed", value=30,
+            start_date=now - timedelta(hours=1), end_date=now + timedelta(hours=1)
+        )
+        sale.products.add(product)
+        product.refresh_from_db()
+        assert product.effective_price == 70
+
+        # The discount window closes without any write to the discount itself
+        ProductDiscount.objects.filter(pk=sale.pk).update(end_date=now - timedelta(minutes=1))
+        call_command("refresh_prices", "--boundaries", "--workers", "1")
+        product.refresh_from_db()
+        assert product.effective_price == 100
+
+    def test_order_and_filter_by_current_price(self, api_client, approved_store):
+        now = timezone.now()
+        cheap = Product.objects.create(store=approved_store, name="Cheap", price=30.00, is_approved=True)
+        discounted = Product.objects.create(store=approved_store, name="Discounted", price=200.00, is_approved=True)
+        Product.objects.create(store=approved_store, name="Pricey", price=150.00, is_approved=True)
+        sale = ProductDiscount.objects.create(
+            name="Half Off", discount_type="percentage", value=50,
+            start_date=now - timedelta(hours=1), end_date=now + timedelta(hours=1)
+        )
+        sale.products.add(discounted)
+
+        url = reverse("product:product-list")
+        response = api_client.get(url, {"ordering": "current_price"})
+        assert [p["name"] for p in response.data["results"]] == ["Cheap", "Discounted", "Pricey"]
+
+        response = api_client.get(url, {"min_price": 50, "max_price": 120})
+        assert [p["name"] for p in response.data["results"]] == ["Discounted"]
+        assert cheap.pk not in [p["id"] for p in response.data["results"]]
+
+    def test_bulk_writes_keep_effective_price_in_sync(self, approved_store, test_category):
+        now = timezone.now()
+        sale = ProductDiscount.objects.create(
+            name="Category Sale", discount_type="percentage", value=10,
+            start_date=now - timedelta(hours=1), end_date=now + timedelta(hours=1)
+        )
+        sale.categories.add(test_category)
+
+        created = Product.objects.bulk_create([
+            Product(store=approved_store, name="Plain", slug="plain", price=50),
+            Product(store=approved_store, category=test_category, name="On Sale", slug="on-sale", price=100),
+        ])
+        prices = dict(Product.objects.filter(pk__in=[p.pk for p in created]).values_list('name', 'effective_price'))
+        assert prices == {"Plain": 50, "On Sale": 90}
+
+        Product.objects.filter(name="On Sale").update(price=200)
+        assert Product.objects.get(name="On Sale").effective_price == 180
+        Product.objects.filter(name="Plain").update(category=test_category)
+        assert Product.objects.get(name="Plain").effective_price == 45
+
+    def test_deleting_a_category_drops_its_discount_from_effective_price(self, api_client, approved_store, test_category):
+        now = timezone.now()
+        product = Product.objects.create(
+            store=approved_store, category=test_category, name="Orphaned", price=80.00, is_approved=True
+        )
+        Product.objects.create(store=approved_store, name="Other", price=75.00, is_approved=True)
+        sale = ProductDiscount.objects.create(
+            name="Quarter Off", discount_type="percentage", value=25,
+            start_date=now - timedelta(hours=1), end_date=now + timedelta(hours=1)
+        )
+        sale.categories.add(test_category)
+        product.refresh_from_db()
+        assert product.effective_price == 60
+
+        test_category.delete()
+        product.refresh_from_db()
+        assert product.category_id is None
+        assert product.effective_price == 80
+
+        response = api_client.get(reverse("product:product-list"), {"ordering": "current_price"})
+        assert response.status_code == status.HTTP_200_OK
+        assert [p["name"] for p in response.data["results"]] == ["Other", "Orphaned"]
+
+    def test_list_products_keyset_pagination(self, api_client, approved_store):
+        for i in range(5):
+            Product.objects.create(store=approved_store, name=f"Paged {i}", price=10.00, is_approved=True)
+
+        url = reverse("product:product-list")
+        seen = []
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(url, {"page_size": 2})
+            while True:
+                assert response.status_code == status.HTTP_200_OK
+                assert "count" not in response.data
+                seen.extend(p["name"] for p in response.data["results"])
+                if not response.data["next"]:
+                    break
+                response = api_client.get(response.data["next"])
+
+        # Newest first, every product exactly once, and no COUNT(*) on the way
+        assert seen == [f"Paged {i}" for i in range(4, -1, -1)]
+        assert not any("COUNT(" in q["sql"].upper() for q in ctx.captured_queries)
+
+    def test_list_products_page_size_is_capped(self, api_client, approved_store):
+        from product.pagination import ProductPagination
+        Product.objects.bulk_create([
+            Product(store=approved_store, name=f"Bulk {i}", slug=f"bulk-{i}", price=1,
+                    is_approved=True, is_publicly_visible=True)
+            for i in range(ProductPagination.max_page_size + 5)
+        ])
+
+        response = api_client.get(reverse("product:product-list"), {"page_size": 1000})
+        assert len(response.data["results"]) == ProductPagination.max_page_size
+        assert response.data["next"] is not None
+
+    def test_search_products_ranks_name_matches_first(self, api_client, approved_store):
+        Product.objects.create(
+            store=approved_store, name="Leather Case", description="Fits any phone", price=10.00, is_approved=True
+        )
+        Product.objects.create(store=approved_store, name="Smart Phone", price=300.00, is_approved=True)
+        Product.objects.create(store=approved_store, name="Hidden Phone", price=300.00, is_approved=False)
+        Product.objects.create(store=approved_store, name="Desk Lamp", price=20.00, is_approved=True)
+
+        url = reverse("product:product-search")
+        response = api_client.get(url, {"q": "phones"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [p["name"] for p in response.data["results"]] == ["Smart Phone", "Leather Case"]
+
+    def test_search_products_falls_back_to_fuzzy_match(self, api_client, approved_store):
+        from product.search import has_trigram_support
+        Product.objects.create(store=approved_store, name="Headphones", price=50.00, is_approved=True)
+
+        url = reverse("product:product-search")
+        response = api_client.get(url, {"q": "headph"})
+        assert [p["name"] for p in response.data["results"]] == ["Headphones"]
+
+        if has_trigram_support():
+            response = api_client.get(url, {"q": "headfones"})
+            assert [p["name"] for p in response.data["results"]] == ["Headphones"]
+
+    def test_search_products_requires_query(self, api_client):
+        response = api_client.get(reverse("product:product-search"))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_list_products_with_facets(self, api_client, approved_store, test_category):
+        other_category = Category.objects.create(name="Home", slug="home")
+        Product.objects.create(store=approved_store, category=test_category, name="Phone", price=300.00, is_approved=True)
+        Product.objects.create(store=approved_store, category=test_category, name="Cable", price=10.00, is_approved=True)
+        Product.objects.create(store=approved_store, category=other_category, name="Lamp", price=40.00, is_approved=True)
+        Product.objects.create(store=approved_store, category=other_category, name="Draft", price=40.00)
+
+        response = api_client.get(reverse("product:product-list"), {"facets": "true"})
+        facets = response.data["facets"]
+
+        assert {c["name"]: c["count"] for c in facets["categories"]} == {"Tech": 2, "Home": 1}
+        assert facets["stores"] == [{"id": approved_store.id, "name": "Test Store", "count": 3}]
+        bands = {(b["min"], b["max"]): b["count"] for b in facets["price_bands"]}
+        assert bands[(0, 25)] == 1
+        assert bands[(25, 50)] == 1
+        assert bands[(250, 500)] == 1
+
+    def test_facets_are_cached_until_store_products_change(self, api_client, approved_store, test_category):
+        Product.objects.create(store=approved_store, category=test_category, name="First", price=10.00, is_approved=True)
+        url = reverse("product:product-list")
+        params = {"facets": "true", "store": approved_store.id}
+
+        first = api_client.get(url, params).data["facets"]
+        with CaptureQueriesContext(connection) as ctx:
+            cached = api_client.get(url, {**params, "page_size": 5}).data["facets"]
+        assert cached == first
+        assert not any("GROUP BY" in q["sql"] for q in ctx.captured_queries)
+
+        Product.objects.create(store=approved_store, category=test_category, name="Second", price=10.00, is_approved=True)
+        refreshed = api_client.get(url, params).data["facets"]
+        assert refreshed["stores"][0]["count"] == 2
+
+    def test_facet_invalidation_is_scoped_to_the_changed_store(self, approved_store, test_category):
+        from django.http import QueryDict
+        from product.facets import facet_cache_key
+        other_store = Store.objects.create(
+            seller=approved_store.seller, name="Other Store", is_approved=True, is_active=True
+        )
+        scoped = QueryDict(f"store={approved_store.id}")
+        unscoped = QueryDict("min_price=5")
+        keys = facet_cache_key("s", scoped), facet_cache_key("u", unscoped)
+
+        Product.objects.create(store=other_store, name="Elsewhere", price=10.00, is_approved=True)
+        assert facet_cache_key("s", scoped) == keys[0]
+        assert facet_cache_key("u", unscoped) != keys[1]
+
+        Product.objects.create(store=approved_store, category=test_category, name="Here", price=10.00, is_approved=True)
+        assert facet_cache_key("s", scoped) != keys[0]
+
+    def test_public_list_is_served_from_cache(self, api_client, approved_store):
+        Product.objects.create(store=approved_store, name="Cached", price=10.00, is_approved=True)
+        url = reverse("product:product-list")
+
+        first = api_client.get(url, {"ordering": "price", "page_size": 5})
+        with CaptureQueriesContext(connection) as ctx:
+            second = api_client.get(url, {"page_size": 5, "ordering": "price"})
+        assert len(ctx.captured_queries) == 0
+        assert second.data == first.data
+
+        Product.objects.create(store=approved_store, name="Fresh", price=20.00, is_approved=True)
+        third = api_client.get(url, {"ordering": "price", "page_size": 5})
+        assert [p["name"] for p in third.data["results"]] == ["Cached", "Fresh"]
+
+    def test_public_cache_follows_moderation_and_discounts(self, api_client, approved_store):
+        product = Product.objects.create(store=approved_store, name="Moderated", price=100.00)
+        list_url = reverse("product:product-list")
+        detail_url = reverse("product:product-detail", kwargs={"pk": product.pk})
+        assert api_client.get(list_url).data["results"] == []
+        assert api_client.get(detail_url).status_code == status.HTTP_404_NOT_FOUND
+
+        from django.contrib.auth import get_user_model
+        staff_user = get_user_model().objects.create(email="staff_cache@test.com", is_staff=True, role="staff")
+        api_client.force_authenticate(user=staff_user)
+        api_client.post(reverse("product:product-approve", kwargs={"pk": product.pk}))
+        api_client.force_authenticate(user=None)
+
+        assert [p["name"] for p in api_client.get(list_url).data["results"]] == ["Moderated"]
+        assert float(api_client.get(detail_url).data["current_price"]) == 100.00
+
+        now = timezone.now()
+        sale = ProductDiscount.objects.create(
+            name="Cache Buster", discount_type="fixed", value=15,
+            start_date=now - timedelta(hours=1), end_date=now + timedelta(hours=1)
+        )
+        sale.products.add(product)
+        assert float(api_client.get(detail_url).data["current_price"]) == 85.00
+        assert float(api_client.get(list_url).data["results"][0]["current_price"]) == 85.00
+
+        approved_store.is_active = False
+        approved_store.save()
+        assert api_client.get(list_url).data["results"] == []
+        assert api_client.get(detail_url).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_product_detail_conditional_get(self, api_client, approved_store):
+        product = Product.objects.create(store=approved_store, name="Validated", price=10.00, is_approved=True)
+        url = reverse("product:product-detail", kwargs={"pk": product.pk})
+
+        response = api_client.get(url)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert len(ctx.captured_queries) == 1
+
+        response = api_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        product.name = "Renamed"
+        product.save()
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["name"] == "Renamed"
+        assert response["ETag"] != etag
+
+    def test_store_moderation_propagates_public_visibility(self, api_client, approved_store):
+        visible = Product.objects.create(store=approved_store, name="Listed", price=10.00, is_approved=True)
+        pending = Product.objects.create(store=approved_store, name="Pending", price=10.00)
+        assert Product.objects.get(pk=visible.pk).is_publicly_visible
+        assert not Product.objects.get(pk=pending.pk).is_publicly_visible
+
+        url = reverse("product:product-list")
+        with CaptureQueriesContext(connection) as ctx:
+            api_client.get(url)
+        # The public page reads the flag instead of the store's moderation columns, with no join at all
+        pages = [q["sql"] for q in ctx.captured_queries if 'FROM "product_product"' in q["sql"]]
+        assert len(pages) == 1
+        assert " JOIN " not in pages[0]
+        assert '"store_store"' not in pages[0]
+
+        from django.contrib.auth import get_user_model
+        staff_user = get_user_model().objects.create(email="staff_vis@test.com", is_staff=True, role="staff")
+        api_client.force_authenticate(user=staff_user)
+        api_client.post(reverse("store:store-reject", kwargs={"pk": approved_store.pk}), {"rejection_reason": "Fake"})
+        api_client.force_authenticate(user=None)
+        assert not Product.objects.filter(is_publicly_visible=True).exists()
+        assert api_client.get(url).data["results"] == []
+
+        approved_store.refresh_from_db()
+        approved_store.is_approved = True
+        approved_store.is_suspended = True
+        approved_store.save()
+        assert not Product.objects.filter(is_publicly_visible=True).exists()
+
+        approved_store.is_suspended = False
+        approved_store.save()
+        assert list(Product.objects.filter(is_publicly_visible=True)) == [visible]
+        assert [p["name"] for p in api_client.get(url).data["results"]] == ["Listed"]
@@ -1,13 +1,24 @@
+from functools import partial
 from django.db import models
 from django.utils import timezone
-from rest_framework import viewsets, permissions, status, serializers as drf_serializers
+from django.utils.http import parse_etags
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import viewsets, permissions, status, filters, serializers as drf_serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from drf_spectacular.utils import extend_schema, OpenApiResponse
+from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter
 from .models.product import Product
 from .models.category import Category
 from .serializers import ProductSerializer, CategorySerializer, ProductApprovalSerializer
 from .permissions import IsStoreOwnerForProduct
+from .filters import ProductFilter
+from .pagination import ProductPagination, ProductSearchPagination, CategoryPagination
+from .search import search_products
+from .facets import get_facets
+from .category_tree import get_category_tree
+from .response_cache import cached_list_response, cached_detail_response, get_pricing_changed_at
+from .inventory import available_to_sell
+from core.mixins import ConditionalRetrieveMixin
 from store.models.store import Store
 
 @extend_schema(tags=['Categories'])
@@ -18,27 +29,120 @@ class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = CategoryPagination
+
+    @extend_schema(
+        summary="Get the category tree",
+        description="All active categories nested under their parents. Served from cache with a strong ETag; "
+                    "send it back in If-None-Match to get a 304 while the tree is unchanged.",
+        responses={
+            200: OpenApiResponse(description="Nested category tree"),
+            304: OpenApiResponse(description="Tree unchanged since the given ETag")
+        }
+    )
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def tree(self, request):
+        etag, tree = get_category_tree()
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(tree, headers=headers)
+
+    @extend_schema(
+        summary="List category descendants",
+        description="Every category below this one, at any depth, in tree order.",
+        responses={200: CategorySerializer(many=True)}
+    )
+    @action(detail=True, methods=['get'])
+    def descendants(self, request, pk=None):
+        category = self.get_object()
+        serializer = self.get_serializer(category.get_descendants(), many=True)
+        return Response(serializer.data)
+
+    @extend_schema(
+        summary="List category ancestors",
+        description="The chain of parent categories from the root down to this one's parent.",
+        responses={200: CategorySerializer(many=True)}
+    )
+    @action(detail=True, methods=['get'])
+    def ancestors(self, request, pk=None):
+        category = self.get_object()
+        serializer = self.get_serializer(category.get_ancestors(), many=True)
+        return Response(serializer.data)
 
 @extend_schema(tags=['Products'])
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ConditionalRetrieveMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing product instances.
     """
     serializer_class = ProductSerializer
+    # store_name is part of the payload, so a store edit also changes the product
+    last_modified_fields = ('update_at', 'store__updated_at')
+    pagination_class = ProductPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = ProductFilter
+    ordering_fields = ['current_price', 'price', 'created_at']
 
     def get_queryset(self):
         user = self.request.user
+        queryset = Product.objects.annotate(current_price=models.F('effective_price'))
         if user.is_authenticated and user.is_staff:
-            return Product.objects.all()
+            return queryset.select_related('store', 'category')
         
         # If user is a seller, show them their own products (even unapproved) + other approved products
         if user.is_authenticated and hasattr(user, 'seller_profile'):
-            return Product.objects.filter(
+            return queryset.select_related('store', 'category').filter(
                 models.Q(store__seller=user.seller_profile) | models.Q(is_approved=True)
             )
 
-        # General public sees only approved products from active stores
-        return Product.objects.filter(is_approved=True, store__is_active=True, store__is_approved=True)
+        # General public sees only approved products from active, approved and unsuspended stores.
+        # The page is read from the product table alone; the store and category names the
+        # serializer shows come from one lookup by id each.
+        return queryset.filter(is_publicly_visible=True).prefetch_related(
+            models.Prefetch('store', queryset=Store.objects.only('id', 'name')),
+            models.Prefetch('category', queryset=Category.objects.only('id', 'name')),
+        )
+
+    def get_audience(self):
+        user = self.request.user
+        if user.is_authenticated and user.is_staff:
+            return 'staff'
+        if user.is_authenticated and hasattr(user, 'seller_profile'):
+            return f'seller:{user.seller_profile.pk}'
+        return 'public'
+
+    @extend_schema(
+        parameters=[OpenApiParameter(
+            'facets', bool,
+            description="Also return category, store and price-band counts for the filtered result set"
+        )]
+    )
+    def list(self, request, *args, **kwargs):
+        # Anonymous callers all see the same catalog, so their pages are shared
+        if self.get_audience() == 'public':
+            return cached_list_response(request, partial(self.list_with_facets, request, *args, **kwargs))
+        return self.list_with_facets(request, *args, **kwargs)
+
+    def list_with_facets(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if request.query_params.get('facets') in ('1', 'true', 'True'):
+            response.data['facets'] = get_facets(
+                self.filter_queryset(self.get_queryset()), request.query_params, self.get_audience()
+            )
+        return response
+
+    def get_last_modified(self):
+        last_modified = super().get_last_modified()
+        pricing_changed_at = get_pricing_changed_at()
+        if last_modified and pricing_changed_at:
+            return max(last_modified, pricing_changed_at)
+        return last_modified
+
+    def build_retrieve_response(self, request, *args, **kwargs):
+        pk = str(kwargs.get('pk', ''))
+        if self.get_audience() == 'public' and pk.isdigit():
+            return cached_detail_response(int(pk), partial(super().build_retrieve_response, request, *args, **kwargs))
+        return super().build_retrieve_response(request, *args, **kwargs)
 
     def get_permissions(self):
         if self.action in ['create']:
@@ -73,6 +177,44 @@ class ProductViewSet(viewsets.ModelViewSet):
 
         serializer.save(store=store)
 
+    @extend_schema(
+        summary="Search products",
+        description="Full-text search over product name and description, best matches first. "
+                    "Falls back to typo-tolerant matching when nothing matches exactly.",
+        parameters=[OpenApiParameter('q', str, required=True, description="Search terms")],
+        responses={
+            200: ProductSerializer(many=True),
+            400: OpenApiResponse(description="Missing search query")
+        }
+    )
+    @action(detail=False, methods=['get'], url_path='search', pagination_class=ProductSearchPagination)
+    def search(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise drf_serializers.ValidationError({"q": "This query parameter is required."})
+
+        queryset = search_products(self.filter_queryset(self.get_queryset()), query)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(
+        summary="Product availability",
+        description="Units available to sell right now: stock minus quantities held by open checkouts.",
+        responses={
+            200: OpenApiResponse(description="Stock and available-to-sell quantity"),
+            404: OpenApiResponse(description="Product not found")
+        }
+    )
+    @action(detail=True, methods=['get'], url_path='availability')
+    def availability(self, request, pk=None):
+        product = self.get_object()
+        return Response({
+            'product': product.pk,
+            'stock_quantity': product.stock_quantity,
+            'available': available_to_sell([product.pk])[product.pk],
+        })
+
     @extend_schema(
         summary="Approve a product",
         description="Approve a product for listing. Only staff users can perform this action.",
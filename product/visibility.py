@@ -0,0 +1,16 @@
+def is_store_public(store):
+    return store.is_active and store.is_approved and not store.is_suspended
+
+
+def refresh_store_visibility(store):
+    """
+    Propagate a store's moderation state to Product.is_publicly_visible with one UPDATE.
+
+    Unapproved products are never public whatever the store does, so only
+    approved rows whose flag actually flips are written. Returns the row count.
+    """
+    from product.models import Product
+    visible = is_store_public(store)
+    return Product.objects.filter(store_id=store.pk, is_approved=True)\
+        .exclude(is_publicly_visible=visible)\
+        .update(is_publicly_visible=visible)
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 20:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0005_remove_sellerprofile_account_sel_is_veri_894913_idx_and_more'),
+        ('store', '0002_store_banner_store_logo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='store',
+            index=models.Index(fields=['-created_at', 'id'], name='store_store_created_972560_idx'),
+        ),
+    ]
@@ -52,6 +52,9 @@ class Store(models.Model):
     class Meta:
         ordering = ["-created_at"]
         unique_together = ("seller", "name")
+        indexes = [
+            models.Index(fields=["-created_at", "id"]),
+        ]
 
     def __str__(self):
         return self.name
\ No newline at end of file
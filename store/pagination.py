@@ -0,0 +1,5 @@
+from core.pagination import KeysetPagination
+
+
+class StorePagination(KeysetPagination):
+    max_page_size = 100
@@ -6,15 +6,18 @@ from rest_framework.response import Response
 from .models.store import Store
 from .serializers import StoreSerializer, StoreApprovalSerializer
 from .permissions import IsStoreOwner, IsStaffUser
+from .pagination import StorePagination
+from core.mixins import ConditionalRetrieveMixin
 
 @extend_schema(tags=['Stores'])
-class StoreViewSet(viewsets.ModelViewSet):
+class StoreViewSet(ConditionalRetrieveMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing store instances.
     """
     queryset = Store.objects.all()
     # update this to hide sensitive info from be in get request 
     serializer_class = StoreSerializer
+    pagination_class = StorePagination
     
     def get_permissions(self):
         if self.action in ['create']: